@@ -0,0 +1,9 @@
+# -*- coding: utf-8 -*-
+# announcement logic that runs on decoded simulator data.
+from .rules import *
+from .instruments import *
+from .settle import *
+from .crossing import *
+from .gpws import *
+from .engines import *
+from .conditioning import *
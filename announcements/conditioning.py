@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+## Conditioning of decoded values before they reach the announcement rules.
+## Each conditioned field can have:
+## deadband: a change is only passed on once the value is at least deadband away from the last value passed on.
+## Measuring from the last value passed on rather than the previous sample gives hysteresis: a value wandering
+## around a setting is announced once, while small changes in one direction add up until they are announced.
+## debounce: a change is only passed on once the value has kept it for debounce seconds. A switch flicking
+## on and back off within that time isn't announced at all.
+## Fields that aren't conditioned pass through untouched.
+## Rules should compare a conditioned field against the value last announced rather than the previous sample, so trim
+## moved in small steps is announced as the sum. old(record) gives the values to evaluate the rules with.
+
+__all__ = ['SignalConditioner']
+
+class SignalConditioner(object):
+    ## fields: {name: (deadband, debounce)}
+    def __init__(self, fields):
+        self.fields = dict(fields)
+        self.names = frozenset(self.fields)
+        # last value passed on for each field
+        self.reported = {}
+        # changes waiting out their debounce time: name: (value, time it was first seen)
+        self.pending = {}
+        # value announced before the one just passed on, for the fields passed by the last filter or release
+        self.announced = {}
+        self.passed = 0
+        self.suppressed = 0
+
+    def reset(self, record):
+        ## take the current values as the ones already announced, e.g. after reconnecting
+        self.reported = {name: record.value(name) for name in self.names}
+        self.pending = {}
+        self.announced = {}
+
+    def filter(self, record, changed, now):
+        ## returns the changed fields to announce: conditioned fields only if they pass, plus debounced changes
+        ## that have now held long enough.
+        self.announced = {}
+        conditioned = changed & self.names
+        if not conditioned and not self.pending:
+            return changed
+        result = changed - self.names
+        for name in conditioned:
+            deadband, debounce = self.fields[name]
+            value = record.value(name)
+            if not self._outside(name, value, deadband):
+                self.pending.pop(name, None)
+                self.suppressed += 1
+            elif debounce:
+                if name not in self.pending or self.pending[name][0] != value:
+                    self.pending[name] = (value, now)
+            else:
+                self._pass(name, value)
+                result.add(name)
+        result.update(self._release(record, now))
+        return result
+
+    def release(self, record, now):
+        ## returns the fields whose debounced change has held for long enough. Called regularly, not only
+        ## when something changed, so the change is announced as soon as its debounce time is over.
+        self.announced = {}
+        return self._release(record, now)
+
+    def old(self, record):
+        ## the previous values to evaluate rules with after filter or release: record.old, except for the fields
+        ## just passed on, which compare against the value announced before.
+        return AnnouncedValues(record.old, self.announced)
+
+    def _release(self, record, now):
+        released = set()
+        for name, (value, since) in list(self.pending.items()):
+            deadband, debounce = self.fields[name]
+            current = record.value(name)
+            if not self._outside(name, current, deadband):
+                # back where it was: nothing to announce
+                del self.pending[name]
+                self.suppressed += 1
+            elif current != value:
+                self.pending[name] = (current, now)
+            elif now - since >= debounce:
+                del self.pending[name]
+                self._pass(name, value)
+                released.add(name)
+        return released
+
+    def _outside(self, name, value, deadband):
+        reported = self.reported.get(name)
+        if reported is None:
+            return True
+        if deadband:
+            return abs(value - reported) >= deadband
+        return value != reported
+
+    def _pass(self, name, value):
+        # the record isn't touched: release() runs after the record's commit, and changing record.old there
+        # would report the field as changed again on the next read
+        if name in self.reported:
+            self.announced[name] = self.reported[name]
+        self.reported[name] = value
+        self.passed += 1
+
+    def statistics(self):
+        return F'{self.passed} changes passed, {self.suppressed} suppressed, {len(self.pending)} waiting'
+
+class AnnouncedValues(object):
+    ## previous values read by name, with some of them replaced.
+    def __init__(self, old, overrides):
+        self.old = old
+        self.overrides = overrides
+
+    def __getitem__(self, name):
+        if name in self.overrides:
+            return self.overrides[name]
+        return self.old[name]
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+## Detection of a value crossing thresholds, e.g. altitude callouts every 1000 feet.
+## Each update finds the thresholds between the previous and the current sample by bisection over the sorted
+## thresholds, so every threshold passed is caught, even if several were passed between two samples,
+## and the cost doesn't depend on the number of thresholds.
+## Hysteresis: a threshold that fired fires again only after the value has been at least hysteresis away from it.
+from bisect import bisect_left, bisect_right
+
+__all__ = ['CrossingDetector', 'UP', 'DOWN', 'BOTH']
+
+# directions of crossings to report
+UP = 1
+DOWN = -1
+BOTH = 0
+
+class CrossingDetector(object):
+    ## max_step: a larger change between two samples is taken as a jump (slew, flight reload), not a crossing.
+    def __init__(self, thresholds, hysteresis=0, direction=BOTH, max_step=None):
+        self.thresholds = sorted(thresholds)
+        self.hysteresis = hysteresis
+        self.direction = direction
+        self.max_step = max_step
+        self.previous = None
+        # thresholds that fired and aren't armed again yet
+        self.fired = set()
+
+    def reset(self, value=None):
+        ## forget the previous sample. The next update only takes its value as the starting point.
+        self.previous = value
+        self.fired = set()
+
+    def update(self, value):
+        ## returns the thresholds crossed since the previous sample, in the order they were crossed.
+        previous = self.previous
+        self.previous = value
+        if previous is None or value == previous:
+            return []
+        if self.max_step is not None and abs(value - previous) > self.max_step:
+            self.fired = set()
+            return []
+        if value > previous:
+            if self.direction == DOWN:
+                return []
+            # thresholds in (previous, value]
+            crossed = self.thresholds[bisect_right(self.thresholds, previous):bisect_right(self.thresholds, value)]
+        else:
+            if self.direction == UP:
+                return []
+            # thresholds in [value, previous), highest first
+            crossed = self.thresholds[bisect_left(self.thresholds, value):bisect_left(self.thresholds, previous)][::-1]
+        result = [threshold for threshold in crossed if threshold not in self.fired]
+        # arm the thresholds the value has moved far enough away from, and disarm the ones that just fired
+        if self.hysteresis:
+            self.fired = set(threshold for threshold in self.fired.union(result) if abs(value - threshold) < self.hysteresis)
+        return result
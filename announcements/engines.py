@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+## Engine start monitoring for any number of engines.
+## The fields of every engine are gathered from the instrument record into arrays indexed by engine number,
+## and the start transitions of all engines are evaluated in one step. Each transition is announced once per start:
+## when an engine has spun down again with no fuel flowing and the starter off, it is shut down and its
+## transitions are armed for the next start. Ignition is announced by its own switch rule, not here.
+## While an engine is being started with ignition on, its ITT is read out (see temperature).
+import numpy as np
+
+__all__ = ['EngineMonitor']
+
+# per engine fields, named Eng<number><field> in the schema
+FIELDS = ('Starter', 'FuelFlow', 'N1', 'N2', 'Combustion', 'ITT')
+# transitions, in the order they are announced
+FUEL_FLOW, N2, N1 = range(3)
+MESSAGES = ('Number {0} fuel flow', 'number {0}, 5 percent N2', 'number {0}, 5 percent N1')
+
+class EngineMonitor(object):
+    ## fuel_flow: pounds per hour taken as fuel flowing. spool: percent N1/N2 announced during a start.
+    ## count: number of engines of the aircraft. Default: every engine in the record.
+    def __init__(self, record, fuel_flow=10, spool=5, count=None):
+        self.record = record
+        self.fuel_flow = fuel_flow
+        self.spool = spool
+        # engines present in the record: Eng1, Eng2, ... up to the first one missing
+        self.count = 0
+        while F'Eng{self.count + 1}Starter' in record.index and (count is None or self.count < count):
+            self.count += 1
+        self.slots = {field: np.array([record.index[F'Eng{engine}{field}'] for engine in range(1, self.count + 1)], dtype=np.intp)
+            for field in FIELDS}
+        # slots of the levels compared against a threshold, one row per transition
+        self.levels = np.array([self.slots['FuelFlow'], self.slots['N2'], self.slots['N1']], dtype=np.intp)
+        self.thresholds = np.array([[fuel_flow], [spool], [spool]], dtype=np.float64)
+        self.announced = np.zeros((len(MESSAGES), self.count), dtype=bool)
+        self.reached = np.zeros((len(MESSAGES), self.count), dtype=bool)
+
+    def reset(self):
+        ## arm every transition of every engine
+        self.announced[:] = False
+
+    def update(self):
+        ## returns the messages for the transitions reached since the last update, by transition and engine.
+        values = self.record.values
+        starter = values[self.slots['Starter']] != 0
+        reached = self.reached
+        np.greater(values[self.levels], self.thresholds, out=reached)
+        reached &= starter
+        reached &= ~self.announced
+        self.announced |= reached
+        shutdown = ~starter & (values[self.slots['N2']] < self.spool) & (values[self.slots['FuelFlow']] <= self.fuel_flow)
+        self.announced[:, shutdown] = False
+        if not reached.any():
+            return []
+        return [MESSAGES[transition].format(engine + 1) for transition, engine in np.argwhere(reached)]
+
+    def starting(self):
+        ## mask of the engines being started with ignition on
+        values = self.record.values
+        return (values[self.slots['Starter']] != 0) & (values[self.slots['Combustion']] != 0)
+
+    def temperature(self, metric=True):
+        ## (engine number, ITT) of the first engine being started with ignition on, or None.
+        values = self.record.values
+        starting = np.flatnonzero(self.starting())
+        if not len(starting):
+            return None
+        engine = int(starting[0])
+        temperature = values[self.slots['ITT'][engine]]
+        if not metric:
+            temperature = 9.0/5.0 * temperature + 32
+        return engine + 1, round(temperature)
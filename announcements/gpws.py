@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+## Predictive GPWS height callouts.
+## Radio altitude is sampled at a high rate and its rate of change is smoothed over the samples. Each callout
+## is fired when the time left to its height drops to the audio latency (the time from asking for a sound to
+## hearing it), so the callout is heard as the aircraft passes the height rather than after.
+## A height passed between two samples without its callout firing is a missed window: its callout is fired
+## straight away, late, and counted.
+__all__ = ['GPWSCallouts']
+
+class GPWSCallouts(object):
+    ## heights: callout heights in feet.
+    ## output_latency: seconds of audio buffering before a sound is heard. The measured time taken to start
+    ## each sound (see audio_started) is added to it.
+    ## rearm: a callout fires again only after climbing this many feet above its height, e.g. after a go-around.
+    def __init__(self, heights, output_latency=0.1, rearm=100, smoothing=0.3):
+        self.heights = sorted(heights, reverse=True)
+        self.output_latency = output_latency
+        self.rearm = rearm
+        self.smoothing = smoothing
+        self.armed = set(self.heights)
+        # time and radio altitude of the last sample
+        self.previous = None
+        # smoothed rate of change of radio altitude in feet per second, negative when descending
+        self.rate = None
+        # smoothed time between samples and time taken to start a sound, in seconds
+        self.interval = 0.05
+        self.start_delay = 0.0
+        self.on_time = 0
+        self.late = 0
+        self.error_total = 0.0
+
+    @property
+    def latency(self):
+        return self.output_latency + self.start_delay
+
+    def audio_started(self, seconds):
+        ## report how long starting a callout sound took
+        self.start_delay += (seconds - self.start_delay) * self.smoothing
+
+    def reset(self):
+        ## forget the previous sample, e.g. after slewing: the next sample is a new starting point, not a descent.
+        self.previous = None
+        self.rate = None
+
+    def update(self, radioAltitude, verticalSpeed, sampled, now=None):
+        ## radioAltitude was read at time sampled. Returns the heights to call out now, highest first.
+        ## verticalSpeed in feet per minute only decides whether the aircraft is descending, as before.
+        if now is None:
+            now = sampled
+        previous = self.previous
+        if previous is not None and sampled > previous[0]:
+            dt = sampled - previous[0]
+            measured = (radioAltitude - previous[1]) / dt
+            self.rate = measured if self.rate is None else self.rate + (measured - self.rate) * self.smoothing
+            self.interval += (dt - self.interval) * self.smoothing
+        if previous is None or sampled > previous[0]:
+            self.previous = (sampled, radioAltitude)
+        if previous is None:
+            return []
+        # arm again the callouts well below the aircraft
+        for height in self.heights:
+            if height not in self.armed and radioAltitude > height + self.rearm:
+                self.armed.add(height)
+        if self.rate is None or self.rate >= 0 or verticalSpeed >= -50:
+            return []
+        # the aircraft has descended further since the sample was read
+        age = max(now - sampled, 0.0)
+        callouts = []
+        for height in self.heights:
+            if height not in self.armed:
+                continue
+            if radioAltitude <= height:
+                self.armed.discard(height)
+                if previous[1] > height:
+                    # passed between two samples: late, but still worth calling
+                    self.late += 1
+                    callouts.append(height)
+                continue
+            timeLeft = (radioAltitude - height) / -self.rate - age
+            # fire on the sample closest to the moment the sound has to start
+            if timeLeft <= self.latency + self.interval / 2:
+                self.armed.discard(height)
+                self.on_time += 1
+                # height at which the callout should be heard
+                self.error_total += abs(radioAltitude + self.rate * (age + self.latency) - height)
+                callouts.append(height)
+        return callouts
+
+    def statistics(self):
+        error = self.error_total / self.on_time if self.on_time else 0
+        return (F'{self.on_time} callouts on time (average predicted error {error:.1f} feet), '
+            F'{self.late} late after a missed window, latency {self.latency * 1000:.0f} ms')
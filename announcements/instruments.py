@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+## Rules for the instrument announcements made by readInstruments.
+from .rules import *
+
+__all__ = ['INSTRUMENT_RULES', 'SETTLE_RULES']
+
+# autobrake positions
+AUTOBRAKE = {0: 'R T O', 1: 'off', 2: 'position 1', 3: 'position 2', 4: 'position 3', 5: 'maximum'}
+
+INSTRUMENT_RULES = [
+    # landing gear
+    Rule(('Gear',), lambda new, old: new['Gear'] == 0, 'Gear up.', PRIORITY_HIGH, key='gear'),
+    Rule(('Gear',), lambda new, old: new['Gear'] == 16383, 'Gear down.', PRIORITY_HIGH, key='gear'),
+    # spoilers
+    Rule(('Spoilers',), lambda new, old: new['Spoilers'] == 4800, 'spoilers armed.', PRIORITY_HIGH, key='spoilers'),
+    Rule(('Spoilers',), lambda new, old: new['Spoilers'] == 16384, 'Spoilers deployed', PRIORITY_HIGH, key='spoilers'),
+    Rule(('Spoilers',), lambda new, old: new['Spoilers'] == 0 and old['Spoilers'] == 4800, 'arm spoilers off', PRIORITY_HIGH, key='spoilers'),
+    Rule(('Spoilers',), lambda new, old: new['Spoilers'] == 0 and old['Spoilers'] != 4800, 'Spoilers retracted', PRIORITY_HIGH, key='spoilers'),
+    # radios
+    Rule(('Com1Freq',), None, 'com 1, {Com1Freq}'),
+    Rule(('Com2Freq',), None, 'com 2, {Com2Freq}'),
+    Rule(('Transponder',), None, 'Squawk {Transponder:04d}'),
+    # altimeter setting, when the whole hPa changed
+    Rule(('Altimeter',), lambda new, old: int(new['Altimeter'] + 0.5) != int(old['Altimeter'] + 0.5),
+        'Altimeter: {AltimeterHPA}, {AltimeterInches} inches'),
+    # autobrakes
+    Rule(('AutoBrake',), lambda new, old: new['AutoBrake'] in AUTOBRAKE,
+        lambda new, old: F"Auto brake {AUTOBRAKE[new['AutoBrake']]}"),
+    # APU
+    Rule(('APUPercentage',), lambda new, old: old['APUPercentage'] <= 4 < new['APUPercentage'], 'A P U starting'),
+    Rule(('APUPercentage',), lambda new, old: new['APUPercentage'] == 100, 'apu at 100 percent'),
+    Rule(('APUPercentage',), lambda new, old: old['APUPercentage'] == 100, 'Shutting down A P U'),
+    Rule(('APUPercentage',), lambda new, old: new['APUPercentage'] == 0, 'A P U shut down'),
+    Rule(('APUGenerator',), lambda new, old: new['APUGenerator'], '{APUVoltage:.0f} volts'),
+    # switches
+    toggle('PitotHeat', 'Pitot Heat', 'on', 'off'),
+    toggle('ParkingBrake', 'Parking brake', 'on', 'off'),
+    toggle('AutoFeather', 'Auto Feather', 'Active', 'off'),
+    toggle('ApMaster', 'Auto pilot master', 'active', 'off'),
+    toggle('AutoThrottleArm', 'Auto Throttle', 'Armed', 'off'),
+    toggle('ApYawDamper', 'Yaw Damper', 'active', 'off'),
+    toggle('Toga', 'take off power', 'active', 'off'),
+    toggle('ApAltitudeLock', 'altitude lock', 'active', 'off'),
+    toggle('ApHeadingLock', 'Heading lock', 'active', 'off'),
+    toggle('ApNavLock', 'nav lock', 'active', 'off'),
+    toggle('ApFlightDirector', 'Flight Director', 'Active', 'off'),
+    toggle('ApNavGPS', 'Nav gps switch', 'set to GPS', 'set to nav'),
+    toggle('ApAttitudeHold', 'Attitude hold', 'active', 'off'),
+    toggle('ApWingLeveler', 'Wing leveler', 'active', 'off'),
+    toggle('ApAutoRudder', 'Auto rudder', 'active', 'off'),
+    toggle('ApApproachHold', "approach mode", "active", "off"),
+    toggle('ApSpeedHold', 'Airspeed hold', 'active', 'off'),
+    toggle('ApMachHold', 'Mach hold', 'Active', 'off'),
+    toggle('PropSync', 'Propeller Sync', 'active', 'off'),
+    toggle('BatteryMaster', 'Battery Master', 'active', 'off'),
+    toggle('Door1', 'Door 1', 'open', 'closed'),
+    toggle('Door2', 'Door 2', 'open', 'closed'),
+    toggle('Door3', 'Door 3', 'open', 'closed'),
+    toggle('Door4', 'Door 4', 'open', 'closed'),
+    toggle('Eng1Starter', 'Number 1 starter', 'engaged', 'off'),
+    toggle('Eng2Starter', 'Number 2 starter', 'engaged', 'off'),
+    toggle('Eng3Starter', 'Number 3 starter', 'engaged', 'off'),
+    toggle('Eng4Starter', 'Number 4 starter', 'engaged', 'off'),
+    toggle('Eng1Combustion', 'Number 1 ignition', 'on', 'off'),
+    toggle('Eng2Combustion', 'Number 2 ignition', 'on', 'off'),
+    toggle('Eng3Combustion', 'Number 3 ignition', 'on', 'off'),
+    toggle('Eng4Combustion', 'Number 4 ignition', 'on', 'off'),
+    toggle('Eng1Generator', 'Number 1 generator', 'active', 'off'),
+    toggle('Eng2Generator', 'Number 2 generator', 'active', 'off'),
+    toggle('Eng3Generator', 'Number 3 generator', 'active', 'off'),
+    toggle('Eng4Generator', 'Number 4 generator', 'active', 'off'),
+    toggle('BeaconLights', 'Beacon light', 'on', 'off'),
+    toggle('LandingLights', 'Landing Lights', 'on', 'off'),
+    toggle('TaxiLights', 'Taxi Lights', 'on', 'off'),
+    toggle('NavigationLights', 'Nav lights', 'on', 'off'),
+    toggle('StrobeLights', 'strobe lights', 'on', 'off'),
+    toggle('InstrumentLights', 'Instrument lights', 'on', 'off'),
+    toggle('APUGenerator', 'A P U Generator', 'active', 'off'),
+    toggle('AvionicsMaster', 'Avionics master', 'active', 'off'),
+]
+
+# values that move for a while: announced by the settle detector once they stop moving
+SETTLE_RULES = [
+    Rule(('Flaps',), None, 'Flaps {Flaps:.0f}', PRIORITY_HIGH, setting='flapsEnabled'),
+    # autopilot settings
+    Rule(('ApAltitude',), None, 'Altitude set to {ApAltitude:.0f}'),
+    Rule(('ApHeading',), None, '{ApHeading} degrees', setting='APEnabled'),
+    Rule(('ApAirspeed',), None, '{ApAirspeed}', setting='APEnabled'),
+    Rule(('ApMach',), None, 'mach {ApMach:.2f}', setting='APEnabled'),
+    Rule(('ApVerticalSpeed',), None, '{ApVerticalSpeed} feet per minute', setting='APEnabled'),
+    # trim, when flying by hand
+    Rule(('ElevatorTrim',), lambda new, old: new['ApMaster'] != 1,
+        lambda new, old: F"Trim down {abs(round(new['ElevatorTrim'], 2))}" if new['ElevatorTrim'] < 0 else F"Trim up {round(new['ElevatorTrim'], 2)}",
+        setting='trimEnabled'),
+]
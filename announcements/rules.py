@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+## Announcements driven by a rule table.
+## A rule names the fields it depends on, a condition, a message and a priority. The table indexes rules by
+## field, so each tick only the rules depending on a field that changed are evaluated.
+import logging
+
+__all__ = ['PRIORITY_CRITICAL', 'PRIORITY_HIGH', 'PRIORITY_NORMAL', 'PRIORITY_LOW', 'Rule', 'RuleTable', 'toggle']
+
+log = logging.getLogger("tfm")
+
+# message priorities, most urgent first
+PRIORITY_CRITICAL = 0 # GPWS and other warnings
+PRIORITY_HIGH = 1 # configuration changes: gear, flaps, spoilers
+PRIORITY_NORMAL = 2 # switches, radios and autopilot settings
+PRIORITY_LOW = 3 # information
+
+class Rule(object):
+    ## inputs: names of the fields the rule depends on. The rule is only evaluated when one of them changed.
+    ## condition: function(new, old) returning whether to announce, where new is the record and old its values at
+    ## the last commit. None announces every change.
+    ## message: a str.format template filled in from the record, e.g. 'Squawk {Transponder:04d}',
+    ## or a function(new, old) returning the text.
+    ## setting: name of an attribute of the settings object passed to RuleTable.evaluate that has to be true, if any.
+    ## key: messages with the same key replace each other while waiting to be spoken. Default: the rule itself,
+    ## so a rule firing again replaces its own message.
+    def __init__(self, inputs, condition, message, priority=PRIORITY_NORMAL, setting=None, key=None):
+        self.inputs = tuple(inputs)
+        self.condition = condition
+        self.message = message
+        self.priority = priority
+        self.setting = setting
+        self.key = self if key is None else key
+
+    def text(self, new, old):
+        if callable(self.message):
+            return self.message(new, old)
+        return self.message.format_map(new)
+
+def toggle(field, name, onMessage, offMessage, priority=PRIORITY_NORMAL):
+    ## rule for a simple on/off switch, e.g. 'Parking brake on.'
+    return Rule((field,), None, lambda new, old: F'{name} {onMessage}.' if new[field] else F'{name} {offMessage}', priority)
+
+class RuleTable(object):
+    def __init__(self, rules):
+        # evaluated in priority order, then in the order given
+        self.rules = sorted(rules, key=lambda rule: rule.priority)
+        # field name: positions of the rules depending on it
+        self.index = {}
+        for position, rule in enumerate(self.rules):
+            for name in rule.inputs:
+                self.index.setdefault(name, []).append(position)
+
+    def extend(self, rules):
+        ## add rules, e.g. for a specific aircraft
+        self.__init__(self.rules + list(rules))
+
+    def evaluate(self, record, changed, settings=None, old=None):
+        ## returns (priority, message, key) for every rule that fires, given the set of changed field names.
+        ## old: previous values to test and format the rules with, by name. Default: record.old.
+        if old is None:
+            old = record.old
+        positions = set()
+        for name in changed:
+            rules = self.index.get(name)
+            if rules is not None:
+                positions.update(rules)
+        messages = []
+        for position in sorted(positions):
+            rule = self.rules[position]
+            try:
+                if rule.setting is not None and not getattr(settings, rule.setting):
+                    continue
+                if rule.condition is None or rule.condition(record, old):
+                    messages.append((rule.priority, rule.text(record, old), rule.key))
+            except Exception:
+                log.exception(F'error in announcement rule for {", ".join(rule.inputs)}')
+        return messages
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+## Announcements for values that move for a while after they start changing: flaps in transit, autopilot
+## knobs being turned, trim being run. Instead of announcing every intermediate value, the rules depending on
+## a watched field are evaluated once the field has kept its value for settle_time seconds.
+## update() is called regularly from the scheduler and never waits.
+## conditioning: {name: (deadband, debounce)} for the watched fields, see conditioning.py. Settled values are
+## passed through it, so e.g. trim that settles close to the last trim announced isn't announced again.
+from .rules import RuleTable
+from .conditioning import SignalConditioner
+
+__all__ = ['SettleDetector']
+
+class SettleDetector(object):
+    def __init__(self, rules, settle_time=0.6, conditioning=None):
+        self.table = RuleTable(rules)
+        self.settle_time = settle_time
+        self.fields = list(self.table.index)
+        conditioning = conditioning or {}
+        self.conditioner = SignalConditioner({name: conditioning[name] for name in self.fields if name in conditioning})
+        # last value seen of each field
+        self.values = {}
+        # fields in motion: (value before the motion started, time of the last change)
+        self.moving = {}
+
+    def reset(self, record):
+        ## take the current values as settled, e.g. after reconnecting
+        self.values = {name: record.value(name) for name in self.fields}
+        self.moving = {}
+        self.conditioner.reset(record)
+
+    def update(self, record, now, settings=None):
+        ## returns (priority, message, key) for the rules of every field that settled on a new value.
+        settled = set()
+        for name in self.fields:
+            value = record.value(name)
+            last = self.values.get(name)
+            if last is None:
+                self.values[name] = value
+            elif value != last:
+                self.values[name] = value
+                start = self.moving[name][0] if name in self.moving else last
+                self.moving[name] = (start, now)
+            elif name in self.moving and now - self.moving[name][1] >= self.settle_time:
+                start, since = self.moving.pop(name)
+                if value != start:
+                    settled.add(name)
+        if settled:
+            settled = self.conditioner.filter(record, settled, now)
+        if not settled:
+            return []
+        return self.table.evaluate(record, settled, settings, self.conditioner.old(record))
+
+    @property
+    def in_motion(self):
+        return bool(self.moving)
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+## Internal event channels between the sim thread and the GUI.
+## Each channel is created once with the names of its arguments. Listeners are checked against them when they
+## connect, so sending is only a loop over a tuple of listeners: no topic lookup and no per-message validation.
+## They replace pypubsub, which TFM no longer depends on.
+## Run as a script to time a send on a channel, and on pub.sendMessage for comparison if pypubsub is installed:
+## python events.py [number of sends]
+import collections
+import inspect
+import logging
+import sys
+import time
+
+__all__ = ['Channel', 'Batch', 'announcement', 'reset', 'triggered', 'state']
+
+log = logging.getLogger("tfm")
+
+class Channel(object):
+    __slots__ = ('name', 'arguments', 'listeners')
+
+    def __init__(self, name, *arguments):
+        self.name = name
+        self.arguments = arguments
+        # replaced rather than changed, so a send running on another thread keeps the tuple it started with
+        self.listeners = ()
+
+    def connect(self, listener):
+        ## listener is called with the arguments of the channel, by position.
+        try:
+            inspect.signature(listener).bind(*self.arguments)
+        except TypeError:
+            raise TypeError(F'{listener!r} does not accept the arguments of the {self.name} channel: {", ".join(self.arguments)}')
+        except ValueError:
+            # no signature available, e.g. a builtin
+            pass
+        if listener not in self.listeners:
+            self.listeners = self.listeners + (listener,)
+        return listener
+
+    def disconnect(self, listener):
+        self.listeners = tuple(connected for connected in self.listeners if connected != listener)
+
+    def send(self, *args):
+        for listener in self.listeners:
+            try:
+                listener(*args)
+            except Exception:
+                log.exception(F'error in {self.name} listener {listener!r}')
+
+class Batch(object):
+    ## collects the messages sent on a channel, for another thread to take all at once,
+    ## e.g. the GUI timer appending every announcement since its last run in one go.
+    def __init__(self, channel):
+        self.messages = collections.deque()
+        self.channel = channel
+        channel.connect(self.add)
+
+    def add(self, *args):
+        self.messages.append(args[0] if len(args) == 1 else args)
+
+    def drain(self):
+        messages = []
+        while True:
+            try:
+                messages.append(self.messages.popleft())
+            except IndexError:
+                return messages
+
+    def close(self):
+        self.channel.disconnect(self.add)
+
+# text of every announcement, as shown in the log window
+announcement = Channel('announcement', 'msg')
+# a hotkey command finished: the command key alone is active again
+reset = Channel('reset')
+# the next announcement was asked for by a hotkey
+triggered = Channel('triggered', 'msg')
+# a state of the simulator or the connection changed, e.g. ('connected', True)
+state = Channel('state', 'name', 'value')
+
+def benchmark(count=100000):
+    ## seconds per send through a channel, and through pypubsub if it is installed, each with a single listener.
+    received = []
+    channel = Channel('benchmark', 'msg')
+    channel.connect(lambda msg: received.append(msg))
+    started = time.perf_counter()
+    for i in range(count):
+        channel.send('message')
+    results = {'channel': (time.perf_counter() - started) / count}
+    try:
+        from pubsub import pub
+    except ImportError:
+        return results
+    def listener(msg):
+        received.append(msg)
+    pub.subscribe(listener, 'benchmark')
+    started = time.perf_counter()
+    for i in range(count):
+        pub.sendMessage('benchmark', msg='message')
+    results['pypubsub'] = (time.perf_counter() - started) / count
+    pub.unsubscribe(listener, 'benchmark')
+    return results
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    for name, seconds in benchmark(count).items():
+        print(F'{name}: {seconds * 1e6:.2f} microseconds per send')
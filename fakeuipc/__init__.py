@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+## A pure Python stand-in for pyuipc, backed by an in-memory offset space and driven by a scripted flight profile.
+## It exposes the same module level functions as pyuipc, so it can be imported in its place:
+##   import fakeuipc as pyuipc
+##   pyuipc.load_profile('ils_approach', rate=10)
+## or, to play back a flight recording:
+##   pyuipc.load_recording('flight.tfmrec', rate=10)
+from .memory import *
+from .simulator import *
+from .profiles import *
+from .replay import *
+
+# the simulator behind the module level functions
+simulator = None
+
+def load_profile(name, rate=1.0):
+    ## start a new simulator running the named profile, rate times faster than real time.
+    ## With rate None, simulator time only moves when advanced.
+    global simulator
+    simulator = FakeSimulator(get_profile(name), rate)
+    return simulator
+
+def load_recording(path, rate=1.0):
+    ## play back a flight recording, rate times faster than real time.
+    global simulator
+    simulator = RecordingPlayer(path, rate)
+    return simulator
+
+def open(version=0):
+    if simulator is None:
+        load_profile('taxi')
+    return simulator.open(version)
+
+def close():
+    if simulator is not None:
+        simulator.close()
+
+def prepare_data(data, forRead=True):
+    return simulator.prepare_data(data, forRead)
+
+def read(data):
+    return simulator.read(data)
+
+def write(data):
+    return simulator.write(data)
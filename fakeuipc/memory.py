@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+## The FSUIPC offset space: 64K of bytes, read and written with the same type codes pyuipc uses.
+import struct
+
+__all__ = ['OffsetSpace']
+
+# struct formats for the FSUIPC type codes. Integer types are stored through their unsigned format,
+# so values that don't fit wrap around the way they do in the simulator.
+FORMATS = {'b': '<B', 'c': '<b', 'h': '<h', 'H': '<H', 'd': '<i', 'u': '<I', 'l': '<q', 'L': '<Q', 'f': '<d', 'F': '<f'}
+UNSIGNED = {'b': '<B', 'c': '<B', 'h': '<H', 'H': '<H', 'd': '<I', 'u': '<I', 'l': '<Q', 'L': '<Q'}
+
+class OffsetSpace(object):
+    def __init__(self, size=0x10000):
+        self.data = bytearray(size)
+
+    def read(self, offset, type):
+        if isinstance(type, int):
+            if type > 0:
+                # raw bytes
+                return bytes(self.data[offset:offset + type])
+            # string of at most -type characters
+            return bytes(self.data[offset:offset - type]).split(b'\x00', 1)[0]
+        return struct.unpack_from(FORMATS[type], self.data, offset)[0]
+
+    def write(self, offset, type, value):
+        if isinstance(type, int):
+            size = abs(type)
+            value = bytes(value)[:size]
+            self.data[offset:offset + size] = value.ljust(size, b'\x00')
+        elif type in UNSIGNED:
+            size = struct.calcsize(UNSIGNED[type])
+            struct.pack_into(UNSIGNED[type], self.data, offset, int(value) & ((1 << size * 8) - 1))
+        else:
+            struct.pack_into(FORMATS[type], self.data, offset, value)
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+## Scripted flight profiles for the fake simulator.
+## A profile is a list of keyframes: (time in seconds, {offset name: value in read units}).
+## Named bits (e.g. 'LandingLights') can be used like offsets. A value holds until the next keyframe that sets it.
+## Float values are interpolated linearly towards the next float value for the same offset; anything else
+## (switches, codes, frequencies, text) changes in a single step. SimConnect messages are
+## (time, [lines], message type).
+from bisect import bisect_right
+from simdata import INSTRUMENTS, ATTITUDE, SIMSTATE, BOOL, FREQ, SQUAWK
+
+__all__ = ['Profile', 'PROFILES', 'get_profile']
+
+# offsets that are never interpolated, even when given as floats
+STEPPED = set(field.name for schema in (INSTRUMENTS, ATTITUDE, SIMSTATE) for field in schema if field.kind in (BOOL, FREQ, SQUAWK))
+
+class Profile(object):
+    def __init__(self, name, duration, keyframes, messages=()):
+        self.name = name
+        self.duration = duration
+        # offset name: ([times], [values])
+        self.timelines = {}
+        for time, values in sorted(keyframes, key=lambda keyframe: keyframe[0]):
+            for field, value in values.items():
+                times, points = self.timelines.setdefault(field, ([], []))
+                times.append(time)
+                points.append(value)
+        self.message_times = [message[0] for message in messages]
+        self.messages = [(lines, type) for time, lines, type in messages]
+
+    def state(self, time):
+        ## values of all offsets the profile drives, at the given time
+        state = {}
+        for field, (times, points) in self.timelines.items():
+            i = bisect_right(times, time) - 1
+            if i < 0:
+                continue
+            value = points[i]
+            if i + 1 < len(times) and isinstance(value, float) and isinstance(points[i + 1], float) and field not in STEPPED:
+                fraction = (time - times[i]) / (times[i + 1] - times[i])
+                value += (points[i + 1] - value) * fraction
+            state[field] = value
+        return state
+
+    def message(self, time):
+        ## the last SimConnect message sent by the given time, as (message number, lines, type), or None
+        i = bisect_right(self.message_times, time)
+        if i == 0:
+            return None
+        lines, type = self.messages[i - 1]
+        return (i, lines, type)
+
+# an airliner parked at the gate, engines running, at an airport 430 feet above sea level
+ELEVATION = 430.0
+PARKED = {'Lat': 47.4490, 'Long': -122.3093, 'Altitude': ELEVATION, 'GroundAltitude': ELEVATION, 'RadioAltimeter': 0.0,
+    'OnGround': True, 'ParkingBrake': True, 'Gear': 16383.0, 'Flaps': 0.0, 'Heading': 160.0, 'CompassHeading': 160.0,
+    'MagneticVariation': 0, 'AirspeedIndicated': 0.0, 'AirspeedTrue': 0.0, 'GroundSpeed': 0.0, 'AirspeedMach': 0.0, 'VerticalSpeed': 0.0,
+    'Pitch': 0.0, 'Bank': 0.0, 'Altimeter': 1013.2, 'AirTemp': 15, 'WindSpeed': 8, 'WindDirection': 350.0, 'WindGust': 0,
+    'Com1Freq': 121.9, 'Com2Freq': 118.3, 'Transponder': 1200, 'AvionicsMaster': 1, 'BatteryMaster': 1,
+    'Eng1Combustion': 1, 'Eng2Combustion': 1, 'Eng1N1': 20.0, 'Eng2N1': 20.0, 'Eng1N2': 60.0, 'Eng2N2': 60.0,
+    'Eng1FuelFlow': 900.0, 'Eng2FuelFlow': 900.0, 'Eng1ITT': 450.0, 'Eng2ITT': 450.0, 'Eng1Generator': 1, 'Eng2Generator': 1,
+    'FuelQuantity': 12000, 'NavigationLights': True, 'BeaconLights': True, 'InstrumentLights': True,
+    'NextWPId': 'KSEA', 'NextWPDistance': 0.0, 'DestAirportId': 'KPDX', 'RouteDistance': 240000.0}
+
+def taxi():
+    return Profile('taxi', 300, [
+        (0, PARKED),
+        (5, {'ParkingBrake': False, 'TaxiLights': True}),
+        (10, {'GroundSpeed': 0.0, 'AirspeedIndicated': 0.0, 'Heading': 160.0, 'CompassHeading': 160.0}),
+        (30, {'GroundSpeed': 15.0, 'AirspeedIndicated': 15.0, 'Lat': 47.4490, 'Heading': 250.0, 'CompassHeading': 250.0}),
+        (120, {'Flaps': 0.0, 'Heading': 250.0, 'CompassHeading': 250.0}),
+        (135, {'Flaps': 5.0}),
+        (150, {'Lat': 47.4440, 'Heading': 340.0, 'CompassHeading': 340.0}),
+        (280, {'GroundSpeed': 15.0, 'AirspeedIndicated': 15.0, 'Lat': 47.4400, 'Long': -122.3080}),
+        (295, {'GroundSpeed': 0.0, 'AirspeedIndicated': 0.0, 'Transponder': 4521, 'Com1Freq': 119.9}),
+        (300, {'TaxiLights': False, 'LandingLights': True, 'StrobeLights': True}),
+    ])
+
+def takeoff():
+    return Profile('takeoff', 120, [
+        (0, PARKED),
+        (0, {'ParkingBrake': False, 'Flaps': 5.0, 'Heading': 340.0, 'CompassHeading': 340.0, 'Lat': 47.4400, 'Long': -122.3080,
+            'LandingLights': True, 'StrobeLights': True, 'Transponder': 4521, 'Com1Freq': 119.9,
+            'Eng1N1': 20.0, 'Eng2N1': 20.0, 'Eng1FuelFlow': 900.0, 'Eng2FuelFlow': 900.0}),
+        (5, {'Eng1N1': 92.0, 'Eng2N1': 92.0, 'Eng1FuelFlow': 7000.0, 'Eng2FuelFlow': 7000.0,
+            'AirspeedIndicated': 0.0, 'GroundSpeed': 0.0}),
+        (38, {'AirspeedIndicated': 155.0, 'GroundSpeed': 150.0, 'Lat': 47.4570, 'OnGround': True,
+            'Altitude': ELEVATION, 'RadioAltimeter': 0.0, 'VerticalSpeed': 0.0, 'Pitch': 0.0}),
+        (40, {'OnGround': False, 'Pitch': -15.0}),
+        (48, {'Gear': 16383.0}),
+        (56, {'Gear': 0.0}),
+        (60, {'AirspeedIndicated': 180.0, 'GroundSpeed': 175.0, 'VerticalSpeed': 2500.0,
+            'Altitude': ELEVATION + 800, 'RadioAltimeter': 800.0, 'Lat': 47.4700}),
+        (80, {'Flaps': 5.0}),
+        (95, {'Flaps': 0.0}),
+        (120, {'AirspeedIndicated': 220.0, 'GroundSpeed': 215.0, 'VerticalSpeed': 2500.0, 'Pitch': -10.0,
+            'Altitude': ELEVATION + 3300, 'RadioAltimeter': 2500.0, 'Lat': 47.5300}),
+    ])
+
+def climb():
+    return Profile('climb', 600, [
+        (0, PARKED),
+        (0, {'OnGround': False, 'ParkingBrake': False, 'Gear': 0, 'Heading': 340.0, 'CompassHeading': 340.0,
+            'Lat': 47.5300, 'Long': -122.3080, 'Altitude': 3000.0, 'RadioAltimeter': 2500.0, 'AirspeedIndicated': 220.0,
+            'GroundSpeed': 230.0, 'VerticalSpeed': 2000.0, 'Pitch': -8.0, 'AirTemp': 9, 'LandingLights': True,
+            'StrobeLights': True, 'Transponder': 4521, 'Com1Freq': 124.2, 'Eng1N1': 88.0, 'Eng2N1': 88.0,
+            'ApMaster': 1, 'ApAltitudeLock': 1, 'ApAltitude': 18000, 'ApVerticalSpeedHold': 1, 'ApVerticalSpeed': 2000,
+            'ApHeadingLock': 1, 'ApHeading': 340, 'ApSpeedHold': 1, 'ApAirspeed': 250,
+            'NextWPId': 'SEA', 'NextWPDistance': 30000.0}),
+        (60, {'Altitude': 5000.0, 'AirspeedIndicated': 250.0, 'RadioAltimeter': 2500.0, 'LandingLights': False}),
+        (120, {'Heading': 340.0, 'CompassHeading': 340.0, 'ApHeading': 180}),
+        (160, {'Heading': 180.0, 'CompassHeading': 180.0, 'Lat': 47.6500, 'NextWPId': 'OLM', 'NextWPDistance': 90000.0}),
+        (300, {'Altitude': 12000.0, 'AirTemp': -9, 'Com1Freq': 128.5}),
+        (420, {'Altitude': 18000.0, 'Altimeter': 1013.2, 'VerticalSpeed': 2000.0, 'AirspeedIndicated': 280.0, 'AirspeedMach': 0.0}),
+        (450, {'Altimeter': 1013.25, 'VerticalSpeed': 0.0, 'Pitch': -2.0, 'AirspeedMach': 0.62, 'AirTemp': -21}),
+        (600, {'Altitude': 18000.0, 'AirspeedIndicated': 300.0, 'AirspeedMach': 0.66, 'Lat': 47.0500,
+            'NextWPId': 'BTG', 'NextWPDistance': 40000.0}),
+    ])
+
+def ils_approach():
+    return Profile('ils_approach', 300, [
+        (0, PARKED),
+        (0, {'OnGround': False, 'ParkingBrake': False, 'Gear': 0.0, 'Flaps': 5.0, 'Heading': 340.0, 'CompassHeading': 340.0,
+            'Lat': 47.3000, 'Long': -122.3080, 'Altitude': 3400.0, 'RadioAltimeter': 2970.0, 'AirspeedIndicated': 180.0,
+            'GroundSpeed': 185.0, 'VerticalSpeed': 0.0, 'Pitch': -2.0, 'Com1Freq': 119.9, 'Transponder': 4521,
+            'ApMaster': 1, 'ApApproachHold': 1, 'ApAltitude': 3400,
+            'Nav1Type': True, 'Nav1GSAvailable': True, 'Nav1Signal': 256, 'Nav1LocNeedle': -60.0, 'Nav1GSNeedle': 80.0}),
+        (40, {'Nav1LocNeedle': 0.0, 'Nav1GSNeedle': 80.0, 'Altitude': 3400.0, 'RadioAltimeter': 2970.0, 'VerticalSpeed': 0.0}),
+        (60, {'Nav1GSNeedle': 0.0, 'Gear': 0.0, 'Flaps': 5.0, 'LandingLights': True}),
+        (68, {'Gear': 16383.0, 'Flaps': 15.0}),
+        (70, {'Altitude': 3400.0, 'RadioAltimeter': 2970.0, 'VerticalSpeed': -750.0, 'AirspeedIndicated': 160.0}),
+        (90, {'Flaps': 15.0}),
+        (100, {'Flaps': 30.0, 'AirspeedIndicated': 140.0}),
+        (270, {'Altitude': ELEVATION + 50, 'RadioAltimeter': 50.0, 'VerticalSpeed': -700.0, 'AirspeedIndicated': 135.0,
+            'Lat': 47.4380, 'Nav1GSNeedle': 0.0, 'OnGround': False}),
+        (275, {'Altitude': ELEVATION, 'RadioAltimeter': 0.0, 'VerticalSpeed': 0.0, 'OnGround': True, 'ApMaster': 0,
+            'AirspeedIndicated': 130.0, 'GroundSpeed': 130.0}),
+        (300, {'AirspeedIndicated': 30.0, 'GroundSpeed': 30.0, 'Lat': 47.4520}),
+    ])
+
+def simconnect_burst():
+    ## an ATC menu followed by a burst of messages, a few hundred milliseconds apart
+    messages = [(5, ['ATC Menu', 'Seattle Ground', 'Request taxi', 'Request IFR clearance', 'Cancel'], 768)]
+    for i in range(20):
+        messages.append((10 + i * 0.3, ['Seattle Approach', F'Traffic advisory {i + 1}'], 0))
+    messages.append((20, ['Seattle Tower', 'Cleared to land runway 34 right, wind 350 at 8'], 0))
+    return Profile('simconnect_burst', 60, [(0, PARKED)], messages)
+
+PROFILES = {'taxi': taxi, 'takeoff': takeoff, 'climb': climb, 'ils_approach': ils_approach, 'simconnect_burst': simconnect_burst}
+
+def get_profile(name):
+    return PROFILES[name]()
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+## Playback of flight recordings (see simdata.recorder) through the pyuipc interface,
+## and an engine that runs TFM over a recording, as fast as possible or at a fixed rate.
+## Usage: python -m fakeuipc.replay recording.tfmrec [rate]
+## where rate is a speed up factor such as 1 or 10, or max (the default) to run as fast as possible.
+import os
+import queue
+import struct
+import sys
+import time
+import numpy as np
+from simdata import open_recording, LAST_PART
+from simdata.recorder import STORAGE
+from .simulator import OffsetBackend
+
+__all__ = ['RecordingPlayer', 'ReplayEngine']
+
+# shortest step of simulator time when running as fast as possible
+MIN_STEP = 0.01
+
+class RecordingPlayer(OffsetBackend):
+    ## plays a recording back into the offset space. Recorded time runs at rate times wall clock time.
+    ## with rate None, time only moves when advance() is called.
+    def __init__(self, path, rate=1.0, clock=time.monotonic):
+        OffsetBackend.__init__(self, clock)
+        self.path = path
+        self.header, self.records = open_recording(path)
+        # (offset, type, struct format of the stored value) by field number
+        self.fields = [(field['offset'], field['type'], None if isinstance(field['type'], int) else STORAGE[field['type']])
+            for field in self.header['fields']]
+        self.times = np.asarray(self.records['time'])
+        self.duration = float(self.times[-1]) if len(self.times) else 0.0
+        # next record to play
+        self.position = 0
+        # parts of strings and byte blocks played so far, by field number
+        self.parts = {}
+        self.offset = 0.0
+        self.rate = rate
+        self.started = clock()
+
+    def set_rate(self, rate):
+        ## change speed, keeping the current position
+        self.offset = self.time
+        self.rate = rate
+        self.started = self.clock()
+
+    @property
+    def time(self):
+        ## seconds of recorded time played
+        if self.rate is None:
+            return self.offset
+        return (self.clock() - self.started) * self.rate + self.offset
+
+    @property
+    def finished(self):
+        return self.time >= self.duration
+
+    def advance(self, seconds):
+        self.offset += seconds
+        self.update()
+
+    def update(self):
+        ## play every record up to the current time
+        end = int(np.searchsorted(self.times, self.time, 'right'))
+        if end <= self.position:
+            return
+        for time, field, part, value in self.records[self.position:end].tolist():
+            offset, type, storage = self.fields[field]
+            if storage is not None:
+                self.memory.write(offset, type, struct.unpack(storage, value)[0])
+                continue
+            self.parts.setdefault(field, []).append(value)
+            if part & LAST_PART:
+                self.memory.write(offset, type, b''.join(self.parts.pop(field)))
+        self.position = end
+
+class ReplayEngine(object):
+    ## Runs a TFM object over a recording or a profile played by its pyuipc module.
+    ## TFM's pyglet clock and its data freshness checks run on recorded time, so scheduled reads and announcements
+    ## happen at the same points in the flight whatever the speed.
+    def __init__(self, tfm, player):
+        self.tfm = tfm
+        self.player = player
+        self.spoken = []
+        self.wall_time = 0.0
+
+    def run(self):
+        import pyglet
+        clock = pyglet.clock.Clock(time_function=lambda: self.player.time)
+        pyglet.clock.set_default(clock)
+        self.tfm.clock = lambda: self.player.time
+        self.tfm.setup()
+        started = time.perf_counter()
+        while not self.player.finished:
+            sleepTime = clock.get_sleep_time(True)
+            if self.player.rate is None:
+                # jump straight to the next scheduled function
+                self.player.advance(MIN_STEP if not sleepTime else max(sleepTime, MIN_STEP))
+            else:
+                time.sleep(0.1 if sleepTime is None else min(sleepTime / self.player.rate, 0.1))
+            clock.tick()
+            self.tfm.flushWrites()
+            self.drain()
+        self.tfm.shutdown()
+        self.wall_time = time.perf_counter() - started
+        return self.wall_time
+
+    def drain(self):
+        for q in (self.tfm.q, self.tfm.sapi_q):
+            while True:
+                try:
+                    self.spoken.append((self.player.time, q.get_nowait()))
+                except queue.Empty:
+                    break
+
+    def wall_time_per_hour(self):
+        ## wall clock seconds spent per hour of simulator time
+        if not self.player.duration:
+            return 0.0
+        return self.wall_time / (self.player.duration / 3600)
+
+    def report(self):
+        return (F'replayed {self.player.duration / 60:.1f} minutes in {self.wall_time:.2f} seconds: '
+            F'{self.wall_time_per_hour():.2f} seconds per simulator hour, {len(self.spoken)} messages spoken, '
+            F'{self.player.reads} reads')
+
+def main(arguments):
+    path = arguments[0]
+    rate = arguments[1] if len(arguments) > 1 else 'max'
+    # flightsim picks its pyuipc module when it is imported
+    os.environ['TFM_REPLAY'] = path
+    import config
+    import flightsim
+    import fakeuipc
+    import speech
+    config.setup()
+    fakeuipc.simulator.set_rate(None if rate == 'max' else float(rate))
+    tfm = flightsim.TFM(speech.SpeechQueue(), speech.SpeechQueue())
+    engine = ReplayEngine(tfm, fakeuipc.simulator)
+    engine.run()
+    for when, message in engine.spoken:
+        print(F'{when:8.1f} {message}')
+    print(engine.report())
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+## A scripted simulator behind the fake pyuipc interface.
+## The offsets a profile drives are rewritten from the profile on every read, at the current simulator time.
+## Simulator time runs at rate times wall clock time, and can also be advanced by hand. The replay engine
+## (see replay) runs TFM over a profile the same way as over a recording.
+import time
+from simdata import INSTRUMENTS, ATTITUDE, SIMCONNECT, SIMSTATE, TEXT
+from .memory import OffsetSpace
+
+__all__ = ['FSUIPCException', 'OffsetBackend', 'FakeSimulator']
+
+SCHEMAS = (INSTRUMENTS, ATTITUDE, SIMCONNECT, SIMSTATE)
+
+class FSUIPCException(Exception):
+    ## same attributes as the exception raised by pyuipc
+    def __init__(self, errorCode, errorString=''):
+        Exception.__init__(self, errorCode, errorString)
+        self.errorCode = errorCode
+        self.errorString = errorString
+
+# SimConnect message type of the ATC menus of the RC4 add-on
+RC4_MENU = 768
+
+# FSUIPC error codes used by the fake
+ERR_NOFS = 2 # the simulator isn't running
+ERR_NOTOPEN = 4 # the connection hasn't been opened
+
+class PreparedData(object):
+    ## result of prepare_data: the offsets to read, in order.
+    def __init__(self, data):
+        self.data = list(data)
+
+class OffsetBackend(object):
+    ## the pyuipc interface over an offset space. Subclasses keep the offsets up to date in update(),
+    ## which runs before every read.
+    FSUIPCException = FSUIPCException
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.memory = OffsetSpace()
+        self.opened = False
+        # the simulator refuses connections until this time, see drop()
+        self.down_until = 0.0
+        self.reads = 0
+        self.writes = 0
+
+    def update(self):
+        pass
+
+    def drop(self, seconds):
+        ## simulate the simulator going away, e.g. while a flight reloads.
+        self.opened = False
+        self.down_until = self.clock() + seconds
+
+    def open(self, version=0):
+        if self.clock() < self.down_until:
+            raise FSUIPCException(ERR_NOFS, 'Cannot link to FSUIPC or WideClient')
+        self.opened = True
+        return self
+
+    def close(self):
+        self.opened = False
+
+    def prepare_data(self, data, forRead=True):
+        return PreparedData(data)
+
+    def read(self, data):
+        self.check()
+        if isinstance(data, PreparedData):
+            data = data.data
+        self.update()
+        self.reads += 1
+        return [self.memory.read(offset, type) for offset, type in data]
+
+    def write(self, data):
+        self.check()
+        self.writes += 1
+        for offset, type, value in data:
+            self.memory.write(offset, type, value)
+
+    def check(self):
+        if not self.opened:
+            raise FSUIPCException(ERR_NOTOPEN, 'IPC request contains bad data')
+
+class FakeSimulator(OffsetBackend):
+    def __init__(self, profile, rate=1.0, clock=time.monotonic):
+        OffsetBackend.__init__(self, clock)
+        self.profile = profile
+        self.rate = rate
+        self.fields = {}
+        for schema in SCHEMAS:
+            for field in schema:
+                self.fields[field.name] = (schema, field)
+        # named bits: bit name: (offset name, bit number)
+        self.bits = {}
+        for schema in SCHEMAS:
+            for name, bits in schema.bits.items():
+                for bit, number in bits.items():
+                    self.bits[bit] = (name, number)
+        self.started = clock()
+        self.offset = 0.0
+        self.messages_sent = 0
+        self.update()
+
+    @property
+    def time(self):
+        ## simulator time in seconds since the start of the profile. With rate None, time only moves when
+        ## advance() is called.
+        if self.rate is None:
+            return self.offset
+        return (self.clock() - self.started) * self.rate + self.offset
+
+    def set_rate(self, rate):
+        ## change speed, keeping the current position
+        self.offset = self.time
+        self.rate = rate
+        self.started = self.clock()
+
+    @property
+    def duration(self):
+        return self.profile.duration
+
+    @property
+    def finished(self):
+        return self.time >= self.duration
+
+    def advance(self, seconds):
+        self.offset += seconds
+        self.update()
+
+    def update(self):
+        ## write the profile state for the current time into the offset space.
+        now = self.time
+        bytes_with_bits = {}
+        for name, value in self.profile.state(now).items():
+            if name in self.bits:
+                parent, number = self.bits[name]
+                bytes_with_bits.setdefault(parent, {})[number] = value
+            else:
+                self.poke(name, value)
+        for parent, bits in bytes_with_bits.items():
+            schema, field = self.fields[parent]
+            value = self.memory.read(field.address, field.type)
+            for number, on in bits.items():
+                value = value | 1 << number if on else value & ~(1 << number)
+            self.memory.write(field.address, field.type, value)
+        message = self.profile.message(now)
+        if message is not None and message[0] != self.messages_sent:
+            self.send_message(*message)
+
+    def poke(self, name, value):
+        ## write a value, given in read units, to the named offset
+        schema, field = self.fields[name]
+        if field.kind == TEXT:
+            if isinstance(value, str):
+                value = value.encode('UTF-8')
+            self.memory.write(field.address, field.type, value)
+        else:
+            self.memory.write(*schema.encode(name, value))
+
+    def send_message(self, number, lines, type=0):
+        ## put a SimConnect text message in the offsets FSUIPC uses for them.
+        ## RC4 ATC menus (type 768) come as lines of text, everything else as zero terminated strings.
+        separator = '\n' if type == RC4_MENU else '\x00'
+        text = separator.join(lines).encode('UTF-8') + b'\x00'
+        self.poke('SimCData', text)
+        self.poke('SimCLength', len(text))
+        self.poke('SimCType', type)
+        self.poke('SimCChanged', self.memory.read(*SIMCONNECT.offsets['SimCChanged']) + 1)
+        self.messages_sent = number
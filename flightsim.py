@@ -1,20 +1,32 @@
 import sys
 import os
-import pyuipc
+if os.environ.get('TFM_REPLAY'):
+    # play back a flight recording instead of reading the simulator, e.g. TFM_REPLAY=flight.tfmrec TFM_REPLAY_RATE=10
+    import fakeuipc as pyuipc
+    pyuipc.load_recording(os.environ['TFM_REPLAY'], float(os.environ.get('TFM_REPLAY_RATE', 1)))
+elif os.environ.get('TFM_FAKE_PROFILE'):
+    # run against a scripted flight instead of the simulator, e.g. TFM_FAKE_PROFILE=ils_approach TFM_FAKE_RATE=10
+    import fakeuipc as pyuipc
+    pyuipc.load_profile(os.environ['TFM_FAKE_PROFILE'], float(os.environ.get('TFM_FAKE_RATE', 1)))
+else:
+    import pyuipc
 import config
+import paths
 import threading
 import queue
 import time
 import requests
-import copy
-import wx
 from aviationFormula.aviationFormula import calcBearing
 from babel import Locale
 from babel.dates import get_timezone, get_timezone_name
 from math import degrees, floor
 import pyglet
 import numpy as np
-from pubsub import pub
+from simdata import seconds_to_text, group_offsets, CAPABILITIES, ProfileCache, aircraft_title, probe_aircraft, NEVER, RATE_FAST, SnapshotProvider, ConnectionSupervisor, WriteQueue, FlightRecorder, INSTRUMENTS, SIMCONNECT, ATTITUDE, SIMSTATE
+from announcements import PRIORITY_HIGH, PRIORITY_NORMAL, RuleTable, SettleDetector, CrossingDetector, GPWSCallouts, EngineMonitor, SignalConditioner, INSTRUMENT_RULES, SETTLE_RULES
+from latency import SchedulerLatency
+from soundbank import SoundBank
+import events
 import application
 import logging
 from logger import logger
@@ -22,189 +34,129 @@ log = logging.getLogger("tfm")
 
 ## Main Class of tfm.
 class TFM(threading.Thread):
-#  - b: a 1-byte unsigned value, to be converted into a Python int
-#  - c: a 1-byte signed value, to be converted into a Python int
-#  - h: a 2-byte signed value, to be converted into a Python int
-#  - H: a 2-byte unsigned value, to be converted into a Python int
-#  - d: a 4-byte signed value, to be converted into a Python int
-#  - u: a 4-byte unsigned value, to be converted into a Python long
-#  - l: an 8-byte signed value, to be converted into a Python long
-#  - L: an 8-byte unsigned value, to be converted into a Python long
-#  - f: an 8-byte floating point value, to be converted into a Python double
-# main offsets for reading instrumentation.
-    InstrOffsets = {'Com1Freq': (0x034E,'H'),	# com1freq
-            'Com2Freq': (0x3118,'H'),	# com2freq
-            'RadioActive': (0x3122,'b'),	# radioActive
-            'Lat': (0x0560,'l'),	# ac Latitude
-            'Long': (0x0568,'l'),	# ac Longitude
-            'Flaps': (0x30f0,'h'),	# flaps angle
-            'OnGround': (0x0366,'h'),	# on ground flag: 0 = airborne
-            'ParkingBrake': (0x0bc8,'h'),	# parking Brake: 0 off, 32767 on
-            'Gear': (0x0be8, 'u'), # Gear control: 0=Up, 16383=Down
-            'Altitude': (0x3324,'d'),	#altitude in feet or meters
-            'GroundAltitude': (0x0020,'u'),	# ground altitude x 256
-            'SpoilersArm': (0x0bcc,'u'),	# spoilers armed: 0 - off, 1 - armed
-            'Spoilers': (0x0bd0, 'u'), # Spoilers control, 0 off, 4800 arm, then 5620 (7%) to 16383 (100% fully deployed).
-            'AvionicsMaster': (0x2e80, 'u'), # Avionics master switch
-            'ApMaster': (0x07bc,'u'), # AP master switch
-            'ApNavLock': (0x07c4,'u'), # AP Nav1 lock
-            'ApHeadingLock': (0x07c8,'u'), # AP heading lock
-            'ApHeading': (0x07cc,'H'), # Autopilot heading value, as degrees*65536/360
-            'ApAltitudeLock': (0x07d0,'u'), # AP Altitude lock
-            'ApAltitude': (0x07d4,'u'), # Autopilot altitude value, as metres*65536
-            'ApSpeedHold': (0x07dc,'u'), # AP airspeed hold
-            'ApMachHold': (0x07e4, 'u'), # autopilot mach hold
-            'ApAirspeed': (0x07e2,'h'), # AP airspeed in knots
-            'ApMach': (0x07e8, 'u'), # Autopilot mach value, as Mach*65536
-            'ApVerticalSpeedHold': (0x07ec, 'u'), # autopilot vertical speed hold
-            'ApVerticalSpeed': (0x07f2, 'h'), # autopilot vertical speed
-            'ApNavGPS': (0x132c,'u'), # nav gps switch: 0 - nav, 1 - GPS
-            'ApApproachHold': (0x0800, 'u'), # autopilot approach hold
-            'ApFlightDirector': (0x2ee0,'u'), # Flight director: 0 - off, 1 - on
-            'ApFlightDirectorPitch': (0x2ee8, 'f'), # flight director pitch
-            'ApFlightDirectorBank': (0x2ef0, 'f'), # flight director bank value in degrees. Right negative, left positive
-            'ApAttitudeHold': (0x07d8,'u'), # auto-pilot attitude hold switch
-            'ApWingLeveler': (0x07c0, 'u'), # auto-pilot wing leveler switch
-            'PropSync': (0x243c, 'u'), # propeller sync
-            'ApAutoRudder': (0x0278, 'h'), # auto-rudder switch
-            'BatteryMaster': (0x281c, 'u'), # battery master swtich
-            'Heading': (0x0580,'u'), # Heading, *360/(65536*65536) for degrees TRUE.[Can be set in slew or pause states]
-            'MagneticVariation': (0x02a0,'h'), # Magnetic variation (signed, –ve = West). For degrees *360/65536. Convert True headings to Magnetic by subtracting this value, Magnetic headings to True by adding this value.
-            'Transponder': (0x0354,'H'), # transponder in BCD format
-            'CompassHeading': (0x2b00, 'f'), # Gyro compass heading (magnetic), including any drift. 
-            'NextWPDistance': (0x6048,'f'), # distance to next waypoint
-            'NextWPId': (0x60a4,-6), # next waypoint string
-            'NextWPETE': (0x60e4,'u'), # time enroute to next waypoint in seconds
-            'AutoBrake': (0x2f80,'b'), # Panel autobrake switch: 0=RTO, 1=Off, 2=brake1, 3=brake2, 4=brake3, 5=max
-            'AirspeedTrue': (0x02b8,'u'), # TAS: True Air Speed, as knots * 128
-            'AirspeedIndicated': (0x02bc,'u'), # IAS: Indicated Air Speed, as knots * 128
-            'GroundSpeed': (0x02b4, 'u'), # GS: Ground Speed, as 65536*metres/sec. Not updated in Slew mode!
-            'ApYawDamper': (0x0808,'u'), # Yaw damper
-            'Toga': (0x080c,'u'), # autothrottle TOGA
-            'AutoThrottleArm': (0x0810,'u'), # Auto throttle arm
-            'AutoFeather': (0x2438, 'u'), # Auto Feather switch
-            'AirspeedMach': (0x11c6,'h'), # Mach speed *20480
-            'NextWPETA': (0x60e8,'u'), # next waypoint ETA in seconds (localtime)
-            'NextWPBaring': (0x6050,'f'), # magnetic baring to next waypoint in radions
-            'DestAirportId': (0x6137,-5), # destination airport ID string
-            'DestETE': (0x6198,'u'), # time enroute to destination in seconds
-            'DestETA': (0x619c,'u'), # Destination ETA in seconds (localtime)
-            'RouteDistance': (0x61a0,'f'), # route total distance in meters
-            'FuelBurn': (0x61a8,'f'), # estimated fuel burn in gallons
-            'FuelQuantity': (0x126c, 'u'), # Fuel: total quantity weight in pounds (32-bit integer)
-            'ElevatorTrim': (0x2ea0, 'f'), # elevator trim deflection in radions
-            'VerticalSpeed': (0x0842, 'h'), # 2 byte Vertical speed in metres per minute, but with –ve for UP, +ve for DOWN. Multiply by 3.28084 and reverse the sign for the normal fpm measure.
-            'AirTemp': (0x0e8c, 'h'), # Outside air temp Outside Air Temperature (OAT), degrees C * 256 (“Ambient Temperature
-            'Nav1GS': (0x0c4c, 'b'), # nav 1 GS alive flag
-            'Nav1Flags': (0x0c4d, 'b'), # nav 1 code flags
-            'Nav1Signal': (0x0c52, 'u'), # Nav 1 signal strength
-            'Nav1LocNeedle': (0x0c48, 'c'), # nav 1 localiser needle: -127 left to 127 right
-            'Nav1GSNeedle': (0x0c49, 'c'), # Nav1 glideslope needle: -119 up to 119 down
-            'Altimeter': (0x0330, 'H'), # Altimeter pressure setting (“Kollsman” window). As millibars (hectoPascals) * 16
-            'Doors': (0x3367, 'b'), # byte indicating open exits. One bit per door.
-            'APUGenerator': (0x0b51, 'b'), # apu generator switch
-            'APUGeneratorActive': (0x0b52, 'b'), # apu generator active flag
-            'APUPercentage': (0x0b54, 'F'), # APU rpm percentage
-            'APUVoltage': (0x0b5c, 'F'), # apu generator voltage
-            'Eng1Starter': (0x3b00, 'u'), # engine 1 starter
-            'Eng2Starter': (0x3a40, 'u'), # engine 2 starter
-            'Eng3Starter': (0x3980, 'u'), # engine 3 starter
-            'Eng4Starter': (0x38c0, 'u'), # engine 4 starter
-            'Eng1FuelFlow': (0x2060, 'f'), # Engine 1 fuel flow in pounds per hour
-            'Eng2FuelFlow': (0x2160, 'f'), # Engine 2 fuel flow in pounds per hour
-            'Eng3FuelFlow': (0x2260, 'f'), # Engine 3 fuel flow in pounds per hour
-            'Eng4FuelFlow': (0x2360, 'f'), # Engine 1 fuel flow in pounds per hour
-            'Eng1N1': (0x2010, 'f'), # Engine 1 n1 value
-            'Eng4Generator': (0x393c, 'u'), # Engine 4 generator
-            'Eng3Generator': (0x39fc, 'u'),  # Engine 3 generator
-            'Eng2Generator': (0x3abc, 'u'), # Engine 2 Generator
-            'Eng1Generator': (0x3b7c, 'u'),  # Engine 1 generator
-            'Eng1N2': (0x2018, 'f'), # Engine 1 N2 value
-            'Eng2N1': (0x2110, 'f'), # Engine 2 N1 value
-            'Eng2N2': (0x2118, 'f'), # Engine 2 N2 value
-            'Eng3N1': (0x2210, 'f'), # Engine 3 N1 value
-            'Eng3N2': (0x2218, 'f'), # Engine 3 N2 value
-            'Eng4N1': (0x2310, 'f'), # Engine 4 N1 value
-            'Eng4N2': (0x2318, 'f'), # Engine 4 N2 value
-            'Eng1Combustion': (0x0894, 'H'), # Engine 1 ignition flag
-            'Eng2Combustion': (0x092c, 'H'), # Engine 2 ignition flag
-            'Eng3Combustion': (0x09c4, 'H'), # Engine 3 ignition flag
-            'Eng4Combustion': (0x0a5c, 'H'), # Engine 4 ignition flag
-            'Eng1ITT': (0x08f0, 'u'), # Engine 1 Turbine temperature: degree C *16384 (Helos?) (Turbine engine ITT)
-            'Eng2ITT': (0x0988, 'u'), # Engine 2 Turbine temperature: degree C *16384 (Helos?) (Turbine engine ITT)
-            'Eng3ITT': (0x0a20, 'u'), # Engine 3 Turbine temperature: degree C *16384 (Helos?) (Turbine engine ITT)
-            'Eng4ITT': (0x0ab8, 'u'), # Engine 4 Turbine temperature: degree C *16384 (Helos?) (Turbine engine ITT)
-            'PitotHeat': (0x029c, 'b'), # pitot heat switch
-            'Lights1': (0x0d0c, 'b'), # lights
-            'Lights': (0x0d0d, 'b'), # lights
-            'WindSpeed': (0x0e90, 'H'), # Ambient wind speed in knots
-            'WindDirection': (0x0e92, 'H'), # Ambient wind direction (at aircraft), *360/65536 to get degrees True.
-            'WindGust': (0x0e94, 'H'), # At aircraft altitude: wind gusting value: max speed in knots, or 0 if no gusts
-            'RadioAltimeter': (0x31e4, 'u'), # Radio altitude in metres * 65536
-
-
-
-
-
-
-
-
-
-
-
-
-
+    # offset tables are defined in simdata.schema; decoders and write conversions are generated from them.
+    InstrSchema = INSTRUMENTS
+    InstrOffsets = INSTRUMENTS.offsets
+    InstrBits = INSTRUMENTS.bits
+# values calculated from the instrumentation when they are read: name: (source offsets, function)
+    InstrDerived = {'AirTempF': (('AirTemp',), lambda tempC: round(9.0/5.0 * tempC + 32)),
+            'AltimeterHPA': (('Altimeter',), lambda qnh: floor(qnh + 0.5)),
+            'AltimeterInches': (('Altimeter',), lambda qnh: floor(((100 * qnh * 29.92) / 1013.2) + 0.5) / 100),
+            'GroundAltitudeAGL': (('Altitude', 'GroundAltitude'), lambda altitude, ground: round(altitude - ground)),
     }
 
-# Offsets for SimConnect messages.
-    SimCOffsets = {'SimCChanged': (0xb000,'u'), # changed indicator (4 bytes)
-        'SimCType': (0xb004,'u'), # type value (4 bytes)
-        'SimCDuration': (0xb008,'u'), # display duration in secs (4 bytes)
-        'SimCEvent': (0xb00c,'u'), # SimConnect event ID (4 bytes)
-        'SimCLength': (0xb010,'u'), # length of data received (4 bytes)
-        'SimCData': (0xb014,2028), # text data (<= 2028 bytes)
-    }
-    # attitude indication offsets, since we need fast access to these
-    AttitudeOffsets = {'Pitch': (0x0578,'d'), # Pitch, *360/(65536*65536) for degrees. 0=level, –ve=pitch up, +ve=pitch down[Can be set in slew or pause states]
-        'Bank': (0x057c,'d'), # Bank, *360/(65536*65536) for degrees. 0=level, –ve=bank right, +ve=bank left[Can be set in slew or pause states]
-
-
-    }
+    SimCOffsets = SIMCONNECT.offsets
+    AttitudeOffsets = ATTITUDE.offsets
     ## Setup the tfm object.
     def __init__(self,queue, sapi_queue):
         global keyboard_handler
         threading.Thread.__init__(self)
         self.q = queue
         self.sapi_q = sapi_queue
+        # callout and interface sounds are decoded in the background and played from memory
+        self.sounds = SoundBank(paths.sound_path())
+        self.sounds.load()
+        # decoders fill preallocated records, so polling doesn't rebuild the instrument data every time.
+        # instrumentation is split into one prepared offset set per rate class. All groups decode into self.instr.
+        self.instrGroups = group_offsets(INSTRUMENTS)
+        self.instr = self.instrGroups[0].record
+        # values of the last readInstruments run, and the fields that changed since
+        self.oldInstr = self.instr.old
+        self.instrChanged = set()
+        # switch, radio and autopilot announcements, indexed by the fields they depend on
+        self.instrRules = RuleTable(INSTRUMENT_RULES)
+        for name, (sources, function) in self.InstrDerived.items():
+            self.instr.derive(name, sources, function)
+        self.attitudeGroups = group_offsets(ATTITUDE)
+        self.attitude = self.attitudeGroups[0].record
+        # pause, slew and simulation rate of the simulator
+        self.simStateGroup = group_offsets(SIMSTATE)[0]
+        self.paused = False
+        self.slewing = False
+        self.simRate = 1.0
+        # scheduled polls: (function, interval at normal simulation rate, arguments)
+        self.polls = []
+        # engine count and type of the loaded aircraft, read after connecting and when the aircraft changes
+        self.capabilityGroup = group_offsets(CAPABILITIES)[0]
+        self.aircraft = None
+        # start transitions of every engine, until the aircraft is known
+        self.engines = EngineMonitor(self.instr)
+        self.maxEngines = self.engines.count
+        # autopilot and radio settings entered in the GUI, written by the sim thread
+        self.writes = WriteQueue(INSTRUMENTS)
+        # SimConnect messages are read in two stages: a small header every time, the text only when the header changes.
+        self.SimCHeader = [name for name in self.SimCOffsets if name != 'SimCData']
+        self.SimCData = {}
+        self.SimCMessage = ''
+        # time source for data freshness. The replay engine substitutes recorded time.
+        self.clock = time.monotonic
+        # set by stop: run leaves its loop and shuts down
+        self.stopping = threading.Event()
     def run(self):
+        self.setup()
+        # Infinite loop.
+        log.debug("starting infinite loop")
+        while not self.stopping.is_set():
+            try:
+                # we need to tick the clock for pyglet scheduling functions to work
+                pyglet.clock.tick()
+                self.flushWrites()
+                # dispatch any pending events so audio looping works
+                pyglet.app.platform_event_loop.dispatch_posted_events()
+                # sleep until the next scheduled function is due, so the fast offset groups keep their rate.
+                sleepTime = pyglet.clock.get_sleep_time(True)
+                time.sleep(0.1 if sleepTime is None else min(sleepTime, 0.1))
+            except Exception as e:
+                log.exception("error in main loop. This is bad!")
+        self.shutdown()
+    ## ask run to leave its loop, e.g. when the GUI exits. Join the thread to wait for it.
+    def stop(self):
+        self.stopping.set()
+    ## everything run does after leaving its loop. The replay engine calls this at the end of the recording.
+    def shutdown(self):
+        log.debug("shutting down")
+        self.closeRecorder()
+    ## everything run does before entering its loop. The replay engine calls this and then drives the clock itself.
+    def setup(self):
         # Init log.
         # self.logger = VaLogger(os.path.join(self.rootDir,'voiceAtis','logs'))
         # First log message.
-        pub.sendMessage('update', msg=F'TFM {application.version} started')
+        events.announcement.send(F'TFM {application.version} started')
         self.read_config()
-        # Establish pyuipc connection
-        while True:
-            try:
-                log.debug("opening FSUIPC connection")
-                self.pyuipcConnection = pyuipc.open(0)
-                log.debug("preparing main offsets")
-                self.pyuipcOffsets = pyuipc.prepare_data(list(self.InstrOffsets.values()))
-                log.debug("preparing simconnect offsets")
-                self.pyuipcSIMC = pyuipc.prepare_data(list (self.SimCOffsets.values()))
-                log.debug("preparing attitude mode offsets")
-                self.pyuipcAttitude = pyuipc.prepare_data(list (self.AttitudeOffsets.values()))
-                break
-            except NameError:
-                self.pyuipcConnection = None
-                break
-            except Exception as e:
-                log.error('error initializing fsuipc: ' + str(e))
-                time.sleep(20)
+        # every request for simulator data goes through a snapshot provider, so data read moments ago is reused.
+        self.instrSnapshot = SnapshotProvider(self.instrGroups, self.freshness, self.clock)
+        self.attitudeSnapshot = SnapshotProvider(self.attitudeGroups, self.freshness, self.clock)
+        self.latency = SchedulerLatency()
+        # GPWS callouts, timed so they are heard at their height
+        self.gpws = GPWSCallouts([2500, 1000, 500, 400, 300, 200, 100, 50, 40, 30, 20, 10], self.audioLatency)
+        # trim is announced once it has moved far enough, switches and radios once they have stopped flickering
+        conditioning = {'ElevatorTrim': (self.trimDeadband, 0)}
+        conditioning.update(dict.fromkeys(self.switchFields, (0, self.switchDebounce)))
+        conditioning.update(dict.fromkeys(self.radioFields, (0, self.radioDebounce)))
+        for name in conditioning:
+            if name not in INSTRUMENTS.offsets:
+                log.warning(F'conditioning: unknown instrument field {name}')
+        self.conditioner = SignalConditioner({name: conditioning[name] for name in conditioning if name in self.instrRules.index})
+        # flaps and autopilot knobs are announced once they stop moving
+        self.settle = SettleDetector(SETTLE_RULES, self.settleTime, conditioning)
+        # offsets the loaded aircraft doesn't have are not read. What each aircraft has is kept across sessions.
+        self.aircraftProfiles = ProfileCache(os.path.join(paths.config_path(), 'aircraft.json'))
+        # a recording is made per connection, started by prepareOffsets
+        self.recorder = None
+        # the FSUIPC connection is opened and reopened in the background. Until it is open,
+        # everything keeps running on the last data read, marked stale.
+        self.connection = ConnectionSupervisor(pyuipc, self.reconnectDelay, self.maxReconnectDelay, self.probeInterval)
+        self.connection.on_connect(self.prepareOffsets)
+        self.connection.on_disconnect(self.connectionLost)
+        # set when the instrumentation has to be taken as a new baseline rather than announced
+        self.resyncInstruments = True
+        self.connection.poll()
         
         # variables to track states of various aircraft instruments
         self.oldTz = 'none' ## variable for storing timezone name
         self.airborne = False
         self.oldWP = None
+        self.waypointChange = None
         self.runway_guidance = False
         self.triggered = False
         self.oldSimCChanged = None
@@ -215,47 +167,13 @@ class TFM(threading.Thread):
         self.LocDetected = False
         self.HasGS = False
         self.HasLoc = False
-        self.oldHPA = 0
         self.groundSpeed =False
-        self.Eng1FuelFlow = False
-        self.Eng2FuelFlow = False
-        self.Eng3FuelFlow = False
-        self.Eng4FuelFlow = False
-        self.Eng1N1 = False
-        self.Eng1N2 = False
-        self.Eng2N1 = False
-        self.Eng2N2 = False
-        self.Eng3N1 = False
-        self.Eng3N2 = False
-        self.Eng4N1 = False
-        self.Eng4N2 = False
-        self.APUStarting = False
-        self.APUShutdown = False
-        self.APURunning = False
-        self.APUGenerator = False
-        self.APUOff = True
-
-        # variables for GPWS announcements.
-        self.calloutsHigh = [2500, 1000, 500, 400, 300, 200, 100]
-        self.calloutsLow = [50, 40, 30, 20, 10]
-        # dictionary to track if callouts have been announced
-        self.calloutState = {
-            2500: False,
-            1000: False,
-            500: False,
-            400: False,
-            300: False,
-            200: False,
-            100: False,
-            50: False,
-            40: False,
-            30: False,
-            20: False,
-            10: False}
-        # variables to track all altitude callouts
-        self.altFlag = {}
-        for i in range(1000, 65000, 1000):
-            self.altFlag[i] = False
+        # whether ITT is being read out during an engine start
+        self.engineStart = False
+
+        # altitude callouts every 1000 feet, on the way up and down. A change of more than 5000 feet in one
+        # second is a slew or a flight reload, not a climb.
+        self.altitudeCrossings = CrossingDetector(range(1000, 65000, 1000), hysteresis=100, max_step=5000)
 
         self.trimEnabled = True
         self.MuteSimC = False
@@ -327,51 +245,102 @@ class TFM(threading.Thread):
         # initially read simulator data so we can populate instrument dictionaries
         self.getPyuipcData()
         
-        self.oldInstr = copy.deepcopy(self.instr)
+        self.instr.commit()
         # Start closest city loop if enabled.
-        pub.subscribe(self.set_triggered, "triggered")
+        events.triggered.connect(self.set_triggered)
         
         if self.FFEnabled:
             log.debug("scheduling flight following function")
             pyglet.clock.schedule_interval(self.AnnounceInfo, self.FFInterval * 60)
         # Periodically poll for instrument updates. If not enabled, just poll sim data to keep hotkey functions happy
+        # polling follows the simulator: it stops while paused and speeds up with the simulation rate (see readSimState).
+        self.schedulePoll(self.readInstrumentGroups, self.instrGroups[0].interval)
         if self.InstrEnabled:
             log.debug('scheduling instrumentation')
-            pyglet.clock.schedule_interval(self.readInstruments, 1)
-        else:
-            pyglet.clock.schedule_interval(self.getPyuipcData, 1)
+            self.schedulePoll(self.latency.timed(self.readInstruments), 1)
+            self.schedulePoll(self.readSettled, 0.2)
         # # start simConnect message reading loop
         if self.SimCEnabled:
             log.debug("scheduling simconnect messages")
-            pyglet.clock.schedule_interval(self.readSimConnectMessages, 1)
+            self.schedulePoll(self.latency.timed(self.readSimConnectMessages), 1)
         if self.calloutsEnabled:
             log.debug("scheduling GPWS callouts")
-            pyglet.clock.schedule_interval (self.readCallouts, 0.2)
-        # Infinite loop.
-        log.debug("starting infinite loop")
-        while True:
-            try:
-                # we need to tick the clock for pyglet scheduling functions to work
-                pyglet.clock.tick()
-                # dispatch any pending events so audio looping works
-                pyglet.app.platform_event_loop.dispatch_posted_events()
-                time.sleep(0.1)
-            except Exception as e:
-                log.exception("error in main loop. This is bad!")
+            self.schedulePoll(self.latency.timed(self.readCallouts), 1 / RATE_FAST)
+        # pause, slew and simulation rate, read even while paused
+        pyglet.clock.schedule_interval(self.readSimState, 1)
+        # measure how late scheduled functions run, to catch anything blocking the sim thread
+        pyglet.clock.schedule_interval(self.latency.heartbeat, self.latency.interval)
+        pyglet.clock.schedule_interval(self.connection.poll, 1)
+        pyglet.clock.schedule_interval(self.checkAircraft, 5)
+        pyglet.clock.schedule_interval(self.logStatistics, 300)
+    ## schedule a polling function. Its interval is divided by the simulation rate, and it doesn't run while paused.
+    def schedulePoll(self, function, interval, *args):
+        self.polls.append((function, interval, args))
+        if not self.paused:
+            pyglet.clock.schedule_interval(function, self.pollInterval(interval), *args)
+
+    def pollInterval(self, interval):
+        # nothing is polled faster than the fastest rate class
+        return max(interval / self.simRate, min(interval, 1 / RATE_FAST))
+
+    def reschedulePolls(self):
+        for function, interval, args in self.polls:
+            pyglet.clock.unschedule(function)
+        # the scheduler heartbeat would keep waking the thread 20 times a second while paused
+        pyglet.clock.unschedule(self.latency.heartbeat)
+        if self.paused:
+            return
+        for function, interval, args in self.polls:
+            pyglet.clock.schedule_interval(function, self.pollInterval(interval), *args)
+        pyglet.clock.schedule_interval(self.latency.heartbeat, self.latency.interval)
+
+    ## scheduled every second, paused or not: adapt polling to pause, slew and simulation rate.
+    def readSimState(self, dt=0):
+        if not self.connection.connected:
+            return
+        try:
+            state = self.simStateGroup.read(pyuipc, self.clock())
+            self.connection.ok()
+        except pyuipc.FSUIPCException as e:
+            self.connection.lost(e)
+            return
+        slewing = state['SlewMode']
+        if slewing != self.slewing:
+            log.debug(F'slew mode {"on" if slewing else "off"}')
+            self.slewing = slewing
+            events.state.send('slewing', slewing)
+            if not slewing:
+                # where the slew ended is the new baseline, not a change to announce
+                self.resyncInstruments = True
+                self.gpws.reset()
+        paused = state['Paused']
+        # the rate is 0 when it can't be read, e.g. in a replay
+        simRate = state['SimRate'] or 1.0
+        if paused != self.paused or simRate != self.simRate:
+            if paused != self.paused:
+                log.debug(F'simulator {"paused" if paused else "running"}')
+                events.state.send('paused', paused)
+            if simRate != self.simRate:
+                log.debug(F'simulation rate {simRate:g}')
+            self.paused = paused
+            self.simRate = simRate
+            self.reschedulePolls()
+
     def set_triggered(self, msg):
         if msg:
             self.triggered = True
         else:
             self.triggered = False
-    def output(self, msg):
-        # put a speech message in the queue and output to the text control
+    def output(self, msg, priority=PRIORITY_NORMAL, key=None):
+        # put a speech message in the queue and output to the text control.
+        # a message with a key replaces a message with the same key that is still waiting to be spoken.
         log.debug("queuing: " + msg)
-        pub.sendMessage("update", msg=msg)
-        self.q.put(msg)
-    def speak(self, msg):
+        events.announcement.send(msg)
+        self.q.put(msg, priority, key)
+    def speak(self, msg, priority=PRIORITY_NORMAL, key=None):
         # only speak a message, don't update the text control
         log.debug("queuing: " + msg)
-        self.q.put(msg)
+        self.q.put(msg, priority, key)
     def read_config(self):
         try:
             self.geonames_username = config.app['config']['geonames_username']
@@ -380,6 +349,18 @@ class TFM(threading.Thread):
             self.ILSInterval = float(config.app['timing']['ils_interval'])
             self.use_metric = config.app['config']['use_metric']
             self.voice_rate = int(config.app['config']['voice_rate'])
+            self.freshness = float(config.app['polling']['freshness'])
+            self.settleTime = float(config.app['polling']['settle_time'])
+            self.audioLatency = float(config.app['polling']['audio_latency'])
+            self.reconnectDelay = float(config.app['connection']['reconnect_delay'])
+            self.maxReconnectDelay = float(config.app['connection']['max_reconnect_delay'])
+            self.probeInterval = float(config.app['connection']['probe_interval'])
+            self.recorderEnabled = config.app['recorder']['enabled']
+            self.trimDeadband = float(config.app['conditioning']['trim_deadband'])
+            self.switchDebounce = float(config.app['conditioning']['switch_debounce'])
+            self.switchFields = list(config.app['conditioning']['switches'])
+            self.radioDebounce = float(config.app['conditioning']['radio_debounce'])
+            self.radioFields = list(config.app['conditioning']['radios'])
             if config.app['config']['flight_following']:
                 self.FFEnabled = True
             else:
@@ -417,81 +398,63 @@ class TFM(threading.Thread):
 
     def manualFlight(self, dt, triggered = 0):
         try:
+            self.getPyuipcData(3)
             pitch = round(self.attitude['Pitch'], 1)
             bank = round(self.attitude['Bank'])
             if bank > 0:
-                self.speak (F'Left {bank}')
+                self.speak (F'Left {bank}', key='bank')
             elif bank < 0:
-                self.speak (F'right {abs(bank)}')
+                self.speak (F'right {abs(bank)}', key='bank')
             if pitch > 0:
-                self.speak (F'down {pitch}')
+                self.speak (F'down {pitch}', key='pitch')
             elif pitch < 0:
-                self.speak (F'Up {abs(pitch)}')
+                self.speak (F'Up {abs(pitch)}', key='pitch')
         except Exception as e:
             log.exception (F'Error in manual flight. Pitch: {pitch}, Bank: {bank}' + str(e))
+    def writeOffset(self, name, value):
+        # queue a value, given in the same units it is read in, for an instrument offset.
+        # the conversion to the FSUIPC format comes from the offset schema.
+        # setters are called from the GUI thread; the sim thread does the actual write, so this returns a future.
+        return self.writes.submit(name, value)
+    def flushWrites(self):
+        # write everything the setters queued since the last tick, in one call
+        if not self.writes.pending:
+            return
+        if not self.connection.connected:
+            self.writes.fail(ConnectionError('not connected to the simulator'))
+            self.speak('Not connected to the simulator.')
+            return
+        try:
+            self.writes.flush(pyuipc)
+            self.connection.ok()
+        except pyuipc.FSUIPCException as e:
+            self.connection.lost(e)
     def set_speed(self, speed):
         # set the autopilot airspeed
-        offset, type = self.InstrOffsets['ApAirspeed']
-        data = [(offset, type, int(speed))]
-        pyuipc.write(data)
+        return self.writeOffset('ApAirspeed', float(speed))
     def set_heading(self, heading):
         # set the auto pilot heading
-        offset, type = self.InstrOffsets['ApHeading']
-        # convert the supplied heading into the proper FSUIPC format (degrees*65536/360)
-        heading = int(heading)
-        heading = int(heading * 65536 / 360)
-        data = [(offset, type, heading)]
-        pyuipc.write(data)
+        return self.writeOffset('ApHeading', int(heading))
     def set_altitude(self, altitude):
-        offset, type = self.InstrOffsets['ApAltitude']
-        # convert the supplied altitude into the proper FSUIPC format.
-        #  FSUIPC needs the altitude as metres*65536
-        altitude =int(altitude)
-        altitude = int(altitude / 3.28084 * 65536)
-        data = [(offset, type, altitude)]
-        pyuipc.write(data)
+        return self.writeOffset('ApAltitude', int(altitude))
     def set_mach(self, mach):
         # set mach speed
-        offset, type = self.InstrOffsets['ApMach']
-        # convert the supplied mach value into the proper FSUIPC format.
-        #  FSUIPC needs the mach multiplied by 65536
-        mach = float(mach) * 65536
-        mach = int(mach)
-        
-        data = [(offset, type, mach)]
-        pyuipc.write(data)
+        return self.writeOffset('ApMach', float(mach))
     def set_vspeed(self, vspeed):
         # set the autopilot vertical speed
-        offset, type = self.InstrOffsets['ApVerticalSpeed']
-        data = [(offset, type, int(vspeed))]
-        pyuipc.write(data)
+        return self.writeOffset('ApVerticalSpeed', int(vspeed))
 
     def set_transponder(self, transponder):
         # set the transponder
-        offset, type = self.InstrOffsets['Transponder']
-        data = [(offset, type, int(transponder, 16))]
-        pyuipc.write(data)
+        return self.writeOffset('Transponder', int(transponder))
     def set_com1(self, com1):
         # set com 1 frequency
-        offset, type = self.InstrOffsets['Com1Freq']
-        freq = float(com1) * 100
-        freq = int(freq) - 10000
-        freq = F"{freq}"
-        data = [(offset, type, int(freq, 16))]
-        pyuipc.write(data)
+        return self.writeOffset('Com1Freq', float(com1))
     def set_qnh(self, qnh):
-        offset, type = self.InstrOffsets['Altimeter']
-        qnh = int(qnh) * 16
-        data = [(offset, type, qnh)]
-        pyuipc.write(data)
+        return self.writeOffset('Altimeter', int(qnh))
     def set_inches(self, inches):
         # we need to convert altimeter value to qnh, since that is what the fsuipc expects
-        offset, type = self.InstrOffsets['Altimeter']
-        qnh = float(inches) * 33.864
-        qnh = round(qnh, 1) * 16
-        qnh = int(qnh)
-        data = [(offset, type, qnh)]
-        pyuipc.write(data)
+        return self.writeOffset('Altimeter', round(float(inches) * 33.864, 1))
 
 
 
@@ -568,11 +531,11 @@ class TFM(threading.Thread):
                 pyglet.clock.unschedule(self.play_heading_tones)
                 self.BankPlayer.pause()
                 self.output ("Runway guidance disabled")
-                pub.sendMessage('reset', arg1=True)
+                events.reset.send()
                 return
             else:
                 self.runway_guidance = True
-                self.hdg = round(self.headingCorrected)
+                self.hdg = round(self.instr['CompassHeading'])
                 self.output("Runway guidance enabled")
                 self.output(F" current heading: {self.hdg} degrees")
                 self.hdg_right = self.hdg + 45
@@ -593,24 +556,24 @@ class TFM(threading.Thread):
                     self.hdg_left_tones[i] = self.hdg_freqs[count]
                     count += 1
                 pyglet.clock.schedule_interval(self.play_heading_tones, 0.2)
-                pub.sendMessage('reset', arg1=True)
+                events.reset.send()
         except Exception as e:
             log.exception("error calculating heading lock")
 
 
     def play_heading_tones(self, dt=0):
         try:
-            self.headingCorrected = round(self.headingCorrected)
-            if self.headingCorrected > self.hdg and  self.headingCorrected < self.hdg_right:
+            heading = round(self.instr['CompassHeading'])
+            if heading > self.hdg and  heading < self.hdg_right:
                 self.BankPlayer.position = (5, 0, 0)
                 self.BankPlayer.play()
-                self.BankPlayer.pitch = self.hdg_right_tones[abs(self.headingCorrected)]
-            if self.headingCorrected < self.hdg and self.headingCorrected > self.hdg_left:
+                self.BankPlayer.pitch = self.hdg_right_tones[abs(heading)]
+            if heading < self.hdg and heading > self.hdg_left:
                 self.BankPlayer.position = (-5, 0, 0)
                 self.BankPlayer.play()
-                self.BankPlayer.pitch = self.hdg_left_tones[abs(self.headingCorrected)]
+                self.BankPlayer.pitch = self.hdg_left_tones[abs(heading)]
 
-            if self.hdg == self.headingCorrected:
+            if self.hdg == heading:
                 self.BankPlayer.pause()
         except Exception as e:
             log.exception("error playing heading tones")
@@ -618,51 +581,50 @@ class TFM(threading.Thread):
     def readAltitude(self):
         self.getPyuipcData(1)
         self.output(F'{self.instr["Altitude"]} feet A S L')
-        pub.sendMessage('reset', arg1=True)
+        events.reset.send()
     def readGroundAltitude(self):
         self.getPyuipcData(1)
-        AGLAltitude = self.instr['Altitude'] - self.instr['GroundAltitude']
-        self.output(F"{round(AGLAltitude)} feet A G L")
-        pub.sendMessage('reset', arg1=True)
+        self.output(F"{self.instr['GroundAltitudeAGL']} feet A G L")
+        events.reset.send()
 
     def readFlightFollowing(self):
-        pub.sendMessage('reset', arg1=True)
+        events.reset.send()
         self.AnnounceInfo()
     def readHeading(self):
         self.getPyuipcData(1)
-        self.output(F'Heading: {round(self.headingCorrected)}')
-        pub.sendMessage('reset', arg1=True)
+        self.output(F'Heading: {round(self.instr["CompassHeading"])}')
+        events.reset.send()
     def readTAS(self):
         self.getPyuipcData(1)
         self.output (F'{self.instr["AirspeedTrue"]} knots true')
-        pub.sendMessage('reset', arg1=True)
+        events.reset.send()
     def readIAS(self):
         self.getPyuipcData(1)
         self.output (F'{self.instr["AirspeedIndicated"]} knots indicated')
-        pub.sendMessage('reset', arg1=True)
+        events.reset.send()
     def readMach(self):
         self.getPyuipcData(1)
         self.output (F'Mach {self.instr["AirspeedMach"]:0.2f}')
-        pub.sendMessage('reset', arg1=True)
+        events.reset.send()
     def readVSpeed(self):
         self.getPyuipcData(1)
         self.output (F"{self.instr['VerticalSpeed']:.0f} feet per minute")
-        pub.sendMessage('reset', arg1=True)
+        events.reset.send()
     def readDest(self):
         self.getPyuipcData(1)
         self.output(F'Time enroute {self.instr["DestETE"]}. {self.instr["DestETA"]}')
-        pub.sendMessage('reset', arg1=True)
+        events.reset.send()
     def readTemp(self):
         self.getPyuipcData(1)
-        self.output (F'{self.tempC:.0f} degrees Celcius, {self.tempF} degrees Fahrenheit')
-        pub.sendMessage('reset', arg1=True)
+        self.output (F'{self.instr["AirTemp"]:.0f} degrees Celcius, {self.instr["AirTempF"]} degrees Fahrenheit')
+        events.reset.send()
     def readWind(self):
         self.getPyuipcData(1)
         windSpeed = self.instr['WindSpeed']
         windDirection = round(self.instr['WindDirection'])
         windGust = self.instr['WindGust']
         self.output(F'Wind: {windDirection} at {windSpeed} knotts. Gusts at {windGust} knotts.')
-        pub.sendMessage('reset', arg1=True)
+        events.reset.send()
 
     def toggleTrim(self):
         if self.trimEnabled:
@@ -671,7 +633,7 @@ class TFM(threading.Thread):
         else:
             self.trimEnabled = True
             self.output ('trim announcement enabled')
-        pub.sendMessage('reset', arg1=True)
+        events.reset.send()
 
     def toggleGPWS(self):
         if self.calloutsEnabled:
@@ -680,7 +642,7 @@ class TFM(threading.Thread):
         else:
             self.calloutsEnabled = True
             self.output ("GPWS callouts enabled")
-        pub.sendMessage('reset', arg1=True)
+        events.reset.send()
 
     def toggleMuteSimconnect(self):
         if self.MuteSimC:
@@ -689,7 +651,7 @@ class TFM(threading.Thread):
         else:
             self.MuteSimC = True
             self.output ('Sim Connect messages muted')
-        pub.sendMessage('reset', arg1=True)
+        events.reset.send()
     def toggleFlaps(self):
         if self.flapsEnabled:
             self.output ("flaps disabled")
@@ -697,7 +659,7 @@ class TFM(threading.Thread):
         else:
             self.output ("Flaps enabled")
             self.flapsEnabled = True
-        pub.sendMessage('reset', arg1=True)
+        events.reset.send()
     def toggleILS(self):
         if self.readILSEnabled:
             self.output ('I L S info disabled')
@@ -705,7 +667,7 @@ class TFM(threading.Thread):
         else:
             self.output ('I L S info enabled')
             self.readILSEnabled = True
-        pub.sendMessage('reset', arg1=True)
+        events.reset.send()
     def toggleDirectorMode(self):
         if self.directorEnabled:
             pyglet.clock.unschedule(self.sonifyFlightDirector)
@@ -718,7 +680,7 @@ class TFM(threading.Thread):
             pyglet.clock.schedule_interval(self.sonifyFlightDirector, 0.2)
             self.directorEnabled = True
             self.output ('flight director mode enabled')
-        pub.sendMessage('reset', arg1=True)
+        events.reset.send()
 
     def toggleAutoPilot(self):
         if not self.APEnabled:
@@ -727,7 +689,7 @@ class TFM(threading.Thread):
         else:
             self.output (F'autopilot control disabled')
             self.APEnabled = False
-        pub.sendMessage('reset', arg1=True)
+        events.reset.send()
     def toggleManualMode(self):
         if self.manualEnabled:
             pyglet.clock.unschedule(self.manualFlight)
@@ -737,7 +699,7 @@ class TFM(threading.Thread):
             pyglet.clock.schedule_interval(self.manualFlight, self.ManualInterval)
             self.manualEnabled = True
             self.output ('manual flight mode enabled')
-        pub.sendMessage('reset', arg1=True)
+        events.reset.send()
 
     def toggleAttitudeMode(self):
         if self.sonifyEnabled:
@@ -751,134 +713,64 @@ class TFM(threading.Thread):
             pyglet.clock.schedule_interval(self.sonifyPitch, 0.05)
             self.sonifyEnabled = True
             self.output ('attitude mode enabled')
-        pub.sendMessage('reset', arg1=True)
+        events.reset.send()
 
 
 
 
 
     def readCallouts (self, dt=0):
-        if self.calloutsEnabled:
-            vspeed = self.instr['VerticalSpeed']
-            callout = 0
-            if vspeed < -50:
-                for i in self.calloutsHigh:
-                    if self.RadioAltitude <= i + 5 and self.RadioAltitude >= i - 5 and self.calloutState[i] == False:
-                        source = pyglet.media.load (F'sounds\\{str(i)}.wav')
-                        source.play()
-                        self.calloutState[i] = True
-                        
-                for i in self.calloutsLow:
-                    if self.RadioAltitude <= i + 3 and self.RadioAltitude >= i - 3 and self.calloutState[i] == False:
-                        source = pyglet.media.load (F'sounds\\{str(i)}.wav')
-                        source.play()
-                        self.calloutState[i] = True
-                        
+        if self.calloutsEnabled and not self.instr.stale and not self.slewing:
+            # radio altitude and vertical speed are in the fastest offset group
+            sampled = self.instrGroups[0].read_at
+            if sampled == NEVER:
+                return
+            for height in self.gpws.update(self.instr['RadioAltimeter'], self.instr['VerticalSpeed'], sampled, self.clock()):
+                started = time.perf_counter()
+                self.sounds.play(str(height))
+                self.gpws.audio_started(time.perf_counter() - started)
             
     ## read various instrumentation automatically
     def readInstruments(self, dt=0):
-        flapsTransit = False
-        # Get data from simulator
-        self.getPyuipcData()
+        # nothing is announced while slewing. Slew mode ending resyncs.
+        if self.instr.stale or self.slewing:
+            return
+        if self.resyncInstruments:
+            # first data after (re)connecting: take it as the baseline instead of announcing every difference
+            self.instr.commit()
+            self.settle.reset(self.instr)
+            self.conditioner.reset(self.instr)
+            self.altitudeCrossings.reset(self.instr['Altitude'])
+            self.resyncInstruments = False
+            return
+        # everything that changed since the last run, found in one array comparison.
+        # oldInstr holds the values of the last run until the commit at the end.
+        changed = self.instrChanged = self.instr.changes()
 
         # detect if aircraft is on ground or airborne.
-        if self.oldInstr['OnGround'] != self.instr['OnGround']:
+        if 'OnGround' in changed:
             if self.instr['OnGround'] == False:
-                self.output ("Positive rate.")
+                self.output ("Positive rate.", PRIORITY_HIGH)
                 log.debug("unscheduling groundspeed")
                 pyglet.clock.unschedule(self.readGroundSpeed)
                 self.groundSpeed = False
                 self.airborne = True
+                events.state.send('airborne', True)
                 log.debug("unscheduling heading lock")
                 pyglet.clock.unschedule(self.play_heading_tones)
                 self.runway_guidance = False
-        # landing gear
-        if self.instr['Gear'] != self.oldInstr['Gear']:
-            if self.instr['Gear'] == 0:
-                self.output ('Gear up.')
-            elif self.instr['Gear'] == 16383:
-                self.output ('Gear down.')
-            self.oldInstr['Gear'] = self.instr['Gear']
-
-        # if flaps position has changed, flaps are in motion. We need to wait until they have stopped moving to read the value.
-        if self.flapsEnabled:
-            if self.instr['Flaps'] != self.oldInstr['Flaps']:
-                flapsTransit = True
-                while flapsTransit:
-                    self.getPyuipcData()
-                    if self.instr['Flaps'] != self.oldInstr['Flaps']:
-                        self.oldInstr['Flaps'] = self.instr['Flaps']
-                        time.sleep (0.2)
-                    else:
-                        flapsTransit = False
-                
-                self.output (F'Flaps {self.instr["Flaps"]:.0f}')
-                self.oldInstr['Flaps'] = self.instr['Flaps']
-            # announce radio frequency changes
-        if self.instr['Com1Freq'] != self.oldInstr['Com1Freq']:
-            self.output (F"com 1, {self.instr['Com1Freq']}")
-        if self.instr['Com2Freq'] != self.oldInstr['Com2Freq']:
-            self.output (F"com 2, {self.instr['Com1Freq']}")
-
-        # spoilers
-        if self.oldInstr['Spoilers'] != self.instr['Spoilers']:
-            if self.instr['Spoilers'] == 4800:
-                self.output ("spoilers armed.")
-            elif self.instr['Spoilers'] == 16384:
-                self.output(f'Spoilers deployed')
-            elif self.instr['Spoilers'] == 0:
-                if self.oldInstr['Spoilers'] == 4800:
-                    self.output(F'arm spoilers off')
-                else:
-                    self.output(F'Spoilers retracted')
-        if self.oldInstr['ApAltitude'] != self.instr['ApAltitude']:
-            self.output(F"Altitude set to {round(self.instr['ApAltitude'])}")
-        if self.APEnabled:
-            if self.oldInstr['ApHeading'] != self.instr['ApHeading']:
-                self.output (F"{self.instr['ApHeading']} degrees")
-            if self.oldInstr['ApAirspeed'] != self.instr['ApAirspeed']:
-                self.output (F"{self.instr['ApAirspeed']}")
-            if self.oldInstr['ApMach'] != self.instr['ApMach']:
-                self.output (F"mach {self.instr['ApMach']:.2f}")
-            if self.oldInstr['ApVerticalSpeed'] != self.instr['ApVerticalSpeed']:
-                self.output (F"{self.instr['ApVerticalSpeed']} feet per minute")
-
-
-
-        # transponder
-        if self.instr['Transponder'] != self.oldInstr['Transponder']:
-            self.output(F'Squawk {self.instr["Transponder"]:x}')
+        # announcements expressed as rules: only the rules depending on a changed field are evaluated.
+        # flickering switches and radios being tuned are held back until they settle.
+        announced = self.conditioner.filter(self.instr, changed, self.clock())
+        for priority, message, key in self.instrRules.evaluate(self.instr, announced, self, self.conditioner.old(self.instr)):
+            self.output(message, priority, key)
         # next waypoint
-        if self.instr['NextWPId'] != self.oldInstr['NextWPId']:
-            time.sleep(3)
-            self.getPyuipcData()
-            self.readWaypoint(0)
-            self.oldInstr['NextWPId'] = self.instr['NextWPId']
-        # read autobrakes
-        if self.instr['AutoBrake'] != self.oldInstr['AutoBrake']:
-            if self.instr['AutoBrake'] == 0:
-                brake = 'R T O'
-            elif self.instr['AutoBrake'] == 1:
-                brake = 'off'
-            elif self.instr['AutoBrake'] == 2:
-                brake = 'position 1'
-            elif self.instr['AutoBrake'] == 3:
-                brake = 'position 2'
-            elif self.instr['AutoBrake'] == 4:
-                brake = 'position 3'
-            elif self.instr['AutoBrake'] == 5:
-                brake = 'maximum'
-            self.output (F'Auto brake {brake}')
-        if self.instr['ElevatorTrim'] != self.oldInstr['ElevatorTrim'] and self.instr['ApMaster'] != 1 and self.trimEnabled:
-            if self.instr['ElevatorTrim'] < 0:
-                self.output (F"Trim down {abs(round (self.instr['ElevatorTrim'], 2))}")
-            else:
-                self.output (F"Trim up {round (self.instr['ElevatorTrim'], 2)}")
-
-
-        if self.AltHPA != self.oldHPA:
-            self.output (F'Altimeter: {self.AltHPA}, {self.AltInches / 100} inches')
-            self.oldHPA = self.AltHPA
+        if 'NextWPId' in changed:
+            # the distance and ETE to the new waypoint arrive a little later than its name.
+            # announce once they have refreshed, without holding up the sim thread.
+            self.waypointChange = (self.clock(), self.instr['NextWPDistance'], self.instr['NextWPETE'])
+            pyglet.clock.unschedule(self.readChangedWaypoint)
+            pyglet.clock.schedule_interval(self.readChangedWaypoint, 0.25)
         # read nav1 ILS info if enabled
         if self.readILSEnabled:
             if self.instr['Nav1Signal'] == 256 and self.LocDetected == False and self.instr['Nav1Type']:
@@ -899,54 +791,6 @@ class TFM(threading.Thread):
                 self.HasGS = True
         else:
             pyglet.clock.unschedule(self.readILS)
-        self.readToggle('PitotHeat', 'Pitot Heat', 'on', 'off')
-        self.readToggle('ParkingBrake', 'Parking brake', 'on', 'off')
-        self.readToggle('AutoFeather', 'Auto Feather', 'Active', 'off')
-        # autopilot mode switches
-        self.readToggle ('ApMaster', 'Auto pilot master', 'active', 'off')
-        # auto throttle
-        self.readToggle ('AutoThrottleArm', 'Auto Throttle', 'Armed', 'off')
-        # yaw damper
-        self.readToggle('ApYawDamper', 'Yaw Damper', 'active', 'off')
-        # Toga
-        self.readToggle('Toga', 'take off power', 'active', 'off')
-        self.readToggle('ApAltitudeLock', 'altitude lock', 'active', 'off')
-        self.readToggle('ApHeadingLock', 'Heading lock', 'active', 'off')
-        self.readToggle('ApNavLock', 'nav lock', 'active', 'off')
-        self.readToggle('ApFlightDirector', 'Flight Director', 'Active', 'off')
-        self.readToggle ('ApNavGPS', 'Nav gps switch', 'set to GPS', 'set to nav')
-        self.readToggle('ApAttitudeHold', 'Attitude hold', 'active', 'off')
-        self.readToggle('ApWingLeveler', 'Wing leveler', 'active', 'off')
-        self.readToggle ('ApAutoRudder', 'Auto rudder', 'active', 'off')
-        self.readToggle('ApApproachHold', "approach mode", "active", "off")
-        self.readToggle('ApSpeedHold', 'Airspeed hold', 'active', 'off')
-        self.readToggle('ApMachHold', 'Mach hold', 'Active', 'off')
-        self.readToggle('PropSync', 'Propeller Sync', 'active', 'off')
-        self.readToggle ('BatteryMaster', 'Battery Master', 'active', 'off')
-        self.readToggle('Door1', 'Door 1', 'open', 'closed')
-        self.readToggle('Door2', 'Door 2', 'open', 'closed')
-        self.readToggle('Door3', 'Door 3', 'open', 'closed')
-        self.readToggle('Door4', 'Door 4', 'open', 'closed')
-        self.readToggle('Eng1Starter', 'Number 1 starter', 'engaged', 'off')
-        self.readToggle('Eng2Starter', 'Number 2 starter', 'engaged', 'off')
-        self.readToggle('Eng3Starter', 'Number 3 starter', 'engaged', 'off')
-        self.readToggle('Eng4Starter', 'Number 4 starter', 'engaged', 'off')
-        self.readToggle('Eng1Combustion', 'Number 1 ignition', 'on', 'off')
-        self.readToggle('Eng2Combustion', 'Number 2 ignition', 'on', 'off')
-        self.readToggle('Eng3Combustion', 'Number 3 ignition', 'on', 'off')
-        self.readToggle('Eng4Combustion', 'Number 4 ignition', 'on', 'off')
-        self.readToggle('Eng1Generator', 'Number 1 generator', 'active', 'off')
-        self.readToggle('Eng2Generator', 'Number 2 generator', 'active', 'off')
-        self.readToggle('Eng3Generator', 'Number 3 generator', 'active', 'off')
-        self.readToggle('Eng4Generator', 'Number 4 generator', 'active', 'off')
-        self.readToggle('BeaconLights', 'Beacon light', 'on', 'off')
-        self.readToggle('LandingLights', 'Landing Lights', 'on', 'off')
-        self.readToggle('TaxiLights', 'Taxi Lights', 'on', 'off')
-        self.readToggle('NavigationLights', 'Nav lights', 'on', 'off')
-        self.readToggle('StrobeLights', 'strobe lights', 'on', 'off')
-        self.readToggle('InstrumentLights', 'Instrument lights', 'on', 'off')
-        self.readToggle('APUGenerator', 'A P U Generator', 'active', 'off')
-        self.readToggle('AvionicsMaster', 'Avionics master', 'active', 'off')
 
         if self.groundspeedEnabled:
             if self.instr['GroundSpeed'] > 0 and self.instr['OnGround'] and self.groundSpeed == False:
@@ -956,151 +800,77 @@ class TFM(threading.Thread):
             elif self.instr['GroundSpeed'] == 0 and self.groundSpeed:
                 pyglet.clock.unschedule(self.readGroundSpeed)
 
-        # read APU status
-        if self.instr['APUPercentage'] > 4 and self.APUStarting == False and self.APURunning == False and self.APUShutdown == False and self.APUOff == True:
-            self.output('A P U starting')
-            self.APUStarting = True
-            self.APUOff = False
-        if self.instr['APUPercentage'] < 100 and self.APURunning:
-            self.output ('Shutting down A P U')
-            self.APURunning = False
-            self.APUShutdown = True
-        if self.instr['APUPercentage'] == 100 and self.APUStarting:
-            self.APUStarting = False
-            self.APURunning = True
-            self.output("apu at 100 percent")
-        if self.instr['APUPercentage'] == 0 and self.APUOff == False:
-            self.output('A P U shut down')
-            self.APURunning = False
-            self.APUStarting = False
-            self.APUShutdown = False
-            self.APUOff = True
-
-
-        if self.instr['APUGenerator'] and self.APUGenerator == False:
-            self.output (F"{round(self.instr['APUVoltage'])} volts")
-            self.APUGenerator = True
-        if self.instr['APUGenerator'] == False:
-            self.APUGenerator = False
-
-
         # read engine status on startup.
-        if self.instr['Eng1FuelFlow'] > 10 and self.instr['Eng1Starter'] and self.Eng1FuelFlow == False:
-            self.output ('Number 1 fuel flow')
-            self.Eng1FuelFlow = True
-        if self.instr['Eng2FuelFlow'] > 10 and self.instr['Eng2Starter'] and self.Eng2FuelFlow == False:
-            self.output ('Number 2 fuel flow')
-            self.Eng2FuelFlow = True
-        if self.instr['Eng3FuelFlow'] > 10 and self.instr['Eng3Starter'] and self.Eng3FuelFlow == False:
-            self.output ('Number 3 fuel flow')
-            self.Eng3FuelFlow = True
-        if self.instr['Eng4FuelFlow'] > 10 and self.instr['Eng4Starter'] and self.Eng4FuelFlow == False:
-            self.output ('Number 4 fuel flow')
-            self.Eng4FuelFlow = True
-        if self.instr['Eng1N2'] > 5 and self.Eng1N2 == False and self.instr['Eng1Starter']:
-            self.output ('number 1, 5 percent N2')
-            self.Eng1N2 = True
-        if self.instr['Eng1N1'] > 5 and self.Eng1N1 == False  and self.instr['Eng1Starter']:
-            self.output ('number 1, 5 percent N1')
-            self.Eng1N1 = True
-        if self.instr['Eng2N2'] > 5 and self.Eng2N2 == False  and self.instr['Eng2Starter']:
-            self.output ('number 2, 5 percent N2')
-            self.Eng2N2 = True
-        if self.instr['Eng2N1'] > 5 and self.Eng2N1 == False  and self.instr['Eng2Starter']:
-            self.output ('number 2, 5 percent N1')
-            self.Eng2N1 = True
-        if self.instr['Eng3N2'] > 5 and self.Eng3N2 == False  and self.instr['Eng3Starter']:
-            self.output ('number 3, 5 percent N2')
-            self.Eng3N2 = True
-        if self.instr['Eng3N1'] > 5 and self.Eng3N1 == False  and self.instr['Eng3Starter']:
-            self.output ('number 3, 5 percent N1')
-            self.Eng3N1 = True
-        if self.instr['Eng4N2'] > 5 and self.Eng4N2 == False  and self.instr['Eng4Starter']:
-            self.output ('number 4, 5 percent N2')
-            self.Eng4N2 = True
-        if self.instr['Eng4N1'] > 5 and self.Eng4N1 == False  and self.instr['Eng4Starter']:
-            self.output ('number 4, 5 percent N1')
-            self.Eng4N1 = True
-
-
-
-
+        for message in self.engines.update():
+            self.output (message)
+        # read out ITT while an engine is being started
+        if self.engines.starting().any() and not self.engineStart:
+            pyglet.clock.schedule_interval(self.readEngTemps, 5)
+            self.engineStart = True
+        elif self.engineStart and not self.engines.starting().any():
+            pyglet.clock.unschedule(self.readEngTemps)
+            self.engineStart = False
 
         # read altitude every 1000 feet
-        for i in range (1000, 65000, 1000):
-            if self.instr['Altitude'] >= i - 10 and self.instr['Altitude'] <= i + 10 and self.altFlag[i] == False:
-                self.speak (F"{i} feet")
-                self.altFlag[i] = True
-            elif self.instr['Altitude'] >= i + 100:
-                self.altFlag[i] = False
+        for altitude in self.altitudeCrossings.update(self.instr['Altitude']):
+            self.speak (F"{altitude} feet", PRIORITY_HIGH, 'altitude')
         # maintain state of instruments so we can check on the next run.
-        self.oldInstr = copy.deepcopy(self.instr)
+        self.instr.commit()
+
+    ## announce flaps, autopilot settings and trim once they have stopped moving,
+    ## and switches and radios once they have stopped flickering.
+    def readSettled(self, dt=0):
+        if self.instr.stale or self.resyncInstruments or self.slewing:
+            return
+        now = self.clock()
+        for priority, message, key in self.settle.update(self.instr, now, self):
+            self.output(message, priority, key)
+        # switches and radios whose debounce time ran out since the last instrument read
+        released = self.conditioner.release(self.instr, now)
+        if released:
+            for priority, message, key in self.instrRules.evaluate(self.instr, released, self, self.conditioner.old(self.instr)):
+                self.output(message, priority, key)
 
     def readEngTemps(self, dt = 0):
-        if self.use_metric == False:
-            Eng1Temp = round(9.0/5.0 * self.instr['Eng1ITT'] + 32)
-            Eng2Temp = round(9.0/5.0 * self.instr['Eng2ITT'] + 32)
-            Eng3Temp = round(9.0/5.0 * self.instr['Eng3ITT'] + 32)
-            Eng4Temp = round(9.0/5.0 * self.instr['Eng4ITT'] + 32)
-        else:
-            Eng1Temp = self.instr['Eng1ITT']
-            Eng2Temp = self.instr['Eng2ITT']
-            Eng3Temp = self.instr['Eng3ITT']
-            Eng4Temp = self.instr['Eng4ITT']
-        if self.instr['Eng1Starter'] and self.instr['Eng1Combustion']:
-            self.output (F"number 1 temp, {Eng1Temp}")
-        elif self.instr['Eng2Starter'] and self.instr['Eng2Combustion']:
-            self.output (F"number 2 temp, {Eng2Temp}")
-        elif self.instr['Eng3Starter'] and self.instr['Eng3Combustion']:
-            self.output (F"number 3 temp, {Eng3Temp}")
-        elif self.instr['Eng4Starter'] and self.instr['Eng4Combustion']:
-            self.output (F"number 4 temp, {Eng4Temp}")
+        if self.instr.stale or self.paused:
+            return
+        temperature = self.engines.temperature(self.use_metric)
+        if temperature is not None:
+            engine, temp = temperature
+            self.output (F"number {engine} temp, {temp}")
         
     def readGroundSpeed(self, dt=0):
-        self.sapi_q.put(F"{self.instr['GroundSpeed']} knotts")
+        self.sapi_q.put(F"{self.instr['GroundSpeed']} knotts", key='groundspeed')
 
     def readILS(self, dt=0):
         GSNeedle = self.instr['Nav1GSNeedle']
         LocNeedle = self.instr['Nav1LocNeedle']
         if GSNeedle > 0 and GSNeedle < 119:
             GSPercent = GSNeedle / 119 * 100.0
-            self.speak (f'up {GSPercent:.0f} percent G S I')
+            self.speak (f'up {GSPercent:.0f} percent G S I', key='glideslope')
         elif GSNeedle < 0 and GSNeedle > -119:
             GSPercent = abs(GSNeedle) / 119 * 100.0
-            self.speak (f'down {GSPercent:.0f} percent G S I')
+            self.speak (f'down {GSPercent:.0f} percent G S I', key='glideslope')
         if LocNeedle > 0 and LocNeedle < 127:
             LocPercent = GSNeedle / 127 * 100.0
-            self.speak (F'{LocPercent:.0f} percent right')    
+            self.speak (F'{LocPercent:.0f} percent right', key='localiser')    
         elif LocNeedle < 0 and LocNeedle > -127:
             LocPercent = abs(GSNeedle) / 127 * 100.0
-            self.speak (F'{LocPercent:.0f} percent left')    
+            self.speak (F'{LocPercent:.0f} percent left', key='localiser')    
 
 
 
-    def readToggle(self, instrument, name, onMessage, offMessage):
-        ## There are several aircraft functions that are simply on/off toggles. 
-        ## This function allows reading those without a bunch of duplicate code.
-        try:
-            if self.oldInstr[instrument] != self.instr[instrument]:
-                if self.instr[instrument]:
-                    self.output (F'{name} {onMessage}.')
-                else:
-                    self.output (F'{name} {offMessage}')
-                self.oldInstr[instrument] = self.instr[instrument]
-        except Exception as e:
-            log.exception(F"error in instrument toggle. Instrument was {instrument}")
+    def readChangedWaypoint(self, dt=0):
+        ## one-shot check scheduled when the next waypoint changes. Gives up waiting after 3 seconds.
+        changedAt, distance, ete = self.waypointChange
+        refreshed = self.instr['NextWPDistance'] != distance or self.instr['NextWPETE'] != ete
+        if refreshed or self.clock() - changedAt >= 3:
+            pyglet.clock.unschedule(self.readChangedWaypoint)
+            self.readWaypoint(0)
 
     def secondsToText(self, secs):
-        ## convert number of seconds into human readable format. Thanks to Stack Overflow for this!
-        days = secs//86400
-        hours = (secs - days*86400)//3600
-        minutes = (secs - days*86400 - hours*3600)//60
-        seconds = secs - days*86400 - hours*3600 - minutes*60
-        result = ("{0} day{1}, ".format(days, "s" if days!=1 else "") if days else "") + \
-        ("{0} hour{1}, ".format(hours, "s" if hours!=1 else "") if hours else "") + \
-        ("{0} minute{1}, ".format(minutes, "s" if minutes!=1 else "") if minutes else "") + \
-        ("{0} second{1}, ".format(seconds, "s" if seconds!=1 else "") if seconds else "")
-        return result
+        ## convert number of seconds into human readable format.
+        return seconds_to_text(secs)
     def readWaypoint(self, triggered=False):
         msg = ""
         try:
@@ -1124,8 +894,8 @@ class TFM(threading.Thread):
             # if we were triggered with a hotkey, read the ETA to the next waypoint.
             if self.triggered:
                 self.output(F'ETA: {self.instr["NextWPETA"]}')
-                pub.sendMessage('reset', arg1=True)
-            pub.sendMessage('reset', arg1=True)
+                events.reset.send()
+            events.reset.send()
         except Exception as e:
             log.exception ("error reading waypoint info")
 
@@ -1141,6 +911,7 @@ class TFM(threading.Thread):
             RCMessage = False
             index = 0
             if self.SimCEnabled:
+                self.getPyuipcData(2)
                 # If the change is due to an old message clearing, just return without doing anything.
                 if self.SimCData['SimCLength'] == 0:
                     return
@@ -1170,9 +941,9 @@ class TFM(threading.Thread):
                     self.oldSimCData = self.SimCData['SimCData']
                     
                 if triggered == 1:
-                    pub.sendMessage('reset', arg1=True)
+                    events.reset.send()
             # else:
-                    # pub.sendMessage('reset', arg1=True)
+                    # events.reset.send()
         except KeyError:
             pass
         except Exception as e:
@@ -1186,7 +957,7 @@ class TFM(threading.Thread):
                 break
             else:
                 self.output (message)
-        pub.sendMessage('reset', arg1=True)
+        events.reset.send()
     
     def readRC4(self, triggered = False):
         msgUpdated = False
@@ -1213,6 +984,8 @@ class TFM(threading.Thread):
         msg = ""
         # Get data from simulator
         self.getPyuipcData()
+        if self.instr.stale:
+            return
         # Lookup nearest cities to aircraft position using the Geonames database.
         self.airport="test"
         try:
@@ -1276,95 +1049,165 @@ class TFM(threading.Thread):
     
     ## Read data from the simulator
     def getPyuipcData(self, type=0, dt=0):
+        if not self.connection.connected:
+            # serve the last snapshot, marked stale, until the supervisor reconnects
+            return
         try:
             # read types: 0 - all, 1 - instrumentation, 2 - SimConnect, 3 - attitude    
             if type == 0 or type == 1:
-                self.instr = dict(zip(self.InstrOffsets.keys(), pyuipc.read(self.pyuipcOffsets)))
-                # prepare instrumentation variables
-                hexCode = hex(self.instr['Com1Freq'])[2:]
-                self.instr['Com1Freq'] = float('1{}.{}'.format(hexCode[0:2],hexCode[2:]))
-                hexCode = hex(self.instr['Com2Freq'])[2:]
-                self.instr['Com2Freq'] = float('1{}.{}'.format(hexCode[0:2],hexCode[2:]))
-                # lat lon
-                self.instr['Lat'] = self.instr['Lat'] * (90.0/(10001750.0 * 65536.0 * 65536.0))
-                self.instr['Long'] = self.instr['Long'] * (360.0/(65536.0 * 65536.0 * 65536.0 * 65536.0))
-                self.instr['Flaps'] = self.instr['Flaps'] / 256
-                self.instr['OnGround'] = bool(self.instr['OnGround'])
-                self.instr['ParkingBrake'] = bool(self.instr['ParkingBrake'])
-                # self.ASLAltitude = round(results[8] * 3.28084)
-                self.instr['Altitude'] = round(self.instr['Altitude'])
-                self.instr['GroundAltitude'] = self.instr['GroundAltitude'] / 256 * 3.28084
-                self.instr['ApHeading'] = round(self.instr['ApHeading']/65536*360)
-                self.instr['ApAltitude'] = self.instr['ApAltitude'] / 65536 * 3.28084
-                self.instr['ApMach'] = self.instr['ApMach'] / 65536
-                # self.headingTrue = floor(((self.instr['Heading'] * 360) / (65536 * 65536)) + 0.5)
-                self.headingTrue = self.instr['Heading'] * 360 / (65536 * 65536)
-                self.headingCorrected = self.instr['CompassHeading']
-                self.instr['AirspeedTrue'] = round(self.instr['AirspeedTrue'] / 128)
-                self.instr['AirspeedIndicated'] = round(self.instr['AirspeedIndicated'] / 128)
-                self.instr['AirspeedMach'] = self.instr['AirspeedMach'] / 20480
-                self.instr['GroundSpeed'] = round((self.instr['GroundSpeed'] * 3600) / (65536 * 1852))
-                self.instr['NextWPETA'] = time.strftime('%H:%M', time.localtime(self.instr['NextWPETA']))
-                self.instr['NextWPBaring'] = degrees(self.instr['NextWPBaring'])
-                self.instr['DestETE'] =self.secondsToText(self.instr['DestETE'])
-                self.instr['DestETA'] = time.strftime('%H:%M', time.localtime(self.instr['DestETA']))
-                self.instr['ElevatorTrim'] = degrees(self.instr['ElevatorTrim'])
-                self.instr['VerticalSpeed'] = round ((self.instr['VerticalSpeed'] * 3.28084) * -1, 0)
-                self.tempC = round(self.instr['AirTemp'] / 256, 0)
-                self.tempF = round(9.0/5.0 * self.tempC + 32)
-                self.AGLAltitude = self.instr['Altitude'] - self.instr['GroundAltitude']
-                self.RadioAltitude = self.instr['RadioAltimeter']  / 65536 * 3.28084
-                self.instr['APUPercentage'] = round(self.instr['APUPercentage'])
-                self.Nav1Bits = list(map(int, '{0:08b}'.format(self.instr['Nav1Flags'])))
-                self.instr['Nav1Type'] = self.Nav1Bits[0]
-                self.instr['Nav1GSAvailable'] = self.Nav1Bits[6]
-                self.DoorBits = list(map(int, '{0:08b}'.format(self.instr['Doors'])))
-                self.instr['Door1'] = self.DoorBits[7]
-                self.instr['Door2'] = self.DoorBits[6]
-                self.instr['Door3'] = self.DoorBits[5]
-                self.instr['Door4'] = self.DoorBits[4]
-                self.lights = list(map(int, '{0:08b}'.format(self.instr['Lights'])))
-                self.lights1 = list(map(int, '{0:08b}'.format(self.instr['Lights1'])))
-                # breakpoint()
-                self.instr['CabinLights'] = self.lights[0]
-                self.instr['LogoLights'] = self.lights[1]
-                self.instr['WingLights'] = self.lights1[0]
-                self.instr['RecognitionLights'] = self.lights1[1]
-                self.instr['InstrumentLights'] = self.lights1[2]
-                self.instr['StrobeLights'] = self.lights1[3]
-                self.instr['TaxiLights'] = self.lights1[4]
-                self.instr['LandingLights'] = self.lights1[5]
-                self.instr['BeaconLights'] = self.lights1[6]
-                self.instr['NavigationLights'] = self.lights1[7]
-                self.AltQNH = self.instr['Altimeter'] / 16
-                self.AltHPA = floor(self.AltQNH + 0.5)
-                self.AltInches = floor(((100 * self.AltQNH * 29.92) / 1013.2) + 0.5)
-                self.instr['Eng1ITT'] = round(self.instr['Eng1ITT'] / 16384)
-                self.instr['Eng2ITT'] = round(self.instr['Eng2ITT'] / 16384)
-                self.instr['Eng3ITT'] = round(self.instr['Eng3ITT'] / 16384)
-                self.instr['Eng4ITT'] = round(self.instr['Eng4ITT'] / 16384)
-                self.instr['WindDirection'] = self.instr['WindDirection'] *360/65536
-
-
-
-
-
-
+                self.instrSnapshot.get(pyuipc)
             if type == 0 or type == 2:
                 # prepare simConnect message data
                 try:
                     if self.SimCEnabled:
-                        self.SimCData = dict(zip(self.SimCOffsets.keys(), pyuipc.read(self.pyuipcSIMC)))
-                        self.SimCMessage = self.SimCData['SimCData'].decode ('UTF-8', 'ignore')
+                        raw = pyuipc.read(self.pyuipcSIMC)
+                        if self.recorder is not None:
+                            self.recordSimCHeader.record(raw)
+                        header = dict(zip(self.SimCHeader, raw))
+                        # only fetch the message text when the changed counter moves, and only as much as was received.
+                        if header['SimCChanged'] != self.SimCData.get('SimCChanged'):
+                            offset, size = self.SimCOffsets['SimCData']
+                            length = min(header['SimCLength'], size)
+                            if length > 0:
+                                header['SimCData'] = pyuipc.read([(offset, length)])[0]
+                                if self.recorder is not None:
+                                    self.recordSimCData.record((header['SimCData'],))
+                            else:
+                                header['SimCData'] = b''
+                            self.SimCData = header
+                            self.SimCMessage = header['SimCData'].decode ('UTF-8', 'ignore')
+                except pyuipc.FSUIPCException:
+                    raise
                 except Exception as e:
                     log.exception ('error reading simconnect message data')
             if type == 0 or type == 3:
                 # Read attitude
-                self.attitude = dict(zip(self.AttitudeOffsets.keys(), pyuipc.read(self.pyuipcAttitude)))
-                self.attitude['Pitch'] = self.attitude['Pitch'] * 360 / (65536 * 65536)
-                self.attitude['Bank'] = self.attitude['Bank'] * 360 / (65536 * 65536)
+                self.attitudeSnapshot.get(pyuipc)
+            self.connection.ok()
         except pyuipc.FSUIPCException as e:
-            log.debug("error reading from simulator. This could be normal. Exiting.")
-            pub.sendMessage("exit", msg="")
-
+            self.connection.lost(e)
 
+    ## read the instrumentation offset groups that are due. Scheduled at the rate of the fastest group.
+    def readInstrumentGroups(self, dt=0):
+        if not self.connection.connected:
+            return
+        try:
+            self.instrSnapshot.poll(pyuipc, self.simRate)
+            self.connection.ok()
+        except pyuipc.FSUIPCException as e:
+            self.connection.lost(e)
+
+    def prepareInstrumentGroups(self, fsuipc):
+        for group in self.instrGroups:
+            log.debug(F"preparing {len(group.offsets)} main offsets read at {group.rate} Hz")
+        self.instrSnapshot.prepare(fsuipc)
+
+    ## called by the connection supervisor every time the FSUIPC connection is opened.
+    def prepareOffsets(self, fsuipc):
+        if self.recorderEnabled and self.recorder is None:
+            self.startRecorder()
+        # find out what the aircraft has first: only its offsets are prepared
+        self.capabilityGroup.prepare(fsuipc)
+        self.simStateGroup.prepare(fsuipc)
+        if not self.probeAircraft(fsuipc):
+            self.prepareInstrumentGroups(fsuipc)
+        log.debug("preparing simconnect offsets")
+        self.pyuipcSIMC = fsuipc.prepare_data([self.SimCOffsets[name] for name in self.SimCHeader])
+        log.debug("preparing attitude mode offsets")
+        self.attitudeSnapshot.prepare(fsuipc)
+        # read everything once, so the first announcements after connecting compare against current data
+        self.instrSnapshot.get(fsuipc)
+        self.attitudeSnapshot.get(fsuipc)
+        self.resyncInstruments = True
+        events.state.send('connected', True)
+
+    ## read the engine count and type of the aircraft. If it isn't the aircraft the offsets were prepared for,
+    ## prepare the offsets and rules for its profile. Returns whether it did.
+    def probeAircraft(self, fsuipc):
+        record = self.capabilityGroup.read(fsuipc)
+        title = aircraft_title(record)
+        probed = probe_aircraft(record, self.maxEngines)
+        current = self.aircraft
+        same = current is not None and title == current.title
+        # a cached or assumed profile is replaced once the simulator reports the engines
+        if same and (current.probed or probed is None):
+            return False
+        profile = self.aircraftProfiles.lookup(title, probed, self.maxEngines)
+        if same and profile.to_dict() == current.to_dict():
+            self.aircraft = profile
+            return False
+        log.debug(F'aircraft: {profile}')
+        self.applyAircraftProfile(profile, fsuipc)
+        return True
+
+    def applyAircraftProfile(self, profile, fsuipc):
+        excluded = profile.excluded(INSTRUMENTS)
+        # hotkeys read through the snapshot provider from the GUI thread: keep them out while the groups change
+        with self.instrSnapshot.lock:
+            for group in self.instrGroups:
+                group.restrict([name for name in group.all_names if name not in excluded])
+            self.prepareInstrumentGroups(fsuipc)
+            for group in self.instrGroups:
+                if self.recorder is not None:
+                    group.recorder = self.recorder.stream(group.names, [type for offset, type in group.offsets.values()])
+            # no values left over from the previous aircraft
+            for name in excluded:
+                self.instr[name] = 0
+        self.aircraft = profile
+        self.instrRules = RuleTable([rule for rule in INSTRUMENT_RULES if excluded.isdisjoint(rule.inputs)])
+        self.engines = EngineMonitor(self.instr, count=profile.engines)
+
+    ## scheduled: notice the aircraft being changed in the simulator.
+    def checkAircraft(self, dt=0):
+        if not self.connection.connected:
+            return
+        try:
+            if self.probeAircraft(pyuipc):
+                self.instrSnapshot.get(pyuipc, max_age=0)
+                self.resyncInstruments = True
+            self.connection.ok()
+        except pyuipc.FSUIPCException as e:
+            self.connection.lost(e)
+
+    def startRecorder(self):
+        # record the raw data of every prepared data set to a new file in the recordings folder
+        path = os.path.join(paths.recordings_path(), time.strftime('flight-%Y%m%d-%H%M%S.tfmrec'))
+        log.debug(F'recording simulator data to {path}')
+        self.recorder = FlightRecorder(path, (INSTRUMENTS, SIMCONNECT, ATTITUDE, SIMSTATE), clock=self.clock)
+        for group in self.instrGroups + self.attitudeGroups + [self.simStateGroup]:
+            group.recorder = self.recorder.stream(group.names, [type for offset, type in group.offsets.values()])
+        self.recordSimCHeader = self.recorder.stream(self.SimCHeader, [self.SimCOffsets[name][1] for name in self.SimCHeader])
+        self.recordSimCData = self.recorder.stream(['SimCData'], [self.SimCOffsets['SimCData'][1]])
+        pyglet.clock.schedule_interval(self.flushRecorder, 5)
+
+    def flushRecorder(self, dt=0):
+        self.recorder.flush()
+
+    def closeRecorder(self):
+        if self.recorder is None:
+            return
+        pyglet.clock.unschedule(self.flushRecorder)
+        for group in self.instrGroups + self.attitudeGroups + [self.simStateGroup]:
+            group.recorder = None
+        log.debug(F'flight recorder closed: {self.recorder.statistics()}')
+        self.recorder.close()
+        self.recorder = None
+
+    def connectionLost(self):
+        self.instrSnapshot.invalidate()
+        self.attitudeSnapshot.invalidate()
+        # the recording ends with the connection; the next connection starts a new one
+        self.closeRecorder()
+        events.state.send('connected', False)
+
+    def logStatistics(self, dt=0):
+        log.debug(F'scheduler: {self.latency.statistics()}')
+        log.debug(F'instrument snapshots: {self.instrSnapshot.statistics()}')
+        log.debug(F'GPWS: {self.gpws.statistics()}')
+        log.debug(F'speech: {self.q.statistics()}, sapi: {self.sapi_q.statistics()}')
+        log.debug(F'signal conditioning: {self.conditioner.statistics()}, settled values: {self.settle.conditioner.statistics()}')
+        log.debug(F'attitude snapshots: {self.attitudeSnapshot.statistics()}')
+        log.debug(F'FSUIPC connection: {self.connection.statistics()}')
+        log.debug(F'offset writes: {self.writes.statistics()}')
+        if self.recorder is not None:
+            log.debug(F'flight recorder: {self.recorder.statistics()}')
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+## Instrumentation of the pyglet scheduler on the sim thread.
+## A heartbeat scheduled at a fixed interval measures how late it runs: anything that blocks the thread
+## (a sleep, a slow FSUIPC read, a web request) shows up as heartbeat lateness. Scheduled functions can also be
+## wrapped to record how long each call takes.
+import time
+from functools import wraps
+from bisect import bisect_left
+
+# upper bounds of the lateness histogram buckets, in milliseconds
+BUCKETS = (1, 5, 10, 20, 50, 100, 200, 500, 1000, 5000)
+
+class SchedulerLatency(object):
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.histogram = [0] * (len(BUCKETS) + 1)
+        self.beats = 0
+        self.total = 0.0
+        self.worst = 0.0
+        # name: (calls, total seconds, longest call)
+        self.calls = {}
+
+    def heartbeat(self, dt):
+        ## scheduled every interval seconds. pyglet passes the time since the previous call.
+        late = max(dt - self.interval, 0.0) * 1000
+        self.beats += 1
+        self.total += late
+        self.worst = max(self.worst, late)
+        self.histogram[bisect_left(BUCKETS, late)] += 1
+
+    def timed(self, function):
+        ## wrap a scheduled function to record the duration of its calls
+        name = function.__name__
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                duration = time.perf_counter() - started
+                calls, total, longest = self.calls.get(name, (0, 0.0, 0.0))
+                self.calls[name] = (calls + 1, total + duration, max(longest, duration))
+        return wrapper
+
+    def percentile(self, fraction):
+        ## upper bound of the bucket holding the given fraction of heartbeats, in milliseconds
+        wanted = self.beats * fraction
+        count = 0
+        for bucket, beats in enumerate(self.histogram):
+            count += beats
+            if count >= wanted:
+                return BUCKETS[bucket] if bucket < len(BUCKETS) else float('inf')
+        return 0
+
+    def statistics(self):
+        if not self.beats:
+            return 'no heartbeats yet'
+        text = (F'heartbeat late by {self.total / self.beats:.1f} ms on average, at most {self.worst:.0f} ms, '
+            F'99 percent within {self.percentile(0.99)} ms')
+        for name, (calls, total, longest) in sorted(self.calls.items()):
+            text += F'; {name}: {calls} calls, {total / calls * 1000:.2f} ms average, {longest * 1000:.0f} ms longest'
+        return text
+
+    def reset(self):
+        self.__init__(self.interval)
@@ -65,3 +65,14 @@ def com_path():
 #		log.debug("%s path does not exist, creating..." % (path,))
 		os.mkdir(path)
 	return path
+
+def recordings_path():
+	global mode, directory
+	if mode == "portable":
+		if directory != None: path = os.path.join(directory, "recordings")
+		elif directory == None: path = os.path.join(app_path(), "recordings")
+	elif mode == "installed":
+		path = os.path.join(data_path(), "recordings")
+	if not os.path.exists(path):
+		os.mkdir(path)
+	return path
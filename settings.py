@@ -9,7 +9,6 @@ import config
 import application
 from dialogs import configuration
 # from wxUI import commonMessageDialogs
-from pubsub import pub
 import logging
 import config_utils
 log = logging.getLogger("Settings")
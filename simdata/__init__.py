@@ -0,0 +1,10 @@
+# -*- coding: utf-8 -*-
+# helpers for reading and decoding simulator data from FSUIPC.
+from .decoder import *
+from .schema import *
+from .groups import *
+from .provider import *
+from .supervisor import *
+from .writer import *
+from .recorder import *
+from .capabilities import *
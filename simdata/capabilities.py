@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+## Capabilities of the loaded aircraft: number and type of engines and whether it has an APU.
+## The offsets of engines and systems the aircraft doesn't have are left out of the prepared offset sets.
+## Profiles are cached per aircraft title, so an aircraft flown before starts with its own read set, including
+## an APU only seen running in an earlier session.
+import json
+import logging
+import re
+from .schema import Field, Schema, RATE_SLOW
+
+__all__ = ['CAPABILITIES', 'AircraftProfile', 'ProfileCache', 'aircraft_title', 'probe_aircraft']
+
+log = logging.getLogger("tfm")
+
+# offsets read to find out what the aircraft has
+CAPABILITIES = Schema([
+    Field('AircraftTitle', 0x3d00, -256, rate=RATE_SLOW), # title of the aircraft, as in aircraft.cfg
+    Field('EngineCount', 0x0aec, 'h', rate=RATE_SLOW), # number of engines
+    Field('EngineType', 0x0609, 'b', rate=RATE_SLOW), # engine type: 0 piston, 1 jet, 2 sailplane, 3 helo (turbine), 4 rocket, 5 turboprop
+    Field('APUPercentage', 0x0b54, 'F', rate=RATE_SLOW), # APU rpm percentage
+    Field('APUVoltage', 0x0b5c, 'F', rate=RATE_SLOW), # apu generator voltage
+])
+
+# engine types
+PISTON = 0
+JET = 1
+SAILPLANE = 2
+HELICOPTER = 3
+ROCKET = 4
+TURBOPROP = 5
+TURBINES = (JET, HELICOPTER, TURBOPROP)
+
+# per engine fields are named Eng<number><field>
+ENGINE_FIELD = re.compile(r'Eng(\d+)(\w+)$')
+# per engine fields only turbines have
+TURBINE_FIELDS = ('ITT',)
+
+class AircraftProfile(object):
+    ## engines: number of engines. engine_type: one of the engine types above. apu: whether it has an APU.
+    ## probed: whether the simulator reported the engines, rather than the profile being cached or assumed.
+    ## The default profile has everything, for when the aircraft can't be identified.
+    def __init__(self, title=None, engines=4, engine_type=JET, apu=True, probed=False):
+        self.title = title
+        self.engines = engines
+        self.engine_type = engine_type
+        self.apu = apu
+        self.probed = probed
+
+    def excluded(self, schema):
+        ## names of the fields of schema, and their named bits, the aircraft doesn't have.
+        excluded = set()
+        for field in schema:
+            match = ENGINE_FIELD.match(field.name)
+            if match:
+                number, name = int(match.group(1)), match.group(2)
+                if number > self.engines or (name in TURBINE_FIELDS and self.engine_type not in TURBINES):
+                    excluded.add(field.name)
+            elif field.name.startswith('APU') and not self.apu:
+                excluded.add(field.name)
+            if field.name in excluded:
+                excluded.update(field.bits)
+        return excluded
+
+    def to_dict(self):
+        return {'engines': self.engines, 'engine_type': self.engine_type, 'apu': self.apu}
+
+    def __repr__(self):
+        return F'AircraftProfile({self.title!r}, engines={self.engines}, engine_type={self.engine_type}, apu={self.apu})'
+
+def aircraft_title(record):
+    ## title of the aircraft from a record decoded with the CAPABILITIES schema, or None.
+    title = record['AircraftTitle']
+    if isinstance(title, bytes):
+        title = title.split(b'\0', 1)[0].decode('UTF-8', 'replace')
+    return title.strip() or None
+
+def probe_aircraft(record, max_engines=4):
+    ## profile of the aircraft from a record decoded with the CAPABILITIES schema,
+    ## or None if the simulator doesn't report a usable engine count.
+    engines = record['EngineCount']
+    engine_type = record['EngineType']
+    if engine_type == SAILPLANE:
+        engines = 0
+    elif not 0 < engines <= max_engines:
+        return None
+    # there is no offset telling whether an aircraft has an APU. Multi engine jets are taken to have one,
+    # as is anything with the APU running.
+    apu = (engine_type == JET and engines > 1) or record['APUPercentage'] > 0 or record['APUVoltage'] > 0
+    return AircraftProfile(aircraft_title(record), engines, engine_type, apu, probed=True)
+
+class ProfileCache(object):
+    ## aircraft profiles by title, kept in a JSON file.
+    def __init__(self, path):
+        self.path = path
+        self.profiles = {}
+        # titles already logged as not reporting their engines
+        self.unusable = set()
+        try:
+            with open(path, 'r', encoding='UTF-8') as file:
+                self.profiles = json.load(file)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError):
+            log.exception(F'error reading aircraft profiles from {path}')
+
+    def get(self, title):
+        cached = self.profiles.get(title)
+        if cached is None:
+            return None
+        return AircraftProfile(title, cached['engines'], cached['engine_type'], cached['apu'])
+
+    def put(self, profile):
+        if profile.title is None or self.profiles.get(profile.title) == profile.to_dict():
+            return
+        self.profiles[profile.title] = profile.to_dict()
+        try:
+            with open(self.path, 'w', encoding='UTF-8') as file:
+                json.dump(self.profiles, file, indent=1, sort_keys=True)
+        except OSError:
+            log.exception(F'error saving aircraft profiles to {self.path}')
+
+    def lookup(self, title, probed, max_engines=4):
+        ## the profile to use for an aircraft. probed: the profile from probe_aircraft, or None.
+        ## A usable probe wins and is remembered, plus an APU seen running in an earlier session. Without one,
+        ## the profile remembered for the title is used, or everything is read.
+        cached = self.get(title) if title is not None else None
+        if probed is not None:
+            probed.apu = probed.apu or (cached is not None and cached.apu)
+            self.put(probed)
+            return probed
+        if title not in self.unusable:
+            self.unusable.add(title)
+            log.debug(F'{title}: engine count not usable, {"using the cached profile" if cached else "reading everything"}')
+        if cached is not None:
+            return cached
+        return AircraftProfile(title, max_engines)
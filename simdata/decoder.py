@@ -0,0 +1,269 @@
+# -*- coding: utf-8 -*-
+## Decoding of raw FSUIPC offset values, driven by an offset schema (see schema.py).
+## The raw value of each field is multiplied by its scale, its bias is added, and the result is stored
+## according to its kind. Bitfield offsets can have named bits, each stored as its own 0/1 field.
+import time
+import operator
+import numpy as np
+
+__all__ = ['FLOAT', 'INT', 'BOOL', 'FREQ', 'SQUAWK', 'CLOCK', 'DURATION', 'TEXT',
+    'InstrumentRecord', 'InstrumentDecoder', 'seconds_to_text']
+
+# kinds of decoded values
+FLOAT = 'float' # scaled floating point value
+INT = 'int' # scaled value rounded to the nearest whole number
+BOOL = 'bool' # flag
+FREQ = 'freq' # com frequency in BCD format, 0x2345 = 123.45
+SQUAWK = 'squawk' # transponder code in BCD format, 0x1200 = 1200
+CLOCK = 'clock' # time of day in seconds, read as HH:MM
+DURATION = 'duration' # number of seconds, read as text
+TEXT = 'text' # string or raw bytes, stored as read
+
+# kinds that are stored in the numeric value array.
+NUMERIC_KINDS = (FLOAT, INT, BOOL, FREQ, SQUAWK, CLOCK, DURATION)
+# conversion back to python types when a value is read from a record.
+CONVERTERS = {FLOAT: float, INT: int, BOOL: bool, FREQ: float, SQUAWK: int, CLOCK: int, DURATION: int}
+
+# lookup table for a single BCD encoded byte: 0x45 -> 45
+BCD = (np.arange(256) >> 4) * 10 + (np.arange(256) & 0x0f)
+
+def bcd_decode(bcd):
+    ## decode two BCD bytes as a four digit number: 0x1200 -> 1200. bcd can be an integer array.
+    return BCD[bcd >> 8 & 0xff] * 100 + BCD[bcd & 0xff]
+
+# lookup table for the bits of a byte: BITS[byte, bit number]
+BITS = np.array([[byte >> bit & 1 for bit in range(8)] for byte in range(256)], dtype=np.float64)
+
+def seconds_to_text(secs):
+    ## convert number of seconds into human readable format. Thanks to Stack Overflow for this!
+    days = secs//86400
+    hours = (secs - days*86400)//3600
+    minutes = (secs - days*86400 - hours*3600)//60
+    seconds = secs - days*86400 - hours*3600 - minutes*60
+    result = ("{0} day{1}, ".format(days, "s" if days!=1 else "") if days else "") + \
+    ("{0} hour{1}, ".format(hours, "s" if hours!=1 else "") if hours else "") + \
+    ("{0} minute{1}, ".format(minutes, "s" if minutes!=1 else "") if minutes else "") + \
+    ("{0} second{1}, ".format(seconds, "s" if seconds!=1 else "") if seconds else "")
+    return result
+
+def clock_to_text(secs):
+    return time.strftime('%H:%M', time.localtime(secs))
+
+# kinds that are only formatted when they are read
+FORMATTERS = {CLOCK: clock_to_text, DURATION: seconds_to_text}
+
+def picker(positions):
+    ## returns a function that picks the given positions out of a tuple, always returning a tuple.
+    if len(positions) == 1:
+        position = positions[0]
+        return lambda raw: (raw[position],)
+    return operator.itemgetter(*positions)
+
+class InstrumentRecord(object):
+    ## Compact, preallocated storage for decoded instrument values.
+    ## Numeric fields live in a single float array. Everything else (strings, raw bytes) lives in a dict.
+    ## Values can be read and written by name like a dictionary.
+    ## Derived values are calculated from other fields the first time they are read,
+    ## and recalculated only when those fields change.
+    ## stale is set while the simulator can't be read: the values are the last ones read before the connection was lost.
+    ## A second buffer holds the values at the last commit(). changes() compares the two in one array operation,
+    ## and old gives access to the committed values by name.
+    def __init__(self, schema):
+        self.stale = False
+        self.index = {}
+        self.derived = {}
+        self.memo = {}
+        converters = []
+        for field in schema:
+            if field.kind in NUMERIC_KINDS:
+                self.index[field.name] = len(converters)
+                converters.append(CONVERTERS[field.kind])
+            # times are stored as seconds and formatted on demand
+            if field.kind in FORMATTERS:
+                self.derive(field.name, (field.name,), FORMATTERS[field.kind])
+            for name in field.bits:
+                self.index[name] = len(converters)
+                converters.append(int)
+        self.converters = tuple(converters)
+        self.values = np.zeros(len(converters))
+        self.other = {}
+        self.names = np.empty(len(converters), dtype=object)
+        for name, i in self.index.items():
+            self.names[i] = name
+        self.previous = np.zeros(len(converters))
+        self.previous_other = {}
+        self.old = PreviousValues(self)
+
+    def changes(self):
+        ## set of the names of the fields (and named bits) that changed since the last commit.
+        changed = set(self.names[self.values != self.previous])
+        for name, value in self.other.items():
+            if self.previous_other.get(name) != value:
+                changed.add(name)
+        return changed
+
+    def commit(self):
+        ## take the current values as the ones the next changes() compares against.
+        self.previous[:] = self.values
+        self.previous_other.update(self.other)
+
+    def derive(self, name, sources, function):
+        ## register a value calculated by calling function with the values of the source fields.
+        self.derived[name] = (tuple(sources), function)
+        self.memo.pop(name, None)
+
+    def value(self, name):
+        ## the stored value of a field, without applying any derived calculation.
+        i = self.index.get(name)
+        if i is None:
+            return self.other[name]
+        return self.converters[i](self.values[i])
+
+    def __getitem__(self, name):
+        derived = self.derived.get(name)
+        if derived is None:
+            return self.value(name)
+        sources, function = derived
+        inputs = tuple(self.value(source) for source in sources)
+        memo = self.memo.get(name)
+        if memo is None or memo[0] != inputs:
+            memo = (inputs, function(*inputs))
+            self.memo[name] = memo
+        return memo[1]
+
+    def __setitem__(self, name, value):
+        i = self.index.get(name)
+        if i is None:
+            self.other[name] = value
+        else:
+            self.values[i] = value
+
+    def __contains__(self, name):
+        return name in self.index or name in self.other or name in self.derived
+
+    def get(self, name, default=None):
+        try:
+            return self[name]
+        except KeyError:
+            return default
+
+    def keys(self):
+        return list(self.index.keys()) + list(self.other.keys()) + [name for name in self.derived if name not in self.index]
+
+    def copy(self):
+        record = object.__new__(InstrumentRecord)
+        record.index = self.index
+        record.derived = self.derived
+        record.memo = dict(self.memo)
+        record.converters = self.converters
+        record.values = self.values.copy()
+        record.other = dict(self.other)
+        record.stale = self.stale
+        record.names = self.names
+        record.previous = self.previous.copy()
+        record.previous_other = dict(self.previous_other)
+        record.old = PreviousValues(record)
+        return record
+
+    def __deepcopy__(self, memo):
+        return self.copy()
+
+class PreviousValues(object):
+    ## the committed values of a record, read and written by name.
+    def __init__(self, record):
+        self.record = record
+
+    def __getitem__(self, name):
+        record = self.record
+        i = record.index.get(name)
+        if i is None:
+            return record.previous_other[name]
+        return record.converters[i](record.previous[i])
+
+    def __setitem__(self, name, value):
+        record = self.record
+        i = record.index.get(name)
+        if i is None:
+            record.previous_other[name] = value
+        else:
+            record.previous[i] = value
+
+class InstrumentDecoder(object):
+    ## Decodes the tuple returned by pyuipc.read into an InstrumentRecord.
+    ## The decode function is generated once from the schema: linear conversions are applied to all
+    ## numeric fields in a few array operations, and only the steps this set of fields needs are emitted.
+    ## names selects the fields to decode, in the order they are read. Default: the whole schema.
+    def __init__(self, schema, names=None, record=None):
+        if names is None:
+            names = [field.name for field in schema]
+        if record is None:
+            record = InstrumentRecord(schema)
+        self.record = record
+        positions = []
+        buffered = {}
+        slots = []
+        scale = []
+        bias = []
+        kinds = []
+        other = []
+        for position, name in enumerate(names):
+            field = schema[name]
+            if field.kind in NUMERIC_KINDS:
+                buffered[name] = len(positions)
+                positions.append(position)
+                slots.append(record.index[name])
+                scale.append(field.scale)
+                bias.append(field.bias)
+                kinds.append(field.kind)
+            else:
+                other.append((position, name))
+        # named bits: the buffer position of the byte they come from, their bit number and their slot in the record
+        parents = []
+        numbers = []
+        bit_slots = []
+        for name in buffered:
+            for bit, number in schema[name].bits.items():
+                parents.append(buffered[name])
+                numbers.append(number)
+                bit_slots.append(record.index[bit])
+        kinds = np.array(kinds, dtype=object)
+        namespace = {'np': np, 'bcd_decode': bcd_decode, 'BITS': BITS,
+            'pick': picker(positions) if positions else lambda raw: (),
+            'buffer': np.zeros(len(positions)),
+            'values': record.values,
+            'other': record.other,
+            'record': record,
+            'slots': np.array(slots, dtype=np.intp),
+            'scale': np.array(scale, dtype=np.float64),
+            'bias': np.array(bias, dtype=np.float64),
+            'rounded': np.flatnonzero(kinds == INT),
+            'freqs': np.flatnonzero(kinds == FREQ),
+            'squawks': np.flatnonzero(kinds == SQUAWK),
+            'bit_parents': np.array(parents, dtype=np.intp),
+            'bit_numbers': np.array(numbers, dtype=np.intp),
+            'bit_slots': np.array(bit_slots, dtype=np.intp),
+        }
+        lines = ['def decode(raw):']
+        if positions:
+            lines.append('    buffer[:] = pick(raw)')
+        # BCD fields go through the lookup table, one byte at a time. Frequencies leave out the leading 1: 0x2345 = 123.45
+        if len(namespace['freqs']):
+            lines.append('    buffer[freqs] = 100 + bcd_decode(buffer[freqs].astype(np.int64)) / 100')
+        if len(namespace['squawks']):
+            lines.append('    buffer[squawks] = bcd_decode(buffer[squawks].astype(np.int64))')
+        if any(value != 1 for value in scale):
+            lines.append('    buffer[:] *= scale')
+        if any(value != 0 for value in bias):
+            lines.append('    buffer[:] += bias')
+        if len(namespace['rounded']):
+            lines.append('    buffer[rounded] = np.round(buffer[rounded])')
+        if positions:
+            lines.append('    values[slots] = buffer')
+        if bit_slots:
+            lines.append('    values[bit_slots] = BITS[buffer[bit_parents].astype(np.intp) & 0xff, bit_numbers]')
+        for position, name in other:
+            lines.append(F'    other[{name!r}] = raw[{position}]')
+        lines.append('    return record')
+        self.source = '\n'.join(lines) + '\n'
+        exec(compile(self.source, '<decoder>', 'exec'), namespace)
+        self.decode = namespace['decode']
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+## Offsets are read in groups, one per rate class. Each group has its own prepared data set,
+## so fast changing values can be polled often without reading the whole instrument block.
+import time
+from .decoder import InstrumentDecoder, InstrumentRecord
+
+__all__ = ['OffsetGroup', 'group_offsets', 'NEVER']
+
+# read_at of a group not read since it was created or the connection was lost
+NEVER = float('-inf')
+
+class OffsetGroup(object):
+    ## A set of offsets read together at the same rate.
+    def __init__(self, rate, schema, names, record):
+        self.rate = rate
+        self.schema = schema
+        # every field of the group, and the ones actually read (see restrict)
+        self.all_names = list(names)
+        self.record = record
+        self.prepared = None
+        self.restrict(names)
+        # stream of a FlightRecorder the raw values are passed to, if recording
+        self.recorder = None
+        # time of the last read, from time.monotonic() or the clock of the snapshot provider
+        self.read_at = NEVER
+
+    @property
+    def interval(self):
+        return 1.0 / self.rate
+
+    def restrict(self, names):
+        ## read only the given fields of the group, e.g. leaving out engines the aircraft doesn't have.
+        ## The group has to be prepared again before the next read.
+        self.names = [name for name in self.all_names if name in names]
+        self.offsets = {name: self.schema.offsets[name] for name in self.names}
+        self.decoder = InstrumentDecoder(self.schema, self.names, self.record)
+        self.prepared = None
+
+    def prepare(self, fsuipc):
+        self.prepared = fsuipc.prepare_data(list(self.offsets.values())) if self.names else None
+
+    def read(self, fsuipc, now=None):
+        return self.load(fsuipc.read(self.prepared) if self.names else (), now)
+
+    def load(self, raw, now=None):
+        ## decode the raw values of the group, read by read or together with other groups.
+        if self.recorder is not None:
+            self.recorder.record(raw)
+        self.decoder.decode(raw)
+        self.read_at = time.monotonic() if now is None else now
+        return self.record
+
+def group_offsets(schema, record=None):
+    ## split the fields of a schema into groups by rate class, fastest group first.
+    ## all groups decode into the same record.
+    if record is None:
+        record = InstrumentRecord(schema)
+    by_rate = {}
+    for field in schema:
+        by_rate.setdefault(field.rate, []).append(field.name)
+    return [OffsetGroup(rate, schema, by_rate[rate], record) for rate in sorted(by_rate, reverse=True)]
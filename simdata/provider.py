@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+## Shared access to the decoded offset groups.
+## Hotkeys, announcements and scheduled polling all ask the provider for data. Groups read within the freshness
+## window are served from the record instead of being read from FSUIPC again.
+## The groups due at the same time are read in one FSUIPC request. Groups are ordered fastest first and a slower
+## group is only due together with the faster ones, so one data set is prepared for each run of groups starting
+## at the fastest: reading the 1 Hz group also reads the 20 Hz and 5 Hz groups, in the same request.
+import threading
+import time
+from .groups import NEVER
+
+__all__ = ['SnapshotProvider']
+
+class SnapshotProvider(object):
+    def __init__(self, groups, freshness=0.25, clock=time.monotonic):
+        self.groups = groups
+        # time source for the freshness window. Replays substitute simulator time.
+        self.clock = clock
+        self.record = groups[0].record
+        # seconds a read stays fresh
+        self.freshness = freshness
+        # prepared data set reading groups[0] to groups[i], by i. See prepare.
+        self.prepared = []
+        # requests for the same data from the sim thread and the GUI thread are served one at a time,
+        # so the second request finds the data the first one just read. Reentrant, so the groups can be
+        # restricted and prepared again while holding it.
+        self.lock = threading.RLock()
+        # FSUIPC requests, groups read by them, and groups asked for by get() and served from the record
+        # because they were still fresh. Groups a poll doesn't read because they aren't due yet don't count.
+        self.reads = 0
+        self.group_reads = 0
+        self.reads_saved = 0
+
+    def prepare(self, fsuipc):
+        ## prepare the data sets of the groups, after connecting or after restricting a group.
+        with self.lock:
+            offsets = []
+            self.prepared = []
+            for group in self.groups:
+                group.prepare(fsuipc)
+                offsets.extend(group.offsets.values())
+                self.prepared.append(fsuipc.prepare_data(list(offsets)) if offsets else None)
+
+    def get(self, fsuipc, max_age=None):
+        ## returns the record, reading any group older than max_age (default: the freshness window).
+        if max_age is None:
+            max_age = self.freshness
+        with self.lock:
+            now = self.clock()
+            due = self._due(now, [max_age] * len(self.groups))
+            self.reads_saved += len(self.groups) - due - 1
+            self._read(fsuipc, now, due)
+            # every group has been read on the current connection
+            self.record.stale = False
+        return self.record
+
+    def poll(self, fsuipc, scale=1.0):
+        ## scheduled at the rate of the fastest group: read every group whose interval, divided by scale, has passed.
+        ## Intervals are counted from the last read, whoever made it, less half a poll for scheduling jitter.
+        with self.lock:
+            now = self.clock()
+            slack = self.groups[0].interval / 2
+            self._read(fsuipc, now, self._due(now, [group.interval / scale - slack for group in self.groups]))
+        return self.record
+
+    def invalidate(self):
+        ## the connection was lost: keep serving the record, marked stale, and read every group on the next get.
+        with self.lock:
+            self.record.stale = True
+            for group in self.groups:
+                group.read_at = NEVER
+
+    def _due(self, now, max_ages):
+        # index of the slowest group older than its maximum age, or -1
+        due = -1
+        for i, (group, max_age) in enumerate(zip(self.groups, max_ages)):
+            if now - group.read_at > max_age:
+                due = i
+        return due
+
+    def _read(self, fsuipc, now, due):
+        # read groups[0] to groups[due] in one request. Called with the lock held.
+        if due < 0:
+            return
+        prepared = self.prepared[due]
+        if prepared is None:
+            raw = ()
+        else:
+            raw = fsuipc.read(prepared)
+            self.reads += 1
+        start = 0
+        for group in self.groups[:due + 1]:
+            end = start + len(group.names)
+            group.load(raw[start:end], now)
+            start = end
+        self.group_reads += due + 1
+
+    def statistics(self):
+        total = self.group_reads + self.reads_saved
+        percent = (total - self.reads) / total * 100 if total else 0
+        return (F'{self.reads} reads for {self.group_reads} groups, {self.reads_saved} served from cache '
+            F'({percent:.0f} percent saved)')
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+## Flight data recorder: raw offset values as read from FSUIPC, written to a compact binary file.
+## File layout:
+##  - MAGIC, then the length of the header as a 4-byte little endian unsigned int
+##  - the header: JSON with the recorded fields (name, offset, type, scale, bias, unit, kind) and the start time
+##  - fixed size records (RECORD), readable in place with numpy.memmap (see open_recording)
+## Only changes are recorded: a record is written when a field's raw value differs from the last one read
+## for that field, and a value stands until its next record. Numeric values take one record,
+## holding the raw value's bits. Strings and byte blocks are split into 8 byte parts, one record each;
+## the last part has LAST_PART set in its part number.
+import json
+import os
+import struct
+import time
+import numpy as np
+
+__all__ = ['FlightRecorder', 'open_recording', 'RECORD', 'LAST_PART']
+
+MAGIC = b'TFMREC1\n'
+RECORD = np.dtype([('time', '<f8'), ('field', '<u2'), ('part', '<u2'), ('value', 'V8')])
+LAST_PART = 0x8000
+# storage of raw values in the 8 value bytes, by FSUIPC type
+STORAGE = {'b': '<q', 'c': '<q', 'h': '<q', 'H': '<q', 'd': '<q', 'u': '<q', 'l': '<q', 'L': '<Q', 'f': '<d', 'F': '<d'}
+PACKERS = {storage: struct.Struct('<dHH' + storage[1]).pack for storage in set(STORAGE.values())}
+pack_part = struct.Struct('<dHH8s').pack
+
+class RecordingStream(object):
+    ## the fields of one prepared data set, recorded in the order they are read.
+    def __init__(self, recorder, indices, types):
+        self.recorder = recorder
+        self.indices = indices
+        self.packers = [None if isinstance(type, int) else PACKERS[STORAGE[type]] for type in types]
+        self.previous = None
+
+    def record(self, raw):
+        ## called with the tuple returned by pyuipc.read. Unchanged reads cost a single tuple comparison.
+        previous = self.previous
+        if raw == previous:
+            return
+        self.previous = raw
+        now = self.recorder.clock() - self.recorder.started
+        records = self.recorder.buffer
+        for position, value in enumerate(raw):
+            if previous is not None and value == previous[position]:
+                continue
+            field = self.indices[position]
+            packer = self.packers[position]
+            if packer is not None:
+                records.append(packer(now, field, 0, value))
+            else:
+                self.recorder.record_bytes(records, now, field, value)
+        if len(records) >= self.recorder.buffer_size:
+            self.recorder.flush()
+
+class FlightRecorder(object):
+    ## records every field of the given schemas to path. Streams are created per prepared data set.
+    ## clock: time source of the record times, e.g. the simulator time of a replay.
+    def __init__(self, path, schemas, buffer_size=4096, clock=time.monotonic):
+        self.path = path
+        self.clock = clock
+        self.fields = {}
+        header_fields = []
+        for schema in schemas:
+            for field in schema:
+                self.fields[field.name] = len(header_fields)
+                header_fields.append({'name': field.name, 'offset': field.address, 'type': field.type,
+                    'scale': field.scale, 'bias': field.bias, 'unit': field.unit, 'kind': field.kind})
+        self.started = clock()
+        header = json.dumps({'version': 1, 'started': time.time(), 'fields': header_fields}).encode('UTF-8')
+        self.file = open(path, 'wb')
+        self.file.write(MAGIC + struct.pack('<I', len(header)) + header)
+        # packed records waiting to be written
+        self.buffer = []
+        self.buffer_size = buffer_size
+        self.records = 0
+
+    def stream(self, names, types):
+        ## a stream for a data set reading the named fields, with the given FSUIPC types (which may differ
+        ## from the schema when a block is read with a shorter length).
+        return RecordingStream(self, [self.fields[name] for name in names], list(types))
+
+    def record_bytes(self, records, now, field, value):
+        if isinstance(value, str):
+            value = value.encode('UTF-8')
+        parts = max(1, (len(value) + 7) // 8)
+        for part in range(parts):
+            number = part | LAST_PART if part == parts - 1 else part
+            records.append(pack_part(now, field, number, value[part * 8:part * 8 + 8]))
+
+    def flush(self):
+        if self.buffer:
+            self.records += len(self.buffer)
+            self.file.write(b''.join(self.buffer))
+            self.buffer = []
+        self.file.flush()
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+    def statistics(self):
+        return F'{self.records + len(self.buffer)} records, {(self.records + len(self.buffer)) * RECORD.itemsize // 1024} KB'
+
+def open_recording(path):
+    ## returns the header and the records of a recording, memory mapped.
+    with open(path, 'rb') as file:
+        magic = file.read(len(MAGIC))
+        if magic != MAGIC:
+            raise ValueError(F'{path} is not a TFM flight recording')
+        length = struct.unpack('<I', file.read(4))[0]
+        header = json.loads(file.read(length).decode('UTF-8'))
+    offset = len(MAGIC) + 4 + length
+    count = (os.path.getsize(path) - offset) // RECORD.itemsize
+    if count == 0:
+        return header, np.zeros(0, dtype=RECORD)
+    return header, np.memmap(path, dtype=RECORD, mode='r', offset=offset, shape=(count,))
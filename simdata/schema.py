@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+## Offset schema: every FSUIPC offset TFM uses, with its type, scaling, unit and rate class.
+## Decoders, prepared offset groups and the write conversions are all generated from these schemas,
+## so adding an offset only means adding a line here.
+from math import pi
+from .decoder import FLOAT, INT, BOOL, FREQ, SQUAWK, CLOCK, DURATION, TEXT
+
+__all__ = ['RATE_FAST', 'RATE_HIGH', 'RATE_NORMAL', 'RATE_SLOW', 'Field', 'Schema',
+    'INSTRUMENTS', 'SIMCONNECT', 'ATTITUDE', 'SIMSTATE']
+
+# rate classes, in reads per second
+RATE_FAST = 20 # GPWS
+RATE_HIGH = 5 # flight director, heading tones, ILS needles
+RATE_NORMAL = 1 # switches and most instruments
+RATE_SLOW = 0.1 # route and fuel planning values that hardly change
+
+# FSUIPC types:
+#  - b: a 1-byte unsigned value, to be converted into a Python int
+#  - c: a 1-byte signed value, to be converted into a Python int
+#  - h: a 2-byte signed value, to be converted into a Python int
+#  - H: a 2-byte unsigned value, to be converted into a Python int
+#  - d: a 4-byte signed value, to be converted into a Python int
+#  - u: a 4-byte unsigned value, to be converted into a Python long
+#  - l: an 8-byte signed value, to be converted into a Python long
+#  - L: an 8-byte unsigned value, to be converted into a Python long
+#  - f: an 8-byte floating point value, to be converted into a Python double
+#  - F: a 4-byte floating point value, to be converted into a Python double
+#  - a positive number: that many raw bytes. A negative number: a string of at most that many characters.
+FLOAT_TYPES = ('f', 'F')
+
+# BCD encoding of the numbers 0 to 99: 45 -> 0x45
+TO_BCD = [tens << 4 | units for tens in range(10) for units in range(10)]
+
+def bcd_encode(number):
+    ## encode a four digit number as two BCD bytes: 1200 -> 0x1200
+    return TO_BCD[number // 100 % 100] << 8 | TO_BCD[number % 100]
+
+class Field(object):
+    ## One offset. The value read is raw * scale + bias. Writing applies the inverse.
+    ## kind defaults to FLOAT for floating point types, TEXT for strings and byte blocks, and INT otherwise.
+    ## bits names single bits of a bitfield offset: {name: bit number}.
+    def __init__(self, name, address, type, scale=1, bias=0, unit='', kind=None, rate=RATE_NORMAL, bits=None):
+        if kind is None:
+            if isinstance(type, int):
+                kind = TEXT
+            elif type in FLOAT_TYPES:
+                kind = FLOAT
+            else:
+                kind = INT
+        self.name = name
+        self.address = address
+        self.type = type
+        self.scale = scale
+        self.bias = bias
+        self.unit = unit
+        self.kind = kind
+        self.rate = rate
+        self.bits = bits or {}
+
+    def encoder_source(self):
+        ## source of a lambda converting a value in read units to the (offset, type, raw value) tuple pyuipc.write expects.
+        if self.kind == FREQ:
+            raw = 'bcd_encode(int(round(value * 100)) - 10000)'
+        elif self.kind == SQUAWK:
+            raw = 'bcd_encode(int(value))'
+        else:
+            raw = 'value'
+            if self.bias != 0:
+                raw = F'({raw} - {self.bias!r})'
+            if self.scale != 1:
+                raw = F'{raw} / {self.scale!r}'
+            if self.type not in FLOAT_TYPES:
+                raw = F'int(round({raw}))'
+        return F'lambda value: ({self.address!r}, {self.type!r}, {raw})'
+
+class Schema(object):
+    ## An ordered set of fields, with the encoders for writing them generated once.
+    def __init__(self, fields):
+        self.fields = {field.name: field for field in fields}
+        self.offsets = {field.name: (field.address, field.type) for field in fields}
+        self.bits = {field.name: field.bits for field in fields if field.bits}
+        lines = ['encoders = {']
+        for field in fields:
+            if field.kind != TEXT:
+                lines.append(F'    {field.name!r}: {field.encoder_source()},')
+        lines.append('}')
+        namespace = {'bcd_encode': bcd_encode}
+        exec(compile('\n'.join(lines) + '\n', '<encoders>', 'exec'), namespace)
+        self.encoders = namespace['encoders']
+
+    def __iter__(self):
+        return iter(self.fields.values())
+
+    def __getitem__(self, name):
+        return self.fields[name]
+
+    def __contains__(self, name):
+        return name in self.fields
+
+    def encode(self, name, value):
+        ## returns the (offset, type, raw value) tuple to write value, given in read units, to the named offset.
+        return self.encoders[name](value)
+
+# main offsets for reading instrumentation.
+INSTRUMENTS = Schema([
+    Field('Com1Freq', 0x034E, 'H', unit='MHz', kind=FREQ), # com1freq
+    Field('Com2Freq', 0x3118, 'H', unit='MHz', kind=FREQ), # com2freq
+    Field('RadioActive', 0x3122, 'b'), # radioActive
+    Field('Lat', 0x0560, 'l', scale=90.0/(10001750.0 * 65536.0 * 65536.0), unit='degrees', kind=FLOAT, rate=RATE_SLOW), # ac Latitude
+    Field('Long', 0x0568, 'l', scale=360.0/(65536.0 * 65536.0 * 65536.0 * 65536.0), unit='degrees', kind=FLOAT, rate=RATE_SLOW), # ac Longitude
+    Field('Flaps', 0x30f0, 'h', scale=1/256, unit='degrees', kind=FLOAT, rate=RATE_HIGH), # flaps angle
+    Field('OnGround', 0x0366, 'h', kind=BOOL), # on ground flag: 0 = airborne
+    Field('ParkingBrake', 0x0bc8, 'h', kind=BOOL), # parking Brake: 0 off, 32767 on
+    Field('Gear', 0x0be8, 'u'), # Gear control: 0=Up, 16383=Down
+    Field('Altitude', 0x3324, 'd', unit='feet', kind=INT), # altitude in feet or meters
+    Field('GroundAltitude', 0x0020, 'u', scale=3.28084/256, unit='feet', kind=FLOAT), # ground altitude x 256
+    Field('SpoilersArm', 0x0bcc, 'u'), # spoilers armed: 0 - off, 1 - armed
+    Field('Spoilers', 0x0bd0, 'u'), # Spoilers control, 0 off, 4800 arm, then 5620 (7%) to 16383 (100% fully deployed).
+    Field('AvionicsMaster', 0x2e80, 'u'), # Avionics master switch
+    Field('ApMaster', 0x07bc, 'u'), # AP master switch
+    Field('ApNavLock', 0x07c4, 'u'), # AP Nav1 lock
+    Field('ApHeadingLock', 0x07c8, 'u'), # AP heading lock
+    Field('ApHeading', 0x07cc, 'H', scale=360/65536, unit='degrees', kind=INT, rate=RATE_HIGH), # Autopilot heading value, as degrees*65536/360
+    Field('ApAltitudeLock', 0x07d0, 'u'), # AP Altitude lock
+    Field('ApAltitude', 0x07d4, 'u', scale=3.28084/65536, unit='feet', kind=FLOAT, rate=RATE_HIGH), # Autopilot altitude value, as metres*65536
+    Field('ApSpeedHold', 0x07dc, 'u'), # AP airspeed hold
+    Field('ApMachHold', 0x07e4, 'u'), # autopilot mach hold
+    Field('ApAirspeed', 0x07e2, 'h', rate=RATE_HIGH), # AP airspeed in knots
+    Field('ApMach', 0x07e8, 'u', scale=1/65536, unit='mach', kind=FLOAT, rate=RATE_HIGH), # Autopilot mach value, as Mach*65536
+    Field('ApVerticalSpeedHold', 0x07ec, 'u'), # autopilot vertical speed hold
+    Field('ApVerticalSpeed', 0x07f2, 'h', rate=RATE_HIGH), # autopilot vertical speed
+    Field('ApNavGPS', 0x132c, 'u'), # nav gps switch: 0 - nav, 1 - GPS
+    Field('ApApproachHold', 0x0800, 'u'), # autopilot approach hold
+    Field('ApFlightDirector', 0x2ee0, 'u'), # Flight director: 0 - off, 1 - on
+    Field('ApFlightDirectorPitch', 0x2ee8, 'f', rate=RATE_HIGH), # flight director pitch
+    Field('ApFlightDirectorBank', 0x2ef0, 'f', rate=RATE_HIGH), # flight director bank value in degrees. Right negative, left positive
+    Field('ApAttitudeHold', 0x07d8, 'u'), # auto-pilot attitude hold switch
+    Field('ApWingLeveler', 0x07c0, 'u'), # auto-pilot wing leveler switch
+    Field('PropSync', 0x243c, 'u'), # propeller sync
+    Field('ApAutoRudder', 0x0278, 'h'), # auto-rudder switch
+    Field('BatteryMaster', 0x281c, 'u'), # battery master swtich
+    Field('Heading', 0x0580, 'u', scale=360/(65536 * 65536), unit='degrees', kind=FLOAT, rate=RATE_HIGH), # Heading, *360/(65536*65536) for degrees TRUE.[Can be set in slew or pause states]
+    Field('MagneticVariation', 0x02a0, 'h', rate=RATE_SLOW), # Magnetic variation (signed, –ve = West). For degrees *360/65536. Convert True headings to Magnetic by subtracting this value, Magnetic headings to True by adding this value.
+    Field('Transponder', 0x0354, 'H', kind=SQUAWK), # transponder in BCD format
+    Field('CompassHeading', 0x2b00, 'f', rate=RATE_HIGH), # Gyro compass heading (magnetic), including any drift. 
+    Field('NextWPDistance', 0x6048, 'f'), # distance to next waypoint
+    Field('NextWPId', 0x60a4, -6), # next waypoint string
+    Field('NextWPETE', 0x60e4, 'u'), # time enroute to next waypoint in seconds
+    Field('AutoBrake', 0x2f80, 'b'), # Panel autobrake switch: 0=RTO, 1=Off, 2=brake1, 3=brake2, 4=brake3, 5=max
+    Field('AirspeedTrue', 0x02b8, 'u', scale=1/128, unit='knots', kind=INT), # TAS: True Air Speed, as knots * 128
+    Field('AirspeedIndicated', 0x02bc, 'u', scale=1/128, unit='knots', kind=INT), # IAS: Indicated Air Speed, as knots * 128
+    Field('GroundSpeed', 0x02b4, 'u', scale=3600/(65536 * 1852), unit='knots', kind=INT), # GS: Ground Speed, as 65536*metres/sec. Not updated in Slew mode!
+    Field('ApYawDamper', 0x0808, 'u'), # Yaw damper
+    Field('Toga', 0x080c, 'u'), # autothrottle TOGA
+    Field('AutoThrottleArm', 0x0810, 'u'), # Auto throttle arm
+    Field('AutoFeather', 0x2438, 'u'), # Auto Feather switch
+    Field('AirspeedMach', 0x11c6, 'h', scale=1/20480, unit='mach', kind=FLOAT), # Mach speed *20480
+    Field('NextWPETA', 0x60e8, 'u', kind=CLOCK), # next waypoint ETA in seconds (localtime)
+    Field('NextWPBaring', 0x6050, 'f', scale=180/pi, unit='degrees', kind=FLOAT), # magnetic baring to next waypoint in radions
+    Field('DestAirportId', 0x6137, -5, rate=RATE_SLOW), # destination airport ID string
+    Field('DestETE', 0x6198, 'u', kind=DURATION, rate=RATE_SLOW), # time enroute to destination in seconds
+    Field('DestETA', 0x619c, 'u', kind=CLOCK, rate=RATE_SLOW), # Destination ETA in seconds (localtime)
+    Field('RouteDistance', 0x61a0, 'f', rate=RATE_SLOW), # route total distance in meters
+    Field('FuelBurn', 0x61a8, 'f', rate=RATE_SLOW), # estimated fuel burn in gallons
+    Field('FuelQuantity', 0x126c, 'u', rate=RATE_SLOW), # Fuel: total quantity weight in pounds (32-bit integer)
+    Field('ElevatorTrim', 0x2ea0, 'f', scale=180/pi, unit='degrees', kind=FLOAT, rate=RATE_HIGH), # elevator trim deflection in radions
+    Field('VerticalSpeed', 0x0842, 'h', scale=-3.28084, unit='feet per minute', kind=INT, rate=RATE_FAST), # 2 byte Vertical speed in metres per minute, but with –ve for UP, +ve for DOWN. Multiply by 3.28084 and reverse the sign for the normal fpm measure.
+    Field('AirTemp', 0x0e8c, 'h', scale=1/256, unit='degrees C', kind=INT, rate=RATE_SLOW), # Outside air temp Outside Air Temperature (OAT), degrees C * 256 (“Ambient Temperature
+    Field('Nav1GS', 0x0c4c, 'b'), # nav 1 GS alive flag
+    Field('Nav1Flags', 0x0c4d, 'b', bits={'Nav1Type': 7, 'Nav1GSAvailable': 1}), # nav 1 code flags
+    Field('Nav1Signal', 0x0c52, 'u'), # Nav 1 signal strength
+    Field('Nav1LocNeedle', 0x0c48, 'c', rate=RATE_HIGH), # nav 1 localiser needle: -127 left to 127 right
+    Field('Nav1GSNeedle', 0x0c49, 'c', rate=RATE_HIGH), # Nav1 glideslope needle: -119 up to 119 down
+    Field('Altimeter', 0x0330, 'H', scale=1/16, unit='hPa', kind=FLOAT), # Altimeter pressure setting (“Kollsman” window). As millibars (hectoPascals) * 16
+    Field('Doors', 0x3367, 'b', bits={'Door1': 0, 'Door2': 1, 'Door3': 2, 'Door4': 3}), # byte indicating open exits. One bit per door.
+    Field('APUGenerator', 0x0b51, 'b'), # apu generator switch
+    Field('APUGeneratorActive', 0x0b52, 'b'), # apu generator active flag
+    Field('APUPercentage', 0x0b54, 'F', unit='percent', kind=INT), # APU rpm percentage
+    Field('APUVoltage', 0x0b5c, 'F'), # apu generator voltage
+    Field('Eng1Starter', 0x3b00, 'u'), # engine 1 starter
+    Field('Eng2Starter', 0x3a40, 'u'), # engine 2 starter
+    Field('Eng3Starter', 0x3980, 'u'), # engine 3 starter
+    Field('Eng4Starter', 0x38c0, 'u'), # engine 4 starter
+    Field('Eng1FuelFlow', 0x2060, 'f'), # Engine 1 fuel flow in pounds per hour
+    Field('Eng2FuelFlow', 0x2160, 'f'), # Engine 2 fuel flow in pounds per hour
+    Field('Eng3FuelFlow', 0x2260, 'f'), # Engine 3 fuel flow in pounds per hour
+    Field('Eng4FuelFlow', 0x2360, 'f'), # Engine 1 fuel flow in pounds per hour
+    Field('Eng1N1', 0x2010, 'f'), # Engine 1 n1 value
+    Field('Eng4Generator', 0x393c, 'u'), # Engine 4 generator
+    Field('Eng3Generator', 0x39fc, 'u'), # Engine 3 generator
+    Field('Eng2Generator', 0x3abc, 'u'), # Engine 2 Generator
+    Field('Eng1Generator', 0x3b7c, 'u'), # Engine 1 generator
+    Field('Eng1N2', 0x2018, 'f'), # Engine 1 N2 value
+    Field('Eng2N1', 0x2110, 'f'), # Engine 2 N1 value
+    Field('Eng2N2', 0x2118, 'f'), # Engine 2 N2 value
+    Field('Eng3N1', 0x2210, 'f'), # Engine 3 N1 value
+    Field('Eng3N2', 0x2218, 'f'), # Engine 3 N2 value
+    Field('Eng4N1', 0x2310, 'f'), # Engine 4 N1 value
+    Field('Eng4N2', 0x2318, 'f'), # Engine 4 N2 value
+    Field('Eng1Combustion', 0x0894, 'H'), # Engine 1 ignition flag
+    Field('Eng2Combustion', 0x092c, 'H'), # Engine 2 ignition flag
+    Field('Eng3Combustion', 0x09c4, 'H'), # Engine 3 ignition flag
+    Field('Eng4Combustion', 0x0a5c, 'H'), # Engine 4 ignition flag
+    Field('Eng1ITT', 0x08f0, 'u', scale=1/16384, unit='degrees C', kind=INT), # Engine 1 Turbine temperature: degree C *16384 (Helos?) (Turbine engine ITT)
+    Field('Eng2ITT', 0x0988, 'u', scale=1/16384, unit='degrees C', kind=INT), # Engine 2 Turbine temperature: degree C *16384 (Helos?) (Turbine engine ITT)
+    Field('Eng3ITT', 0x0a20, 'u', scale=1/16384, unit='degrees C', kind=INT), # Engine 3 Turbine temperature: degree C *16384 (Helos?) (Turbine engine ITT)
+    Field('Eng4ITT', 0x0ab8, 'u', scale=1/16384, unit='degrees C', kind=INT), # Engine 4 Turbine temperature: degree C *16384 (Helos?) (Turbine engine ITT)
+    Field('PitotHeat', 0x029c, 'b'), # pitot heat switch
+    Field('Lights1', 0x0d0c, 'b', bits={'WingLights': 7, 'RecognitionLights': 6, 'InstrumentLights': 5, 'StrobeLights': 4, 'TaxiLights': 3, 'LandingLights': 2, 'BeaconLights': 1, 'NavigationLights': 0}), # lights
+    Field('Lights', 0x0d0d, 'b', bits={'CabinLights': 7, 'LogoLights': 6}), # lights
+    Field('WindSpeed', 0x0e90, 'H', rate=RATE_SLOW), # Ambient wind speed in knots
+    Field('WindDirection', 0x0e92, 'H', scale=360/65536, unit='degrees', kind=FLOAT, rate=RATE_SLOW), # Ambient wind direction (at aircraft), *360/65536 to get degrees True.
+    Field('WindGust', 0x0e94, 'H', rate=RATE_SLOW), # At aircraft altitude: wind gusting value: max speed in knots, or 0 if no gusts
+    Field('RadioAltimeter', 0x31e4, 'u', scale=3.28084/65536, unit='feet', kind=FLOAT, rate=RATE_FAST), # Radio altitude in metres * 65536
+])
+
+# Offsets for SimConnect messages.
+SIMCONNECT = Schema([
+    Field('SimCChanged', 0xb000, 'u'), # changed indicator (4 bytes)
+    Field('SimCType', 0xb004, 'u'), # type value (4 bytes)
+    Field('SimCDuration', 0xb008, 'u'), # display duration in secs (4 bytes)
+    Field('SimCEvent', 0xb00c, 'u'), # SimConnect event ID (4 bytes)
+    Field('SimCLength', 0xb010, 'u'), # length of data received (4 bytes)
+    Field('SimCData', 0xb014, 2028), # text data (<= 2028 bytes)
+])
+
+# simulator state, read at a low rate even while the simulator is paused
+SIMSTATE = Schema([
+    Field('Paused', 0x0264, 'h', kind=BOOL), # pause indicator: 1 when paused
+    Field('SlewMode', 0x05dc, 'h', kind=BOOL), # slew mode indicator: 1 when slewing
+    Field('SimRate', 0x0c1a, 'h', scale=1/256, unit='times', kind=FLOAT), # simulation rate *256
+])
+
+# attitude indication offsets, since we need fast access to these
+ATTITUDE = Schema([
+    Field('Pitch', 0x0578, 'd', scale=360/(65536 * 65536), unit='degrees', kind=FLOAT, rate=RATE_FAST), # Pitch, *360/(65536*65536) for degrees. 0=level, –ve=pitch up, +ve=pitch down[Can be set in slew or pause states]
+    Field('Bank', 0x057c, 'd', scale=360/(65536 * 65536), unit='degrees', kind=FLOAT, rate=RATE_FAST), # Bank, *360/(65536*65536) for degrees. 0=level, –ve=bank right, +ve=bank left[Can be set in slew or pause states]
+])
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+## Supervision of the FSUIPC connection.
+## The connection is opened and reopened from the sim thread without blocking it: poll() is scheduled on the clock,
+## and each call makes at most one attempt. Failed attempts are retried with exponential backoff.
+## After the connection is opened, the registered connect callbacks prepare their data sets again,
+## since prepared data doesn't survive a new connection. They run with the connection already marked open,
+## so they can read through it.
+## A read can fail on any thread, e.g. a hotkey on the GUI thread, so the disconnect callbacks run on the next
+## poll(), on the sim thread, before any attempt to reconnect.
+import logging
+import threading
+import time
+
+__all__ = ['ConnectionSupervisor']
+
+log = logging.getLogger("tfm")
+
+# FSUIPC version, read to check the connection is still alive when nothing else has been read for a while.
+PROBE_OFFSET = (0x3304, 'u')
+
+class ConnectionSupervisor(object):
+    def __init__(self, fsuipc, min_delay=1.0, max_delay=30.0, probe_interval=5.0):
+        self.fsuipc = fsuipc
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.probe_interval = probe_interval
+        self.connected = False
+        self.connection = None
+        self.probe_data = None
+        # seconds to wait after the next failed attempt
+        self.delay = min_delay
+        # times from time.monotonic()
+        self.next_attempt = 0.0
+        self.last_ok = 0.0
+        self.attempts = 0
+        self.disconnects = 0
+        self.connect_callbacks = []
+        self.disconnect_callbacks = []
+        # set by lost(): the disconnect callbacks are due on the next poll
+        self.disconnect_pending = False
+        # reads fail on the GUI thread as well as the sim thread
+        self.lock = threading.RLock()
+
+    def on_connect(self, callback):
+        ## callback(fsuipc) runs on every successful open, before anything else is read.
+        self.connect_callbacks.append(callback)
+
+    def on_disconnect(self, callback):
+        ## callback() runs on the first poll after a connection is lost.
+        self.disconnect_callbacks.append(callback)
+
+    def poll(self, dt=0):
+        ## scheduled regularly: connect when the next attempt is due, or probe an idle connection.
+        with self.lock:
+            pending = self.disconnect_pending
+            self.disconnect_pending = False
+        if pending:
+            for callback in self.disconnect_callbacks:
+                callback()
+        now = time.monotonic()
+        if self.connected:
+            if now - self.last_ok > self.probe_interval:
+                self.probe()
+        elif now >= self.next_attempt:
+            self.connect()
+        return self.connected
+
+    def connect(self):
+        with self.lock:
+            if self.connected:
+                return True
+            self.attempts += 1
+            try:
+                log.debug("opening FSUIPC connection")
+                self.connection = self.fsuipc.open(0)
+                self.probe_data = self.fsuipc.prepare_data([PROBE_OFFSET])
+                self.connected = True
+                for callback in self.connect_callbacks:
+                    callback(self.fsuipc)
+            except Exception as e:
+                log.error(F'error initializing fsuipc: {e}. Retrying in {self.delay:.0f} seconds.')
+                self.connected = False
+                self.close()
+                self.next_attempt = time.monotonic() + self.delay
+                self.delay = min(self.delay * 2, self.max_delay)
+                return False
+            if not self.connected:
+                # a callback's read failed and reported the connection lost
+                return False
+            log.debug(F'FSUIPC connection opened after {self.attempts} attempts')
+            self.attempts = 0
+            self.delay = self.min_delay
+            self.last_ok = time.monotonic()
+            return True
+
+    def probe(self):
+        try:
+            self.fsuipc.read(self.probe_data)
+            self.ok()
+        except self.fsuipc.FSUIPCException as e:
+            self.lost(e)
+
+    def ok(self):
+        ## a read just succeeded, so there is no need to probe for a while.
+        self.last_ok = time.monotonic()
+
+    def lost(self, error):
+        ## a read or write failed. The next attempt to reconnect is made straight away, later ones back off.
+        with self.lock:
+            if not self.connected:
+                return
+            log.warning(F'lost FSUIPC connection: {error}')
+            self.connected = False
+            self.disconnects += 1
+            self.close()
+            self.next_attempt = time.monotonic()
+            self.disconnect_pending = True
+
+    def close(self):
+        self.connection = None
+        try:
+            self.fsuipc.close()
+        except Exception:
+            pass
+
+    def statistics(self):
+        state = 'connected' if self.connected else 'disconnected'
+        return F'{state}, {self.disconnects} connections lost'
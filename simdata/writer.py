@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+## Queue of offset writes, filled from any thread and written by the sim thread.
+## Pending writes are coalesced per offset, so only the last value entered for an offset is written,
+## and everything pending is sent in a single write call per tick.
+import threading
+from concurrent.futures import Future
+
+__all__ = ['WriteQueue']
+
+class WriteQueue(object):
+    def __init__(self, schema):
+        self.schema = schema
+        self.lock = threading.Lock()
+        # (offset, type): (raw value, futures waiting for it)
+        self.pending = {}
+        self.writes = 0
+        self.coalesced = 0
+
+    def submit(self, name, value):
+        ## queue value, in read units, for the named offset. Returns a future completed once it is written.
+        ## a value replaced by a later one before it was written completes with the later write.
+        future = Future()
+        offset, type, raw = self.schema.encode(name, value)
+        with self.lock:
+            previous = self.pending.get((offset, type))
+            if previous is None:
+                self.pending[(offset, type)] = (raw, [future])
+            else:
+                previous[1].append(future)
+                self.pending[(offset, type)] = (raw, previous[1])
+                self.coalesced += 1
+        return future
+
+    def flush(self, fsuipc):
+        ## write everything pending in one call. Only called from the sim thread.
+        ## exceptions from the write are set on the futures and raised again for the caller to handle.
+        if not self.pending:
+            return 0
+        with self.lock:
+            pending, self.pending = self.pending, {}
+        data = [(offset, type, raw) for (offset, type), (raw, futures) in pending.items()]
+        try:
+            fsuipc.write(data)
+        except Exception as e:
+            self._complete(pending, exception=e)
+            raise
+        self.writes += 1
+        self._complete(pending)
+        return len(data)
+
+    def fail(self, exception):
+        ## drop everything pending, failing its futures.
+        with self.lock:
+            pending, self.pending = self.pending, {}
+        self._complete(pending, exception=exception)
+
+    def _complete(self, pending, exception=None):
+        for raw, futures in pending.values():
+            for future in futures:
+                if exception is None:
+                    future.set_result(raw)
+                else:
+                    future.set_exception(exception)
+
+    def statistics(self):
+        return F'{self.writes} writes, {self.coalesced} values replaced before they were written'
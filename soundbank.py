@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+## Sounds used by TFM, read and decoded once and played from memory.
+## Every WAV file in the sounds folder is loaded in a background thread at startup, so playing a callout never
+## waits for the disk or a decoder. A sound asked for before the background thread got to it is loaded on the spot.
+import io
+import logging
+import os
+import threading
+import pyglet
+
+log = logging.getLogger("tfm")
+
+class SoundBank(object):
+    def __init__(self, directory):
+        self.directory = directory
+        # name (file name without .wav): decoded pyglet StaticSource
+        self.sources = {}
+        self.lock = threading.Lock()
+        self.ready = threading.Event()
+
+    def names(self):
+        return [name[:-4] for name in sorted(os.listdir(self.directory)) if name.lower().endswith('.wav')]
+
+    def load(self):
+        ## start loading every sound in the background
+        thread = threading.Thread(target=self.loadAll, name='sound bank')
+        thread.daemon = True
+        thread.start()
+
+    def loadAll(self):
+        try:
+            for name in self.names():
+                self.loadSound(name)
+            log.debug(F'sound bank: {len(self.sources)} sounds loaded')
+        except Exception:
+            log.exception('error loading sounds')
+        finally:
+            self.ready.set()
+
+    def loadSound(self, name):
+        with self.lock:
+            if name in self.sources:
+                return self.sources[name]
+            path = self.path(name)
+            with open(path, 'rb') as file:
+                data = file.read()
+            source = pyglet.media.load(path, file=io.BytesIO(data), streaming=False)
+            self.sources[name] = source
+            return source
+
+    def get(self, name):
+        ## the decoded sound, loading it now if the background thread hasn't yet.
+        source = self.sources.get(name)
+        if source is None:
+            source = self.loadSound(name)
+        return source
+
+    def path(self, name):
+        ## the WAV file of a sound, for players that take a file name (winsound)
+        return os.path.join(self.directory, name + '.wav')
+
+    def play(self, name):
+        ## play a sound from memory. Returns the pyglet player.
+        return self.get(name).play()
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+## Messages waiting to be spoken.
+## The GUI speaks one message per timer tick. Messages are taken most urgent first, using the priorities of
+## announcements.rules, and in the order they were queued within a priority.
+## A message queued with a key replaces the waiting message with the same key, so a frequency tuned again or
+## a switch flicked back before the first message was spoken is only announced with its latest value.
+## Each message has a deadline: a message still waiting past it no longer describes the aircraft and is dropped.
+import heapq
+import queue
+import threading
+import time
+from announcements.rules import PRIORITY_CRITICAL, PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW
+
+__all__ = ['SpeechQueue']
+
+# seconds a message may wait, by priority
+EXPIRY = {PRIORITY_CRITICAL: 5, PRIORITY_HIGH: 5, PRIORITY_NORMAL: 15, PRIORITY_LOW: 30}
+
+# positions in a queue entry
+PRIORITY, SEQUENCE, TEXT, KEY, DEADLINE, QUEUED = range(6)
+
+class SpeechQueue(object):
+    ## used from the sim thread and the GUI thread.
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.heap = []
+        # key: entry waiting with that key
+        self.keyed = {}
+        self.sequence = 0
+        self.lock = threading.Lock()
+        # number of entries in the heap that are still to be spoken
+        self.depth = 0
+        self.max_depth = 0
+        self.spoken = 0
+        self.superseded = 0
+        self.expired = 0
+        self.wait_total = 0.0
+        self.wait_worst = 0.0
+
+    def put(self, text, priority=PRIORITY_NORMAL, key=None, expires=None):
+        ## expires: seconds the message may wait. Default: by priority.
+        now = self.clock()
+        if expires is None:
+            expires = EXPIRY.get(priority, EXPIRY[PRIORITY_LOW])
+        with self.lock:
+            self.sequence += 1
+            entry = [priority, self.sequence, text, key, now + expires, now]
+            if key is not None:
+                old = self.keyed.get(key)
+                if old is not None:
+                    # left in the heap, skipped when it comes up
+                    old[TEXT] = None
+                    self.depth -= 1
+                    self.superseded += 1
+                self.keyed[key] = entry
+            heapq.heappush(self.heap, entry)
+            self.depth += 1
+            self.max_depth = max(self.max_depth, self.depth)
+
+    def _pop(self, now):
+        # most urgent entry still to be spoken, or None. Called with the lock held.
+        heap = self.heap
+        while heap:
+            entry = heapq.heappop(heap)
+            if entry[TEXT] is None:
+                continue
+            self.depth -= 1
+            if entry[KEY] is not None and self.keyed.get(entry[KEY]) is entry:
+                del self.keyed[entry[KEY]]
+            if now > entry[DEADLINE]:
+                self.expired += 1
+                continue
+            return entry
+        return None
+
+    def get_nowait(self):
+        ## the next message to speak. Raises queue.Empty if there is none.
+        now = self.clock()
+        with self.lock:
+            entry = self._pop(now)
+            if entry is None:
+                raise queue.Empty
+            wait = now - entry[QUEUED]
+            self.spoken += 1
+            self.wait_total += wait
+            self.wait_worst = max(self.wait_worst, wait)
+            return entry[TEXT]
+
+    def empty(self):
+        return self.depth == 0
+
+    def qsize(self):
+        return self.depth
+
+    def statistics(self):
+        wait = self.wait_total / self.spoken if self.spoken else 0
+        return (F'{self.spoken} spoken, average wait {wait * 1000:.0f} ms, longest {self.wait_worst * 1000:.0f} ms, '
+            F'{self.depth} waiting (at most {self.max_depth}), {self.superseded} superseded, {self.expired} expired')
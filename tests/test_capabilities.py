@@ -0,0 +1,39 @@
+import json
+from simdata import AircraftProfile, ProfileCache, aircraft_title, probe_aircraft, INSTRUMENTS
+from simdata.capabilities import JET, PISTON
+
+def capabilities(title=b'Baron 58\0', engines=2, engine_type=PISTON, apu=0.0):
+    return {'AircraftTitle': title, 'EngineCount': engines, 'EngineType': engine_type,
+        'APUPercentage': apu, 'APUVoltage': 0.0}
+
+def test_probe():
+    record = capabilities()
+    assert aircraft_title(record) == 'Baron 58'
+    profile = probe_aircraft(record)
+    assert (profile.engines, profile.engine_type, profile.apu, profile.probed) == (2, PISTON, False, True)
+    assert probe_aircraft(capabilities(engines=0)) is None
+    assert probe_aircraft(capabilities(engines=6)) is None
+
+def test_excluded_fields():
+    excluded = AircraftProfile('Baron 58', 2, PISTON, apu=False).excluded(INSTRUMENTS)
+    assert 'Eng3N1' in excluded and 'Eng1ITT' in excluded and 'APUGenerator' in excluded
+    assert 'Eng2N1' not in excluded
+
+def test_usable_probe_wins_and_is_cached(tmp_path):
+    path = str(tmp_path / 'aircraft.json')
+    cache = ProfileCache(path)
+    cache.put(AircraftProfile('Baron 58', 1, PISTON, apu=True))
+    profile = cache.lookup('Baron 58', probe_aircraft(capabilities()))
+    # the APU seen in an earlier session is kept
+    assert (profile.engines, profile.apu) == (2, True)
+    assert json.loads((tmp_path / 'aircraft.json').read_text())['Baron 58']['engines'] == 2
+
+def test_unusable_probe_falls_back(tmp_path):
+    path = str(tmp_path / 'aircraft.json')
+    cache = ProfileCache(path)
+    profile = cache.lookup('Baron 58', None)
+    # everything is read, and nothing is cached
+    assert (profile.engines, profile.engine_type, profile.probed) == (4, JET, False)
+    assert not (tmp_path / 'aircraft.json').exists()
+    cache.put(probe_aircraft(capabilities()))
+    assert ProfileCache(path).lookup('Baron 58', None).engines == 2
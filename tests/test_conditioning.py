@@ -0,0 +1,91 @@
+from announcements import Rule, RuleTable, SignalConditioner
+from simdata import InstrumentRecord, INSTRUMENTS
+
+def make_record():
+    record = InstrumentRecord(INSTRUMENTS)
+    record.commit()
+    return record
+
+def step(record, conditioner, values, now):
+    ## one instrument read: set the values and filter the changes, as readInstruments does before its commit
+    for name, value in values.items():
+        record[name] = value
+    return conditioner.filter(record, record.changes(), now)
+
+def test_deadband_adds_up_small_changes():
+    record = make_record()
+    conditioner = SignalConditioner({'ElevatorTrim': (0.1, 0)})
+    conditioner.reset(record)
+    assert step(record, conditioner, {'ElevatorTrim': 0.05}, 0) == set()
+    record.commit()
+    assert step(record, conditioner, {'ElevatorTrim': 0.1}, 1) == {'ElevatorTrim'}
+    record.commit()
+    # wandering back within the deadband of the value announced
+    assert step(record, conditioner, {'ElevatorTrim': 0.05}, 2) == set()
+
+def test_rules_compare_against_the_value_last_announced():
+    record = make_record()
+    conditioner = SignalConditioner({'ElevatorTrim': (0.1, 0)})
+    conditioner.reset(record)
+    rules = RuleTable([Rule(('ElevatorTrim',), None,
+        lambda new, old: F"{old['ElevatorTrim']:.2f} to {new['ElevatorTrim']:.2f}")])
+    step(record, conditioner, {'ElevatorTrim': 0.06}, 0)
+    record.commit()
+    changed = step(record, conditioner, {'ElevatorTrim': 0.12}, 1)
+    # the message spans both steps
+    messages = rules.evaluate(record, changed, old=conditioner.old(record))
+    assert [message for priority, message, key in messages] == ['0.00 to 0.12']
+    # the record itself is left alone
+    assert record.old['ElevatorTrim'] == 0.06
+
+def test_debounce_waits_for_the_value_to_hold():
+    record = make_record()
+    conditioner = SignalConditioner({'ParkingBrake': (0, 0.5)})
+    conditioner.reset(record)
+    assert step(record, conditioner, {'ParkingBrake': 1}, 0) == set()
+    record.commit()
+    assert conditioner.release(record, 0.3) == set()
+    assert conditioner.release(record, 0.5) == {'ParkingBrake'}
+    assert conditioner.release(record, 1.0) == set()
+
+def test_release_after_commit_leaves_the_record_unchanged():
+    record = make_record()
+    conditioner = SignalConditioner({'ParkingBrake': (0, 0.5)})
+    conditioner.reset(record)
+    step(record, conditioner, {'ParkingBrake': 1}, 0)
+    record.commit()
+    # readSettled releases the change after readInstruments' commit
+    assert conditioner.release(record, 0.5) == {'ParkingBrake'}
+    assert conditioner.old(record)['ParkingBrake'] == 0
+    assert record.changes() == set()
+    assert step(record, conditioner, {}, 1.0) == set()
+    assert conditioner.suppressed == 0
+
+def test_debounce_drops_flicker():
+    record = make_record()
+    conditioner = SignalConditioner({'ParkingBrake': (0, 0.5)})
+    conditioner.reset(record)
+    step(record, conditioner, {'ParkingBrake': 1}, 0)
+    record.commit()
+    assert step(record, conditioner, {'ParkingBrake': 0}, 0.2) == set()
+    record.commit()
+    assert conditioner.release(record, 1.0) == set()
+    assert conditioner.suppressed == 1
+
+def test_debounce_restarts_on_a_new_value():
+    record = make_record()
+    conditioner = SignalConditioner({'Transponder': (0, 1)})
+    conditioner.reset(record)
+    step(record, conditioner, {'Transponder': 1000}, 0)
+    record.commit()
+    step(record, conditioner, {'Transponder': 1200}, 0.8)
+    record.commit()
+    assert conditioner.release(record, 1.5) == set()
+    assert conditioner.release(record, 1.8) == {'Transponder'}
+    assert record['Transponder'] == 1200
+
+def test_unconditioned_fields_pass_through():
+    record = make_record()
+    conditioner = SignalConditioner({'ParkingBrake': (0, 0.5)})
+    conditioner.reset(record)
+    assert step(record, conditioner, {'Gear': 16383}, 0) == {'Gear'}
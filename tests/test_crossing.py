@@ -0,0 +1,46 @@
+from announcements import CrossingDetector, UP, DOWN
+
+def test_every_threshold_passed_in_one_step():
+    detector = CrossingDetector(range(1000, 10001, 1000))
+    detector.update(500)
+    assert detector.update(3500) == [1000, 2000, 3000]
+    assert detector.update(1500) == [3000, 2000]
+
+def test_first_sample_is_only_the_starting_point():
+    detector = CrossingDetector([1000])
+    assert detector.update(1500) == []
+    assert detector.update(500) == [1000]
+
+def test_hysteresis():
+    detector = CrossingDetector([1000], hysteresis=100)
+    detector.update(950)
+    assert detector.update(1010) == [1000]
+    # hovering around the threshold
+    assert detector.update(990) == []
+    assert detector.update(1020) == []
+    # far enough away arms it again
+    detector.update(1150)
+    assert detector.update(990) == [1000]
+
+def test_direction():
+    up = CrossingDetector([1000], direction=UP)
+    down = CrossingDetector([1000], direction=DOWN)
+    for detector in (up, down):
+        detector.update(900)
+    assert up.update(1100) == [1000]
+    assert down.update(1100) == []
+    assert up.update(900) == []
+    assert down.update(900) == [1000]
+
+def test_jump_is_not_a_crossing():
+    detector = CrossingDetector(range(1000, 10001, 1000), max_step=5000)
+    detector.update(1500)
+    assert detector.update(9500) == []
+    assert detector.update(8500) == [9000]
+
+def test_reset():
+    detector = CrossingDetector([1000], hysteresis=100)
+    detector.update(900)
+    detector.update(1100)
+    detector.reset(1050)
+    assert detector.update(950) == [1000]
@@ -0,0 +1,47 @@
+from announcements import EngineMonitor
+from simdata import InstrumentRecord, INSTRUMENTS
+
+def start(record, engine, **values):
+    for field, value in values.items():
+        record[F'Eng{engine}{field}'] = value
+
+def test_start_transitions_once_per_start():
+    record = InstrumentRecord(INSTRUMENTS)
+    engines = EngineMonitor(record, count=2)
+    start(record, 2, Starter=1, N2=6)
+    assert engines.update() == ['number 2, 5 percent N2']
+    start(record, 2, FuelFlow=200, N1=8)
+    assert engines.update() == ['Number 2 fuel flow', 'number 2, 5 percent N1']
+    assert engines.update() == []
+
+def test_nothing_without_the_starter():
+    record = InstrumentRecord(INSTRUMENTS)
+    engines = EngineMonitor(record, count=2)
+    start(record, 1, N2=60, N1=20, FuelFlow=900)
+    assert engines.update() == []
+
+def test_armed_again_after_shutdown():
+    record = InstrumentRecord(INSTRUMENTS)
+    engines = EngineMonitor(record, count=1)
+    start(record, 1, Starter=1, FuelFlow=200)
+    assert engines.update() == ['Number 1 fuel flow']
+    start(record, 1, Starter=0, FuelFlow=0)
+    engines.update()
+    start(record, 1, Starter=1, FuelFlow=200)
+    assert engines.update() == ['Number 1 fuel flow']
+
+def test_temperature_of_the_engine_being_started():
+    record = InstrumentRecord(INSTRUMENTS)
+    engines = EngineMonitor(record, count=2)
+    assert engines.temperature() is None
+    start(record, 2, Starter=1, Combustion=1, ITT=400)
+    assert list(engines.starting()) == [False, True]
+    assert engines.temperature() == (2, 400)
+    assert engines.temperature(metric=False) == (2, 752)
+
+def test_engines_the_aircraft_does_not_have_are_ignored():
+    record = InstrumentRecord(INSTRUMENTS)
+    engines = EngineMonitor(record, count=2)
+    start(record, 3, Starter=1, FuelFlow=200)
+    assert engines.count == 2
+    assert engines.update() == []
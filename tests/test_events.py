@@ -0,0 +1,30 @@
+import pytest
+from events import Batch, Channel
+
+def test_listeners_are_checked_when_they_connect():
+    channel = Channel('test', 'name', 'value')
+    with pytest.raises(TypeError):
+        channel.connect(lambda msg: None)
+    received = []
+    channel.connect(lambda name, value: received.append((name, value)))
+    channel.send('connected', True)
+    assert received == [('connected', True)]
+
+def test_a_failing_listener_does_not_stop_the_others():
+    channel = Channel('test', 'msg')
+    received = []
+    channel.connect(lambda msg: 1 / 0)
+    channel.connect(received.append)
+    channel.send('hello')
+    assert received == ['hello']
+
+def test_batch():
+    channel = Channel('test', 'msg')
+    batch = Batch(channel)
+    channel.send('one')
+    channel.send('two')
+    assert batch.drain() == ['one', 'two']
+    assert batch.drain() == []
+    batch.close()
+    channel.send('three')
+    assert batch.drain() == []
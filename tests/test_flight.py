@@ -0,0 +1,114 @@
+## TFM flown over the fake simulator's profiles by the replay engine, checking what is said and when.
+import os
+import pytest
+
+pytest.importorskip('platform_utils')
+pytest.importorskip('babel')
+pyglet = pytest.importorskip('pyglet')
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.fixture(scope='module')
+def flightsim(tmp_path_factory):
+    # flightsim picks its pyuipc module when it is imported
+    os.environ.setdefault('TFM_FAKE_PROFILE', 'taxi')
+    pyglet.options['audio'] = ('silent',)
+    import paths
+    paths.directory = str(tmp_path_factory.mktemp('tfm'))
+    import config
+    import config_utils
+    config.app = config_utils.load_config(os.path.join(paths.directory, 'tfm.ini'), os.path.join(ROOT, 'tfm.defaults'))
+    # nothing is looked up on geonames
+    config.app['config']['flight_following'] = False
+    import flightsim
+    return flightsim
+
+def fly(flightsim, profile):
+    ## runs TFM over a profile as fast as possible. Returns the messages spoken and the sounds played,
+    ## each as (simulator time, message or sound name).
+    import fakeuipc
+    import speech
+    if isinstance(profile, str):
+        profile = fakeuipc.get_profile(profile)
+    fakeuipc.simulator = fakeuipc.FakeSimulator(profile, None)
+    tfm = flightsim.TFM(speech.SpeechQueue(), speech.SpeechQueue())
+    sounds = []
+    tfm.sounds.play = lambda name: sounds.append((fakeuipc.simulator.time, name))
+    engine = fakeuipc.ReplayEngine(tfm, fakeuipc.simulator)
+    engine.run()
+    return engine.spoken, sounds
+
+def said(spoken, message):
+    ## times message was spoken
+    return [time for time, text in spoken if text == message]
+
+@pytest.fixture(scope='module')
+def approach(flightsim):
+    return fly(flightsim, 'ils_approach')
+
+# ils_approach: radio altitude falls from 2970 feet at 70 s to 50 feet at 270 s, then to 0 at 275 s
+def radio_altitude_crossed(height):
+    if height >= 50:
+        return 70 + (2970 - height) / (2920 / 200)
+    return 270 + (50 - height) / 10
+
+def test_gear_and_flaps(approach):
+    spoken, sounds = approach
+    gear = said(spoken, 'Gear down.')
+    assert len(gear) == 1 and 68 <= gear[0] < 70
+    # flaps are announced once they have settled, not on every step of their travel
+    assert [round(time) for time in said(spoken, 'Flaps 15')] == [69]
+    assert [round(time) for time in said(spoken, 'Flaps 30')] == [101]
+
+def test_altitude_callouts(approach):
+    spoken, sounds = approach
+    # altitude falls from 3400 feet at 70 s to 480 feet at 270 s
+    for altitude in (3000, 2000, 1000):
+        crossed = 70 + (3400 - altitude) / (2920 / 200)
+        times = said(spoken, F'{altitude} feet')
+        assert len(times) == 1 and crossed <= times[0] < crossed + 2
+
+def test_gpws_callouts_are_timed_to_the_crossing(approach):
+    spoken, sounds = approach
+    heights = [2500, 1000, 500, 400, 300, 200, 100, 50, 40, 30, 20, 10]
+    assert [int(name) for time, name in sounds] == heights
+    for (time, name), height in zip(sounds, heights):
+        # fired up to the audio latency early, so the callout is heard at its height
+        assert radio_altitude_crossed(height) - 0.3 <= time <= radio_altitude_crossed(height) + 0.1
+
+def short_approach(name, **state):
+    ## a descent with the gear going down at 40 s and the given simulator state from 30 s to 60 s
+    import fakeuipc
+    from fakeuipc.profiles import PARKED
+    on = dict(state)
+    off = {field: False for field in state}
+    return fakeuipc.Profile(name, 90, [
+        (0, PARKED),
+        (0, {'OnGround': False, 'ParkingBrake': False, 'Gear': 0.0, 'Altitude': 3400.0, 'RadioAltimeter': 2970.0,
+            'AirspeedIndicated': 180.0, 'GroundSpeed': 185.0, 'VerticalSpeed': -600.0}),
+        (30, on),
+        (40, {'Gear': 16383.0, 'LandingLights': True}),
+        (60, off),
+    ])
+
+def test_nothing_said_while_paused(flightsim):
+    spoken, sounds = fly(flightsim, short_approach('paused', Paused=True))
+    # the pause is noticed within a second
+    assert [text for time, text in spoken if 31 <= time < 60] == []
+    # changes made while paused are announced once the simulator runs again
+    gear = said(spoken, 'Gear down.')
+    assert len(gear) == 1 and 60 <= gear[0] < 62
+
+def test_nothing_said_while_slewing(flightsim):
+    spoken, sounds = fly(flightsim, short_approach('slewed', SlewMode=True))
+    assert [text for time, text in spoken if 31 <= time < 60] == []
+    # where the slew ended is the new baseline, not a change to announce
+    assert said(spoken, 'Gear down.') == []
+    assert said(spoken, 'Landing Lights on.') == []
+
+def test_atc_menu_is_read(flightsim):
+    spoken, sounds = fly(flightsim, 'simconnect_burst')
+    # the title line of the menu isn't read
+    for line in ('Seattle Ground', 'Request taxi', 'Request IFR clearance', 'Cancel'):
+        times = said(spoken, line)
+        assert len(times) == 1 and 5 <= times[0] < 7
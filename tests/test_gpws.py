@@ -0,0 +1,48 @@
+import pytest
+from announcements import GPWSCallouts
+
+def descend(gpws, start, rate, until, interval=0.05):
+    ## samples a steady descent from start feet at rate feet per second. Returns (time, height) of each callout.
+    fired = []
+    for sample in range(int(until / interval) + 1):
+        time = sample * interval
+        for height in gpws.update(start - rate * time, -rate * 60, time):
+            fired.append((time, height))
+    return fired
+
+def test_fired_ahead_by_the_audio_latency():
+    gpws = GPWSCallouts([500, 100, 50], output_latency=0.2)
+    fired = descend(gpws, 600, 15, 40)
+    assert [height for time, height in fired] == [500, 100, 50]
+    for time, height in fired:
+        heard = time + 0.2
+        # within half a sample of the moment the aircraft passes the height
+        assert heard == pytest.approx((600 - height) / 15, abs=0.03)
+    assert gpws.late == 0
+
+def test_height_passed_between_samples_fires_late():
+    gpws = GPWSCallouts([500], output_latency=0.1)
+    gpws.update(700, -3000, 0.0)
+    gpws.update(600, -3000, 1.0)
+    assert gpws.update(400, -3000, 2.0) == [500]
+    assert gpws.late == 1
+
+def test_not_while_climbing():
+    gpws = GPWSCallouts([500])
+    gpws.update(400, 1000, 0.0)
+    assert gpws.update(600, 1000, 1.0) == []
+
+def test_armed_again_after_a_go_around():
+    gpws = GPWSCallouts([500], rearm=100)
+    assert [height for time, height in descend(gpws, 600, 15, 10)] == [500]
+    # climbed back above 600 feet, then down again
+    gpws.reset()
+    assert [height for time, height in descend(gpws, 700, 15, 20)] == [500]
+
+def test_reset_forgets_the_descent_rate():
+    gpws = GPWSCallouts([500])
+    gpws.update(5000, -1000, 0.0)
+    gpws.update(4990, -1000, 1.0)
+    gpws.reset()
+    # a slew ending just above a callout height is a new starting point
+    assert gpws.update(510, -1000, 2.0) == []
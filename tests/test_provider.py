@@ -0,0 +1,70 @@
+import fakeuipc
+from simdata import group_offsets, SnapshotProvider, INSTRUMENTS
+
+class Clock(object):
+    def __init__(self, now=0.0):
+        self.now = now
+    def __call__(self):
+        return self.now
+
+def connect(clock):
+    fakeuipc.load_profile('ils_approach', 1.0)
+    fakeuipc.open(0)
+    groups = group_offsets(INSTRUMENTS)
+    provider = SnapshotProvider(groups, 0.25, clock)
+    provider.prepare(fakeuipc)
+    return provider
+
+def test_first_get_reads_at_time_zero():
+    provider = connect(Clock(0.0))
+    provider.get(fakeuipc)
+    assert provider.reads == 1 and provider.group_reads == len(provider.groups)
+
+def test_fresh_groups_are_served_from_the_record():
+    clock = Clock()
+    provider = connect(clock)
+    provider.get(fakeuipc)
+    clock.now = 0.1
+    provider.get(fakeuipc)
+    assert provider.reads == 1
+    assert provider.reads_saved == len(provider.groups)
+
+def test_groups_due_together_are_read_in_one_request():
+    clock = Clock()
+    provider = connect(clock)
+    assert [group.rate for group in provider.groups] == [20, 5, 1, 0.1]
+    # ten seconds of polls at 20 Hz
+    for tick in range(200):
+        clock.now = tick / 20
+        provider.poll(fakeuipc)
+    # one request per poll, each group read at its own rate
+    assert provider.reads == 200
+    assert [round(group.read_at, 2) for group in provider.groups] == [9.95, 9.8, 9.0, 0.0]
+    assert provider.group_reads == 200 + 50 + 10 + 1
+
+def test_polls_save_nothing():
+    clock = Clock()
+    provider = connect(clock)
+    for tick in range(100):
+        clock.now = tick / 20
+        provider.poll(fakeuipc)
+    # groups that weren't due yet weren't asked for
+    assert provider.reads_saved == 0
+
+def test_polling_follows_the_simulation_rate():
+    clock = Clock()
+    provider = connect(clock)
+    slowest = provider.groups[-1]
+    provider.poll(fakeuipc, 4.0)
+    clock.now = slowest.interval / 4
+    provider.poll(fakeuipc, 4.0)
+    assert slowest.read_at == clock.now
+
+def test_invalidate():
+    clock = Clock()
+    provider = connect(clock)
+    provider.get(fakeuipc)
+    provider.invalidate()
+    assert provider.record.stale
+    provider.get(fakeuipc)
+    assert provider.reads == 2 and not provider.record.stale
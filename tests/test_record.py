@@ -0,0 +1,29 @@
+from simdata import InstrumentRecord, INSTRUMENTS
+
+def test_changes_since_commit():
+    record = InstrumentRecord(INSTRUMENTS)
+    record.commit()
+    assert record.changes() == set()
+    record['Gear'] = 16383
+    record['Com1Freq'] = 119.9
+    assert record.changes() == {'Gear', 'Com1Freq'}
+    assert record.old['Gear'] == 0
+    record.commit()
+    assert record.changes() == set()
+    assert record.old['Gear'] == 16383
+
+def test_value_changed_back_is_no_change():
+    record = InstrumentRecord(INSTRUMENTS)
+    record['Flaps'] = 15
+    record.commit()
+    record['Flaps'] = 30
+    record['Flaps'] = 15
+    assert record.changes() == set()
+
+def test_changes_of_text_fields():
+    record = InstrumentRecord(INSTRUMENTS)
+    record['NextWPId'] = 'SEA'
+    record.commit()
+    record['NextWPId'] = 'OLM'
+    assert record.changes() == {'NextWPId'}
+    assert record.old['NextWPId'] == 'SEA'
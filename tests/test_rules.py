@@ -0,0 +1,33 @@
+from announcements import PRIORITY_HIGH, PRIORITY_LOW, Rule, RuleTable, INSTRUMENT_RULES
+from simdata import InstrumentRecord, INSTRUMENTS
+
+def test_only_rules_of_changed_fields_are_evaluated():
+    record = InstrumentRecord(INSTRUMENTS)
+    calls = []
+    def condition(name):
+        return lambda new, old: calls.append(name) or True
+    table = RuleTable([Rule(('Gear',), condition('Gear'), 'gear'), Rule(('Flaps',), condition('Flaps'), 'flaps')])
+    assert [message for priority, message, key in table.evaluate(record, {'Gear'})] == ['gear']
+    assert calls == ['Gear']
+
+def test_most_urgent_first():
+    record = InstrumentRecord(INSTRUMENTS)
+    table = RuleTable([Rule(('Gear',), None, 'low', PRIORITY_LOW), Rule(('Gear',), None, 'high', PRIORITY_HIGH)])
+    assert [message for priority, message, key in table.evaluate(record, {'Gear'})] == ['high', 'low']
+
+def test_settings_switch_rules_off():
+    class Settings(object):
+        trimEnabled = False
+    record = InstrumentRecord(INSTRUMENTS)
+    table = RuleTable([Rule(('ElevatorTrim',), None, 'trim', setting='trimEnabled')])
+    assert table.evaluate(record, {'ElevatorTrim'}, Settings()) == []
+
+def test_gear_and_spoiler_rules_share_a_key():
+    record = InstrumentRecord(INSTRUMENTS)
+    table = RuleTable(INSTRUMENT_RULES)
+    record['Gear'] = 16383
+    record.commit()
+    record['Gear'] = 0
+    record['Spoilers'] = 16384
+    assert sorted((message, key) for priority, message, key in table.evaluate(record, {'Gear', 'Spoilers'})) == \
+        [('Gear up.', 'gear'), ('Spoilers deployed', 'spoilers')]
@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+from simdata import InstrumentDecoder, InstrumentRecord, INSTRUMENTS
+from simdata.decoder import bcd_decode
+from simdata.schema import bcd_encode
+
+def test_bcd_round_trip():
+    numbers = np.arange(10000)
+    encoded = np.array([bcd_encode(int(number)) for number in numbers])
+    assert bcd_encode(1200) == 0x1200
+    assert bcd_decode(0x7700) == 7700
+    assert (bcd_decode(encoded) == numbers).all()
+
+def decode(names, raw):
+    record = InstrumentRecord(INSTRUMENTS)
+    InstrumentDecoder(INSTRUMENTS, names, record).decode(raw)
+    return record
+
+@pytest.mark.parametrize('squawk', [0, 1200, 4521, 7700, 7777])
+def test_transponder_write_then_read(squawk):
+    offset, type, raw = INSTRUMENTS.encode('Transponder', squawk)
+    assert decode(['Transponder'], [raw])['Transponder'] == squawk
+
+@pytest.mark.parametrize('frequency', [118.0, 119.9, 121.5, 124.25, 136.97])
+def test_com_frequency_write_then_read(frequency):
+    offset, type, raw = INSTRUMENTS.encode('Com1Freq', frequency)
+    assert decode(['Com1Freq'], [raw])['Com1Freq'] == pytest.approx(frequency)
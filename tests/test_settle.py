@@ -0,0 +1,46 @@
+from announcements import SettleDetector, SETTLE_RULES
+from simdata import InstrumentRecord, INSTRUMENTS
+
+class Settings(object):
+    flapsEnabled = True
+    APEnabled = True
+    trimEnabled = True
+
+def messages(settle, record, now):
+    return [message for priority, message, key in settle.update(record, now, Settings())]
+
+def test_announced_once_settled():
+    record = InstrumentRecord(INSTRUMENTS)
+    settle = SettleDetector(SETTLE_RULES, 0.6)
+    settle.reset(record)
+    # flaps travel from 0 to 15 over a second
+    for step in range(5):
+        record['Flaps'] = 3 * (step + 1)
+        assert messages(settle, record, step * 0.25) == []
+    assert settle.in_motion
+    assert messages(settle, record, 1.5) == []
+    assert messages(settle, record, 1.6) == ['Flaps 15']
+    assert not settle.in_motion
+    assert messages(settle, record, 3.0) == []
+
+def test_moved_back_is_not_announced():
+    record = InstrumentRecord(INSTRUMENTS)
+    settle = SettleDetector(SETTLE_RULES, 0.6)
+    settle.reset(record)
+    record['ApHeading'] = 10
+    messages(settle, record, 0)
+    record['ApHeading'] = 0
+    messages(settle, record, 0.2)
+    assert messages(settle, record, 1.0) == []
+    assert not settle.in_motion
+
+def test_settled_trim_goes_through_the_deadband():
+    record = InstrumentRecord(INSTRUMENTS)
+    settle = SettleDetector(SETTLE_RULES, 0.6, {'ElevatorTrim': (0.1, 0)})
+    settle.reset(record)
+    record['ElevatorTrim'] = 0.05
+    messages(settle, record, 0)
+    assert messages(settle, record, 1.0) == []
+    record['ElevatorTrim'] = 0.12
+    messages(settle, record, 2.0)
+    assert messages(settle, record, 3.0) == ['Trim up 0.12']
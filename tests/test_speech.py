@@ -0,0 +1,58 @@
+import queue
+import pytest
+from announcements import PRIORITY_CRITICAL, PRIORITY_HIGH, PRIORITY_LOW
+from speech import SpeechQueue
+
+class Clock(object):
+    def __init__(self):
+        self.now = 0.0
+    def __call__(self):
+        return self.now
+
+def spoken(speech):
+    messages = []
+    while True:
+        try:
+            messages.append(speech.get_nowait())
+        except queue.Empty:
+            return messages
+
+def test_most_urgent_first_then_in_order():
+    speech = SpeechQueue(Clock())
+    speech.put('one')
+    speech.put('flaps', PRIORITY_LOW)
+    speech.put('two')
+    speech.put('terrain', PRIORITY_CRITICAL)
+    assert spoken(speech) == ['terrain', 'one', 'two', 'flaps']
+    assert speech.empty()
+
+def test_same_key_replaces_the_waiting_message():
+    speech = SpeechQueue(Clock())
+    speech.put('com 1, 119.9', key='com1')
+    speech.put('Gear down.', PRIORITY_HIGH, 'gear')
+    speech.put('com 1, 120.1', key='com1')
+    assert speech.qsize() == 2
+    assert spoken(speech) == ['Gear down.', 'com 1, 120.1']
+    assert speech.superseded == 1
+
+def test_key_spoken_already_is_queued_again():
+    speech = SpeechQueue(Clock())
+    speech.put('Gear down.', PRIORITY_HIGH, 'gear')
+    assert spoken(speech) == ['Gear down.']
+    speech.put('Gear up.', PRIORITY_HIGH, 'gear')
+    assert spoken(speech) == ['Gear up.']
+
+def test_stale_messages_expire():
+    clock = Clock()
+    speech = SpeechQueue(clock)
+    speech.put('Gear down.', PRIORITY_HIGH)
+    speech.put('com 1, 119.9')
+    speech.put('lasting', expires=60)
+    clock.now = 10
+    assert spoken(speech) == ['com 1, 119.9', 'lasting']
+    assert speech.expired == 1
+
+def test_empty_queue():
+    speech = SpeechQueue(Clock())
+    with pytest.raises(queue.Empty):
+        speech.get_nowait()
@@ -0,0 +1,37 @@
+import threading
+from fakeuipc import OffsetBackend
+from simdata import ConnectionSupervisor
+
+def test_connect_callbacks_can_read():
+    fsuipc = OffsetBackend()
+    supervisor = ConnectionSupervisor(fsuipc)
+    seen = []
+    supervisor.on_connect(lambda fsuipc: seen.append(supervisor.connected))
+    assert supervisor.poll()
+    assert seen == [True]
+
+def test_failing_connect_callback_leaves_it_closed():
+    fsuipc = OffsetBackend()
+    supervisor = ConnectionSupervisor(fsuipc)
+    def fail(fsuipc):
+        raise fsuipc.FSUIPCException(4, 'IPC request contains bad data')
+    supervisor.on_connect(fail)
+    assert not supervisor.poll()
+    assert not supervisor.connected
+
+def test_disconnect_callbacks_run_on_the_next_poll():
+    fsuipc = OffsetBackend()
+    supervisor = ConnectionSupervisor(fsuipc)
+    calls = []
+    supervisor.on_disconnect(lambda: calls.append(threading.current_thread()))
+    supervisor.poll()
+    # a hotkey's read fails on another thread
+    thread = threading.Thread(target=supervisor.lost, args=(fsuipc.FSUIPCException(4),))
+    thread.start()
+    thread.join()
+    assert not supervisor.connected and calls == []
+    # the callbacks run before reconnecting
+    assert supervisor.poll()
+    assert calls == [threading.current_thread()]
+    supervisor.poll()
+    assert len(calls) == 1
@@ -64,7 +64,8 @@ import settings
 import threading
 from accessible_output2.outputs import sapi5
 from accessible_output2.outputs import auto
-from pubsub import pub
+import events
+import speech
 import widgetUtils
 # Import own packages.
 
@@ -102,10 +103,10 @@ def commandMode():
     try:
         keyboard_handler.unregister_all_keys()
         # send a message indicating that the next speech event has been triggered by a hotkey.
-        pub.sendMessage("triggered", msg=True)
+        events.triggered.send(True)
         if config.app['config']['use_sapi'] == False:
-            filename = 'sounds\\command.wav'
-            winsound.PlaySound(filename, winsound.SND_FILENAME|winsound.SND_ASYNC)
+            # winsound can't play from memory asynchronously; the file is played by name and returns at once
+            winsound.PlaySound(tfm.sounds.path('command'), winsound.SND_FILENAME|winsound.SND_ASYNC)
         else:
             output.speak('command?', interrupt=True)
         keymap = {
@@ -183,10 +184,13 @@ class Form(wx.Panel):
             (self.inches_edit, wx.EVT_TEXT_ENTER, self.onInchesEntered),
             (self.com1_edit, wx.EVT_TEXT_ENTER, self.onCom1Entered)]:
                 control.Bind(event, handler)
-        pub.subscribe(self.update_logger, "update")
+        # announcements arrive from the sim thread. The frame timer appends them in batches on the GUI thread.
+        self.announcements = events.Batch(events.announcement)
         
-    def update_logger(self, msg):
-        self.logger.AppendText(msg + '\n')
+    def update_logger(self):
+        messages = self.announcements.drain()
+        if messages:
+            self.logger.AppendText(''.join(msg + '\n' for msg in messages))
 
     def doLayout(self):
         ''' Layout the controls by means of sizers. '''
@@ -257,7 +261,7 @@ class Form(wx.Panel):
 class TFMFrame(wx.Frame):
     def __init__(self, *args, **kwargs):
         super(TFMFrame, self).__init__(*args, **kwargs)
-        panel = Form(self)
+        self.panel = Form(self)
         # define the menu bar
         # application menu
         app_menu = wx.Menu()
@@ -282,7 +286,6 @@ class TFMFrame(wx.Frame):
         self.timer = wx.Timer(self)  
         self.Bind(wx.EVT_TIMER, self.update, self.timer)  
         self.timer.Start(50)
-        pub.subscribe(self.onSimClose, "exit")
 
 
     # menu event handlers
@@ -310,17 +313,15 @@ class TFMFrame(wx.Frame):
     def onIssue(self, event):
         webbrowser.open_new_tab(application.report_bugs_url)
     
-    def onSimClose(self, msg):
-        self.Close()
-
     # event handler for the timer
     def update(self, event):
-        if not main_queue.empty():
-            message = main_queue.get_nowait()
-            output.speak(message)
-        if not sapi_queue.empty():
-            message = sapi_queue.get_nowait()
-            sapi_output.speak(message)
+        self.panel.update_logger()
+        # one message per tick, most urgent first. Messages left waiting too long are dropped by the queue.
+        for speech_queue, speech_output in ((main_queue, output), (sapi_queue, sapi_output)):
+            try:
+                speech_output.speak(speech_queue.get_nowait())
+            except queue.Empty:
+                pass
 
 output = None
 sapi_output = None
@@ -360,17 +361,20 @@ if __name__ == '__main__':
     # register the command key
     keyboard_handler.register_keys({config.app['hotkeys']['command_key']: commandMode})    
     # register the listener for resetting hotkeys
-    pub.subscribe(reset_hotkeys, "reset")
+    events.reset.connect(reset_hotkeys)
     # breakpoint()
     # setup the queue to receive speech messages
-    main_queue = queue.Queue()
-    sapi_queue = queue.Queue()
+    main_queue = speech.SpeechQueue()
+    sapi_queue = speech.SpeechQueue()
     # start the main tfm class.
     tfm = flightsim.TFM(main_queue, sapi_queue)
     tfm.daemon=True
     tfm.start()
     frame.Show()
     app.MainLoop()    
+    # let the sim thread close the flight recording before exiting
+    tfm.stop()
+    tfm.join(5)
 
 
 